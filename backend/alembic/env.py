@@ -11,12 +11,18 @@ from alembic import context
 
 from app.database import Base
 from app.models.activity import Activity
+from app.models.activity_rollup import ActivityDailyCount, ActivityRollupDirtyDay
+from app.models.calendar_day import CalendarDay
+from app.models.distribution_sketch import DistributionSketch
+from app.models.kpi_snapshot import KpiSnapshot
 from app.models.company import Company
 from app.models.deal import Deal
 from app.models.user import User
 from app.models.agency import Agency
 from app.models.note import Note
 from app.models.attachment import Attachment
+from app.models.stored_file import StoredFile
+from app.models.upload_session import UploadSession
 from app.models.audit_log import AuditLog
 from app.models.enums import enum
 
@@ -0,0 +1,32 @@
+"""Add related item indexes to notes and attachments
+
+Revision ID: 1376ef9cda4b
+Revises: dff95e9c50cf
+Create Date: 2026-10-19 16:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1376ef9cda4b'
+down_revision: Union[str, Sequence[str], None] = 'dff95e9c50cf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # created_at lets the per-item listings read in order and the counts
+    # (count, max(created_at)) be answered from the index alone.
+    op.create_index('ix_notes_related_item', 'notes', ['related_to', 'related_id', 'created_at'], unique=False)
+    op.create_index('ix_attachments_related_item', 'attachments', ['related_to', 'related_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attachments_related_item', table_name='attachments')
+    op.drop_index('ix_notes_related_item', table_name='notes')
@@ -0,0 +1,164 @@
+"""Partition activities by date and add daily activity rollups
+
+Revision ID: 173e108c8ac3
+Revises: 1eae6d091f18
+Create Date: 2026-10-19 19:30:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '173e108c8ac3'
+down_revision: Union[str, Sequence[str], None] = '1eae6d091f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+activity_type = postgresql.ENUM(name='activity_type', create_type=False)
+
+# Rolls activities up per JST day; kept in sync with
+# app.activity_maintenance._rollup_select().
+ROLLUP_INSERT = """
+    INSERT INTO activity_daily_counts (day, hour, user_id, type, activity_count)
+    SELECT (a.date AT TIME ZONE 'Asia/Tokyo')::date,
+           extract(hour FROM a.date AT TIME ZONE 'Asia/Tokyo')::smallint,
+           d.user_id, a.type, count(*)
+    FROM activities a JOIN deals d ON d.id = a.deal_id
+    GROUP BY 1, 2, 3, 4
+"""
+
+MARK_DIRTY_FUNCTION = """
+CREATE FUNCTION mark_activity_days_dirty() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM activity_daily_counts;
+        DELETE FROM activity_rollup_dirty_days;
+        RETURN NULL;
+    END IF;
+    -- DO UPDATE (not DO NOTHING) locks the day's row until this transaction
+    -- commits, so a concurrent refresh can't clear it before the new rows
+    -- are visible.
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO activity_rollup_dirty_days (day)
+        SELECT DISTINCT (date AT TIME ZONE 'Asia/Tokyo')::date FROM new_rows
+        ON CONFLICT (day) DO UPDATE SET marked_at = now();
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO activity_rollup_dirty_days (day)
+        SELECT DISTINCT (date AT TIME ZONE 'Asia/Tokyo')::date FROM old_rows
+        ON CONFLICT (day) DO UPDATE SET marked_at = now();
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+TRIGGERS = [
+    "CREATE TRIGGER activities_mark_dirty_insert AFTER INSERT ON activities "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION mark_activity_days_dirty()",
+    "CREATE TRIGGER activities_mark_dirty_update AFTER UPDATE ON activities "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION mark_activity_days_dirty()",
+    "CREATE TRIGGER activities_mark_dirty_delete AFTER DELETE ON activities "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION mark_activity_days_dirty()",
+    "CREATE TRIGGER activities_mark_dirty_truncate AFTER TRUNCATE ON activities "
+    "FOR EACH STATEMENT EXECUTE FUNCTION mark_activity_days_dirty()",
+]
+
+
+def _activities_table(name, *constraints, **kwargs):
+    return op.create_table(name,
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('activities_id_seq'::regclass)"), nullable=False),
+    sa.Column('deal_id', sa.Integer(), nullable=False),
+    sa.Column('type', activity_type, nullable=False),
+    sa.Column('date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['deal_id'], ['deals.id'], name='activities_deal_id_fkey'),
+    *constraints,
+    **kwargs
+    )
+
+
+def _swap_out_activities():
+    """Renames the current table out of the way, freeing its index names."""
+    op.execute("ALTER TABLE activities RENAME TO activities_old")
+    op.drop_index('ix_activities_deal_id_date', table_name='activities_old')
+    op.drop_index('ix_activities_id', table_name='activities_old')
+    op.drop_constraint('activities_pkey', 'activities_old', type_='primary')
+    op.drop_constraint('activities_deal_id_fkey', 'activities_old', type_='foreignkey')
+
+
+def _swap_in_activities():
+    op.execute("INSERT INTO activities SELECT id, deal_id, type, date, notes, created_at, updated_at FROM activities_old")
+    op.execute("ALTER SEQUENCE activities_id_seq OWNED BY activities.id")
+    op.drop_table('activities_old')
+    op.create_index('ix_activities_id', 'activities', ['id'], unique=False)
+    op.create_index('ix_activities_deal_id_date', 'activities',
+                    ['deal_id', sa.text('date DESC'), sa.text('id DESC')], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # --- Range-partition activities by date, one partition per JST year ---
+    op.execute("UPDATE activities SET date = created_at WHERE date IS NULL")
+    first, last = op.get_bind().execute(sa.text(
+        "SELECT min(extract(year FROM date AT TIME ZONE 'Asia/Tokyo'))::int, "
+        "max(extract(year FROM date AT TIME ZONE 'Asia/Tokyo'))::int FROM activities"
+    )).one()
+    this_year = date.today().year
+    first = min(first or this_year, this_year - 5)
+    last = max(last or this_year, this_year + 1)
+
+    _swap_out_activities()
+    _activities_table('activities',
+        sa.PrimaryKeyConstraint('id', 'date', name='activities_pkey'),
+        postgresql_partition_by='RANGE (date)',
+    )
+    for year in range(first, last + 1):
+        op.execute(
+            f"CREATE TABLE activities_y{year} PARTITION OF activities "
+            f"FOR VALUES FROM ('{year}-01-01 00:00+09') TO ('{year + 1}-01-01 00:00+09')"
+        )
+    # Rows outside the yearly partitions; app.activity_maintenance moves
+    # them out when it creates the partition for their year.
+    op.execute("CREATE TABLE activities_default PARTITION OF activities DEFAULT")
+    _swap_in_activities()
+
+    # --- Daily rollups ---
+    op.create_table('activity_daily_counts',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('hour', sa.SmallInteger(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('type', activity_type, nullable=False),
+    sa.Column('activity_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'hour', 'user_id', 'type')
+    )
+    op.create_table('activity_rollup_dirty_days',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('marked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.execute(ROLLUP_INSERT)
+    op.execute(MARK_DIRTY_FUNCTION)
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE activity_rollup_dirty_days")
+    op.execute("DROP TABLE activity_daily_counts")
+
+    for trigger in ('insert', 'update', 'delete', 'truncate'):
+        op.execute(f"DROP TRIGGER activities_mark_dirty_{trigger} ON activities")
+    op.execute("DROP FUNCTION mark_activity_days_dirty()")
+
+    _swap_out_activities()
+    _activities_table('activities', sa.PrimaryKeyConstraint('id', name='activities_pkey'))
+    _swap_in_activities()
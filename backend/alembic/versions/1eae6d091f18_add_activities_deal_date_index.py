@@ -0,0 +1,30 @@
+"""Add activities deal/date index
+
+Revision ID: 1eae6d091f18
+Revises: c1a468afe089
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1eae6d091f18'
+down_revision: Union[str, Sequence[str], None] = 'c1a468afe089'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Matches the keyset order of crud_activity.get_activities_for_deal.
+    op.create_index('ix_activities_deal_id_date', 'activities',
+                    ['deal_id', sa.text('date DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_activities_deal_id_date', table_name='activities')
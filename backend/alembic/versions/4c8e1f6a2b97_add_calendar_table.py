@@ -0,0 +1,39 @@
+"""Add calendar dimension table
+
+Revision ID: 4c8e1f6a2b97
+Revises: e27b6a4d8c53
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8e1f6a2b97'
+down_revision: Union[str, Sequence[str], None] = 'e27b6a4d8c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled by app.fiscal_calendar on first use.
+    op.create_table('calendar',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('starts_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('ends_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('fiscal_year', sa.SmallInteger(), nullable=False),
+    sa.Column('fiscal_quarter', sa.SmallInteger(), nullable=False),
+    sa.Column('is_business_day', sa.Boolean(), nullable=False),
+    sa.Column('holiday_name', sa.String(length=50), nullable=True),
+    sa.PrimaryKeyConstraint('day')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('calendar')
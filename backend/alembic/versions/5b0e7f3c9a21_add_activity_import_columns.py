@@ -0,0 +1,39 @@
+"""Add company email domains and activity external ids
+
+Revision ID: 5b0e7f3c9a21
+Revises: 173e108c8ac3
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0e7f3c9a21'
+down_revision: Union[str, Sequence[str], None] = '173e108c8ac3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('companies', sa.Column('email_domain', sa.String(length=255), nullable=True))
+    op.create_index('ix_companies_email_domain', 'companies', ['email_domain'], unique=False)
+
+    # Message-ID / calendar UID of imported activities. A unique index on a
+    # partitioned table has to include the partition key; an imported
+    # message always keeps its date, so (external_id, date) still catches
+    # re-imports, and external_id leads for the importer's lookups.
+    op.add_column('activities', sa.Column('external_id', sa.String(length=255), nullable=True))
+    op.create_index('ix_activities_external_id', 'activities', ['external_id', 'date'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_activities_external_id', table_name='activities')
+    op.drop_column('activities', 'external_id')
+    op.drop_index('ix_companies_email_domain', table_name='companies')
+    op.drop_column('companies', 'email_domain')
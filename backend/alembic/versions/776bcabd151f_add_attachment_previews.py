@@ -0,0 +1,39 @@
+"""Add attachment previews
+
+Revision ID: 776bcabd151f
+Revises: 56e54be6a1ad
+Create Date: 2026-10-19 13:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '776bcabd151f'
+down_revision: Union[str, Sequence[str], None] = '56e54be6a1ad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing attachments start out pending, so the worker backfills them.
+    op.add_column('attachments', sa.Column('preview_status', sa.String(length=20), server_default='pending', nullable=False))
+    op.add_column('attachments', sa.Column('thumbnail', sa.LargeBinary(), nullable=True))
+    op.add_column('attachments', sa.Column('text_excerpt', sa.Text(), nullable=True))
+    op.add_column('attachments', sa.Column('previewed_at', sa.DateTime(timezone=True), nullable=True))
+    # The worker's queue: small, since rows leave it once processed.
+    op.create_index('ix_attachments_preview_pending', 'attachments', ['id'], unique=False,
+                    postgresql_where=sa.text("preview_status = 'pending'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attachments_preview_pending', table_name='attachments')
+    op.drop_column('attachments', 'previewed_at')
+    op.drop_column('attachments', 'text_excerpt')
+    op.drop_column('attachments', 'thumbnail')
+    op.drop_column('attachments', 'preview_status')
@@ -0,0 +1,36 @@
+"""Add distribution_sketches table
+
+Revision ID: 7e2b5d9c1f43
+Revises: a3f9d2c6e814
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2b5d9c1f43'
+down_revision: Union[str, Sequence[str], None] = 'a3f9d2c6e814'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled by `python -m app.distribution_sketches`.
+    op.create_table('distribution_sketches',
+    sa.Column('metric', sa.String(length=30), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('value_count', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('metric', 'month', 'bucket')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('distribution_sketches')
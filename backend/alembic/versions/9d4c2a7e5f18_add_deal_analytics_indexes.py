@@ -0,0 +1,70 @@
+"""Add deal indexes for analytics and CRUD filters
+
+Revision ID: 9d4c2a7e5f18
+Revises: 5b0e7f3c9a21
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4c2a7e5f18'
+down_revision: Union[str, Sequence[str], None] = '5b0e7f3c9a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, columns, extra create_index kwargs
+INDEXES = [
+    # Won-deal aggregates (revenue, leaderboards, agency performance, monthly
+    # sales, time to win) read only this index.
+    ('ix_deals_won_closed_at', 'deals', ['closed_at'], dict(
+        postgresql_where=sa.text("status = 'won'"),
+        postgresql_include=['value', 'user_id', 'agency_id', 'created_at'],
+    )),
+    # Per-rep performance: counts, won revenue and the rep's deal ids for
+    # joining their activities, without touching the heap.
+    ('ix_deals_user_status_closed_at', 'deals', ['user_id', 'status', 'closed_at'], dict(
+        postgresql_include=['id', 'value'],
+    )),
+    ('ix_deals_status_closed_at', 'deals', ['status', 'closed_at'], {}),
+    ('ix_deals_type_status', 'deals', ['type', 'status'], {}),
+    ('ix_deals_closed_at', 'deals', ['closed_at'], {}),
+    ('ix_deals_created_at', 'deals', ['created_at'], {}),
+    ('ix_deals_company_id', 'deals', ['company_id'], {}),
+    ('ix_deals_agency_id', 'deals', ['agency_id'], dict(postgresql_where=sa.text('agency_id IS NOT NULL'))),
+]
+
+
+def drop_invalid_index(name: str) -> None:
+    """
+    Drops `name` if it is an INVALID leftover of an interrupted CREATE INDEX
+    CONCURRENTLY, which if_not_exists would otherwise keep as it is.
+    """
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+    ), {"name": name}).scalar()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY can't run inside a transaction, and keeps deals writable
+    # while the indexes build on a live database.
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            drop_invalid_index(name)
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True,
+                            if_not_exists=True, **kwargs)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,42 @@
+"""Add kpi_snapshots table
+
+Revision ID: a3f9d2c6e814
+Revises: 4c8e1f6a2b97
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9d2c6e814'
+down_revision: Union[str, Sequence[str], None] = '4c8e1f6a2b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled by `python -m app.kpi_snapshots`.
+    op.create_table('kpi_snapshots',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('open_deals', sa.Integer(), nullable=False),
+    sa.Column('open_pipeline_value', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('deals_created', sa.Integer(), nullable=False),
+    sa.Column('deals_won', sa.Integer(), nullable=False),
+    sa.Column('deals_lost', sa.Integer(), nullable=False),
+    sa.Column('won_value', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('win_rate', sa.Float(), nullable=True),
+    sa.Column('average_deal_size', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('kpi_snapshots')
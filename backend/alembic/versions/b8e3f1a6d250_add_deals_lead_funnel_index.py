@@ -0,0 +1,51 @@
+"""Add deals lead funnel index
+
+Revision ID: b8e3f1a6d250
+Revises: 7e2b5d9c1f43
+Create Date: 2026-10-20 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e3f1a6d250'
+down_revision: Union[str, Sequence[str], None] = '7e2b5d9c1f43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def drop_invalid_index(name: str) -> None:
+    """
+    Drops `name` if it is an INVALID leftover of an interrupted CREATE INDEX
+    CONCURRENTLY, which if_not_exists would otherwise keep as it is.
+    """
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+    ), {"name": name}).scalar()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The lead funnel reads only this index: a range of one source's leads,
+    # or all of them in a single index-only pass, with every column the
+    # funnel aggregates included.
+    with op.get_context().autocommit_block():
+        drop_invalid_index('ix_deals_lead_source_lead_generated_at')
+        op.create_index('ix_deals_lead_source_lead_generated_at', 'deals', ['lead_source', 'lead_generated_at'],
+                        unique=False,
+                        postgresql_include=['product_name', 'status', 'value', 'created_at', 'closed_at'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_deals_lead_source_lead_generated_at', table_name='deals',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,38 @@
+"""Add related item to audit logs
+
+Revision ID: c1a468afe089
+Revises: 1376ef9cda4b
+Create Date: 2026-10-19 17:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1a468afe089'
+down_revision: Union[str, Sequence[str], None] = '1376ef9cda4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('audit_logs', sa.Column('related_to', sa.String(length=50), nullable=True))
+    op.add_column('audit_logs', sa.Column('related_id', sa.Integer(), nullable=True))
+    # Earlier deal entries only mention the deal in their text:
+    # "... with ID 12." or "... (ID: 12)."
+    op.execute(
+        "UPDATE audit_logs SET related_to = 'deal', related_id = substring(details from 'ID:? (\\d+)')::integer "
+        "WHERE action IN ('create_deal', 'update_deal', 'delete_deal') AND details ~ 'ID:? \\d+'"
+    )
+    op.create_index('ix_audit_logs_related_item', 'audit_logs', ['related_to', 'related_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_logs_related_item', table_name='audit_logs')
+    op.drop_column('audit_logs', 'related_id')
+    op.drop_column('audit_logs', 'related_to')
@@ -0,0 +1,43 @@
+"""Add content-addressed attachment storage
+
+Revision ID: d0c153e443dc
+Revises: 149eeca48b0b
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0c153e443dc'
+down_revision: Union[str, Sequence[str], None] = '149eeca48b0b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stored_files',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.add_column('attachments', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_foreign_key('attachments_content_hash_fkey', 'attachments', 'stored_files', ['content_hash'], ['sha256'])
+    op.create_index(op.f('ix_attachments_content_hash'), 'attachments', ['content_hash'], unique=False)
+    # Deduplicated attachments share the path of their stored file.
+    op.drop_constraint('attachments_file_path_key', 'attachments', type_='unique')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_unique_constraint('attachments_file_path_key', 'attachments', ['file_path'])
+    op.drop_index(op.f('ix_attachments_content_hash'), table_name='attachments')
+    op.drop_constraint('attachments_content_hash_fkey', 'attachments', type_='foreignkey')
+    op.drop_column('attachments', 'content_hash')
+    op.drop_table('stored_files')
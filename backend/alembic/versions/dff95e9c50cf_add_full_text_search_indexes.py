@@ -0,0 +1,45 @@
+"""Add full text search indexes
+
+Revision ID: dff95e9c50cf
+Revises: 776bcabd151f
+Create Date: 2026-10-19 15:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dff95e9c50cf'
+down_revision: Union[str, Sequence[str], None] = '776bcabd151f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('attachments', sa.Column('content_text', sa.Text(), nullable=True))
+    op.add_column('attachments', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('simple', coalesce(content_text, ''))", persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_attachments_search_vector', 'attachments', ['search_vector'], unique=False,
+                    postgresql_using='gin')
+    # Must match the expression crud_search queries notes with.
+    op.create_index('ix_notes_content_search', 'notes', [sa.text("to_tsvector('simple', content)")], unique=False,
+                    postgresql_using='gin')
+    # Have the worker run over already previewed attachments again to
+    # extract their text.
+    op.execute("UPDATE attachments SET preview_status = 'pending' WHERE preview_status IN ('ready', 'failed')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notes_content_search', table_name='notes')
+    op.drop_index('ix_attachments_search_vector', table_name='attachments')
+    op.drop_column('attachments', 'search_vector')
+    op.drop_column('attachments', 'content_text')
@@ -0,0 +1,57 @@
+"""Add deals.seconds_to_close
+
+Revision ID: e27b6a4d8c53
+Revises: 9d4c2a7e5f18
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e27b6a4d8c53'
+down_revision: Union[str, Sequence[str], None] = '9d4c2a7e5f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def drop_invalid_index(name: str) -> None:
+    """
+    Drops `name` if it is an INVALID leftover of an interrupted CREATE INDEX
+    CONCURRENTLY, which if_not_exists would otherwise keep as it is.
+    """
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+    ), {"name": name}).scalar()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A stored generated column: adding it rewrites deals once, filling it
+    # for every existing row, and Postgres keeps it current on every write.
+    op.add_column('deals', sa.Column(
+        'seconds_to_close', sa.Integer(),
+        sa.Computed('extract(epoch FROM closed_at - created_at)::integer', persisted=True),
+        nullable=True,
+    ))
+    # Time-to-close averages and percentiles over won deals read only this
+    # index, already in order.
+    with op.get_context().autocommit_block():
+        drop_invalid_index('ix_deals_won_seconds_to_close')
+        op.create_index('ix_deals_won_seconds_to_close', 'deals', ['seconds_to_close'], unique=False,
+                        postgresql_where=sa.text("status = 'won'"), postgresql_include=['user_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_deals_won_seconds_to_close', table_name='deals',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('deals', 'seconds_to_close')
@@ -0,0 +1,406 @@
+# backend/app/activity_importer.py
+
+"""
+Imports emails (mbox) and calendar events (ICS) as deal activities.
+
+Both formats are parsed line by line, so memory stays flat however large
+the export: for mbox only each message's header block is kept, and for
+ICS only the current event. Every message or event is matched to a deal
+through its participants:
+
+  * a participant whose address belongs to a user is the rep;
+  * the first other participant whose domain (or a parent domain) is a
+    company's email_domain picks the company, and failing that, one who is
+    an agency's contact_email picks that agency's deals;
+  * among those deals, the rep's own are preferred, then the deal that was
+    open on the message's date, then the one created closest to it.
+
+Matched items are inserted in batches as email or meeting activities with
+their Message-ID / UID as external_id; anything imported before is
+skipped, so re-running an import (or importing overlapping exports) is
+safe. Recurring events are imported once, at their first occurrence.
+
+Usage (from backend/):
+
+    python -m app.activity_importer mail.mbox calendar.ics ...
+"""
+
+import argparse
+import hashlib
+import logging
+import re
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from email.header import decode_header, make_header
+from email.parser import BytesHeaderParser
+from email.utils import getaddresses, parsedate_to_datetime
+from itertools import islice
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.crud import crud_activity
+from app.database import SessionLocal
+from app.fiscal_calendar import JST
+from app.models.agency import Agency
+from app.models.company import Company
+from app.models.deal import Deal
+from app.models.enums import ActivityType
+from app.models.user import User
+
+
+logger = logging.getLogger("app.activity_importer")
+
+BATCH_SIZE = 1000
+EXTERNAL_ID_LENGTH = 255
+
+# compat32 hands back raw header strings; the default policy's header
+# objects are several times slower and only the subject needs decoding.
+_HEADER_PARSER = BytesHeaderParser()
+
+
+class ImportedItem(NamedTuple):
+    external_id: str
+    type: ActivityType
+    date: Optional[datetime]
+    # Lower-cased addresses, sender / organizer first.
+    participants: Tuple[str, ...]
+    notes: str
+
+
+def _external_id(prefix: str, value: str) -> str:
+    external_id = f"{prefix}:{value}"
+    if len(external_id) > EXTERNAL_ID_LENGTH:
+        external_id = f"{prefix}-sha1:{hashlib.sha1(value.encode()).hexdigest()}"
+    return external_id
+
+
+def _unique(addresses: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(a.strip().lower() for a in addresses if a and "@" in a))
+
+
+# --- mbox ---
+
+def _mbox_header_blocks(path: str) -> Iterator[bytes]:
+    """
+    The header block of each message. A message starts at a "From " line
+    after a blank line (or at the top of the file); body lines that start
+    with "From " are escaped as ">From " by mbox writers.
+    """
+    headers: List[bytes] = []
+    in_headers, after_blank = False, True
+    with open(path, "rb") as f:
+        for line in f:
+            if after_blank and line.startswith(b"From "):
+                if headers:
+                    yield b"".join(headers)
+                headers, in_headers = [], True
+            elif in_headers:
+                if line.strip():
+                    headers.append(line)
+                else:
+                    in_headers = False
+            after_blank = not line.strip()
+    if headers:
+        yield b"".join(headers)
+
+
+def _decoded(value) -> str:
+    try:
+        return str(make_header(decode_header(value))).strip()
+    except (LookupError, UnicodeDecodeError, ValueError):  # unknown or broken charset
+        return str(value).strip()
+
+
+def _email_date(value) -> Optional[datetime]:
+    try:
+        date = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+    return date if date.tzinfo else date.replace(tzinfo=JST)
+
+
+def parse_mbox(path: str) -> Iterator[ImportedItem]:
+    for block in _mbox_header_blocks(path):
+        message = _HEADER_PARSER.parsebytes(block)
+        sender = getaddresses(message.get_all("From", []))
+        recipients = getaddresses(message.get_all("To", []) + message.get_all("Cc", []))
+        subject = _decoded(message.get("Subject", ""))
+        date = _email_date(message.get("Date"))
+        participants = _unique(address for _, address in sender + recipients)
+
+        message_id = str(message.get("Message-ID", "")).strip().strip("<>")
+        if not message_id:
+            # No Message-ID: fall back to what identifies the message best.
+            message_id = hashlib.sha1(f"{date}|{participants}|{subject}".encode()).hexdigest()
+
+        notes = "\n".join(filter(None, [
+            subject,
+            f"From: {participants[0]}" if sender and participants else None,
+            f"To: {', '.join(participants[1:])}" if len(participants) > 1 else None,
+        ]))
+        yield ImportedItem(_external_id("mid", message_id), ActivityType.email, date, participants, notes)
+
+
+# --- ICS ---
+
+def _unfolded_lines(path: str) -> Iterator[str]:
+    """Content lines with RFC 5545 line folding undone."""
+    current = None
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            line = raw.rstrip("\r\n")
+            if line[:1] in (" ", "\t") and current is not None:
+                current += line[1:]
+                continue
+            if current:
+                yield current
+            current = line
+    if current:
+        yield current
+
+
+def _content_line(line: str) -> Tuple[str, Dict[str, str], str]:
+    """NAME;PARAM=value;...:VALUE, with quoted parameter values."""
+    quoted, split = False, len(line)
+    for index, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ":" and not quoted:
+            split = index
+            break
+    name, *params = line[:split].split(";")
+    parameters = {}
+    for param in params:
+        key, _, value = param.partition("=")
+        parameters[key.upper()] = value.strip('"')
+    return name.upper(), parameters, line[split + 1:]
+
+
+_ESCAPED = re.compile(r"\\(.)")
+
+
+def _unescape(text: str) -> str:
+    return _ESCAPED.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), text)
+
+
+def _zone(tzid: Optional[str]):
+    if tzid:
+        try:
+            return ZoneInfo(tzid)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    # Times without a zone (and unknown TZIDs) are taken as JST.
+    return JST
+
+
+def _ics_date(value: str, parameters: Dict[str, str]) -> Optional[datetime]:
+    try:
+        if len(value) == 8 or parameters.get("VALUE") == "DATE":  # all-day
+            return datetime.strptime(value[:8], "%Y%m%d").replace(tzinfo=JST)
+        if value.endswith("Z"):
+            return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        return datetime.strptime(value, "%Y%m%dT%H%M%S").replace(tzinfo=_zone(parameters.get("TZID")))
+    except ValueError:
+        return None
+
+
+def _mailto(value: str) -> str:
+    return value[7:] if value.lower().startswith("mailto:") else value
+
+
+def parse_ics(path: str) -> Iterator[ImportedItem]:
+    """Events of an ICS file; cancelled events are left out."""
+    components: List[str] = []
+    event: Dict = {}
+    for line in _unfolded_lines(path):
+        name, parameters, value = _content_line(line)
+        if name == "BEGIN":
+            components.append(value.upper())
+            if value.upper() == "VEVENT":
+                event = {"attendees": []}
+            continue
+        if name == "END":
+            if components and components.pop() == "VEVENT" and event.get("UID"):
+                if event.get("STATUS", "").upper() == "CANCELLED":
+                    continue
+                uid = event["UID"] + (f"/{event['RECURRENCE-ID']}" if event.get("RECURRENCE-ID") else "")
+                participants = _unique([event.get("ORGANIZER", "")] + event["attendees"])
+                notes = "\n".join(filter(None, [
+                    event.get("SUMMARY"),
+                    f"Location: {event['LOCATION']}" if event.get("LOCATION") else None,
+                    f"Participants: {', '.join(participants)}" if participants else None,
+                ]))
+                yield ImportedItem(_external_id("uid", uid), ActivityType.meeting, event.get("DTSTART"), participants, notes)
+            continue
+        # Properties of nested components (VALARM) don't describe the event.
+        if not components or components[-1] != "VEVENT":
+            continue
+        if name == "DTSTART":
+            event["DTSTART"] = _ics_date(value, parameters)
+        elif name == "ATTENDEE":
+            event["attendees"].append(_mailto(value))
+        elif name == "ORGANIZER":
+            event["ORGANIZER"] = _mailto(value)
+        elif name in ("UID", "RECURRENCE-ID", "STATUS"):
+            event[name] = value.strip()
+        elif name in ("SUMMARY", "LOCATION"):
+            event[name] = _unescape(value).strip()
+
+
+def parse_file(path: str) -> Iterator[ImportedItem]:
+    return parse_ics(path) if path.lower().endswith((".ics", ".ical", ".ifb")) else parse_mbox(path)
+
+
+# --- Matching ---
+
+class DealMatcher:
+    """
+    Resolves participants to deals. Users, company domains and agency
+    contacts are loaded up front; each company's or agency's deals on first
+    use.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.users = {email.lower(): user_id for user_id, email in db.execute(select(User.id, User.email))}
+
+        domains = defaultdict(set)
+        for company_id, domain in db.execute(select(Company.id, Company.email_domain).where(Company.email_domain.isnot(None))):
+            domains[domain.strip().lower().lstrip("@")].add(company_id)
+        # A domain shared by several companies can't tell them apart.
+        self.companies = {domain: ids.pop() for domain, ids in domains.items() if len(ids) == 1}
+
+        contacts = defaultdict(set)
+        for agency_id, email in db.execute(select(Agency.id, Agency.contact_email).where(Agency.contact_email.isnot(None))):
+            contacts[email.strip().lower()].add(agency_id)
+        self.agencies = {email: ids.pop() for email, ids in contacts.items() if len(ids) == 1}
+
+        self._deals: Dict[Tuple[str, int], List[Tuple[datetime, int, int, Optional[datetime]]]] = {}
+
+    def _company_for(self, address: str) -> Optional[int]:
+        domain = address.rpartition("@")[2]
+        while "." in domain:
+            if domain in self.companies:
+                return self.companies[domain]
+            domain = domain.partition(".")[2]
+        return None
+
+    def _deals_for(self, column, key: int):
+        """(created_at, id, user_id, closed_at) of the deals, oldest first."""
+        cache_key = (column.key, key)
+        if cache_key not in self._deals:
+            created_at = func.coalesce(Deal.created_at, Deal.lead_generated_at)
+            self._deals[cache_key] = [
+                tuple(row) for row in self.db.execute(
+                    select(created_at, Deal.id, Deal.user_id, Deal.closed_at)
+                    .where(column == key)
+                    .order_by(created_at, Deal.id)
+                )
+            ]
+        return self._deals[cache_key]
+
+    def match(self, item: ImportedItem) -> Optional[int]:
+        rep = next((self.users[a] for a in item.participants if a in self.users), None)
+        external = [a for a in item.participants if a not in self.users]
+
+        deals = None
+        company_id = next(filter(None, map(self._company_for, external)), None)
+        if company_id is not None:
+            deals = self._deals_for(Deal.company_id, company_id)
+        else:
+            agency_id = next((self.agencies[a] for a in external if a in self.agencies), None)
+            if agency_id is not None:
+                deals = self._deals_for(Deal.agency_id, agency_id)
+        if not deals:
+            return None
+
+        owned = [deal for deal in deals if deal[2] == rep]
+        return _deal_on(owned or deals, item.date)
+
+
+def _deal_on(deals, date: datetime) -> int:
+    """
+    The latest deal created by `date` that was still open then, else the
+    deal created closest to it. `deals` is sorted by creation time.
+    """
+    created = [deal[0] for deal in deals]
+    started = bisect_right(created, date)
+    for created_at, deal_id, _, closed_at in reversed(deals[:started]):
+        if closed_at is None or closed_at >= date:
+            return deal_id
+    candidates = deals[max(started - 1, 0):started + 1]
+    return min(candidates, key=lambda deal: abs(deal[0] - date))[1]
+
+
+# --- Import ---
+
+def _batches(items: Iterable[ImportedItem], size: int) -> Iterator[List[ImportedItem]]:
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_activities(db: Session, items: Iterable[ImportedItem], batch_size: int = BATCH_SIZE) -> Counter:
+    """
+    Matches and inserts `items`, committing every `batch_size`. Returns
+    counts of items read, imported, already imported (duplicate),
+    without a usable date (invalid) and matching no deal (unmatched).
+    """
+    matcher = DealMatcher(db)
+    stats = Counter()
+    for batch in _batches(items, batch_size):
+        stats["read"] += len(batch)
+        matched, rows = 0, {}
+        for item in batch:
+            if item.date is None:
+                stats["invalid"] += 1
+                continue
+            deal_id = matcher.match(item)
+            if deal_id is None:
+                stats["unmatched"] += 1
+                continue
+            matched += 1
+            rows.setdefault(item.external_id, {
+                "deal_id": deal_id,
+                "type": item.type,
+                "date": item.date,
+                "notes": item.notes or None,
+                "external_id": item.external_id,
+            })
+
+        existing = crud_activity.get_existing_external_ids(db, rows)
+        imported = crud_activity.create_imported_activities(
+            db, [row for external_id, row in rows.items() if external_id not in existing]
+        )
+        stats["imported"] += imported
+        stats["duplicate"] += matched - imported
+        logger.info("%d read, %d imported", stats["read"], stats["imported"])
+    return stats
+
+
+def import_files(db: Session, paths: Iterable[str], batch_size: int = BATCH_SIZE) -> Counter:
+    items = (item for path in paths for item in parse_file(path))
+    return import_activities(db, items, batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="mbox or .ics files")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        stats = import_files(db, args.paths, args.batch_size)
+    print(", ".join(f"{key}: {stats[key]}" for key in ("read", "imported", "duplicate", "unmatched", "invalid")))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main()
@@ -0,0 +1,165 @@
+# backend/app/activity_maintenance.py
+
+"""
+Upkeep of the partitioned activities table and its daily rollups.
+
+activities is range-partitioned by `date`, one partition per JST year
+(activities_y2025, ...), plus activities_default for anything outside
+them. ensure_activity_partitions() creates the partitions for the coming
+years, moving any rows the default partition holds for them.
+
+activity_daily_counts holds activity counts per JST day, hour, deal owner
+and type. Statement-level triggers on activities record the days each
+INSERT, UPDATE or DELETE touched in activity_rollup_dirty_days, and
+refresh_activity_rollups() recomputes just those days from the raw rows,
+reading only the partitions they fall in. The scheduler (app.scheduler)
+refreshes them every minute, so the activity analytics only read; this
+module runs the same upkeep by hand:
+
+    python -m app.activity_maintenance            # partitions + dirty days
+    python -m app.activity_maintenance --full     # rebuild every rollup
+"""
+
+import argparse
+import logging
+from datetime import date, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import Date, and_, delete, exists, func, insert, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.fiscal_calendar import JST_NAME, jst_start, jst_today
+from app.models.activity import Activity
+from app.models.activity_rollup import ActivityDailyCount, ActivityRollupDirtyDay
+from app.models.deal import Deal
+
+logger = logging.getLogger("app.activity_maintenance")
+
+PARTITION_YEARS_AHEAD = 1
+
+# Serializes refreshes; a refresh that finds one running skips its turn.
+ROLLUP_LOCK_KEY = 0x61637469  # "acti"
+
+local_date = func.timezone(JST_NAME, Activity.date)
+
+
+def _day_ranges(days: List[date]) -> List[Tuple[date, date]]:
+    """Consecutive days merged into [first, last + 1) ranges."""
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1] = (ranges[-1][0], day + timedelta(days=1))
+        else:
+            ranges.append((day, day + timedelta(days=1)))
+    return ranges
+
+
+def _rollup_select(*conditions):
+    return (
+        select(
+            local_date.cast(Date).label("day"),
+            func.extract("hour", local_date).cast(ActivityDailyCount.hour.type).label("hour"),
+            Deal.user_id,
+            Activity.type,
+            func.count().label("activity_count"),
+        )
+        .join(Deal, Deal.id == Activity.deal_id)
+        .where(*conditions)
+        .group_by("day", "hour", Deal.user_id, Activity.type)
+    )
+
+
+def _insert_rollups(db: Session, *conditions):
+    db.execute(
+        insert(ActivityDailyCount).from_select(
+            ["day", "hour", "user_id", "type", "activity_count"], _rollup_select(*conditions)
+        )
+    )
+
+
+def refresh_activity_rollups(db: Session, full: bool = False) -> int:
+    """
+    Recomputes the rollups of every dirty day (or of everything with
+    `full`) and commits. Returns the number of days recomputed, 0 if there
+    was nothing to do or another refresh holds the lock.
+    """
+    if not full and not db.execute(select(exists().select_from(ActivityRollupDirtyDay))).scalar():
+        # Nothing to do: don't queue up behind a running refresh for it.
+        db.rollback()
+        return 0
+    if not db.execute(select(func.pg_try_advisory_xact_lock(ROLLUP_LOCK_KEY))).scalar():
+        db.rollback()
+        return 0
+
+    if full:
+        db.execute(delete(ActivityRollupDirtyDay))
+        db.execute(delete(ActivityDailyCount))
+        _insert_rollups(db)
+        days = db.execute(select(func.count(func.distinct(ActivityDailyCount.day)))).scalar()
+        db.commit()
+        return days
+
+    days = db.execute(delete(ActivityRollupDirtyDay).returning(ActivityRollupDirtyDay.day)).scalars().all()
+    if days:
+        db.execute(delete(ActivityDailyCount).where(ActivityDailyCount.day.in_(days)))
+        # Ranges on the raw timestamp let the planner skip every partition
+        # (and index page) outside the dirty days.
+        _insert_rollups(db, or_(*(
+            and_(Activity.date >= jst_start(first), Activity.date < jst_start(end))
+            for first, end in _day_ranges(days)
+        )))
+        logger.info("Rolled up activities for %d day(s)", len(days))
+    db.commit()
+    return len(days)
+
+
+def _partition_exists(db: Session, name: str) -> bool:
+    return db.execute(select(func.to_regclass(name))).scalar() is not None
+
+
+def ensure_activity_partitions(db: Session, through_year: int = None) -> List[str]:
+    """
+    Creates the yearly partitions up to `through_year` (default: next year)
+    that don't exist yet, moving rows for them out of activities_default.
+    Returns the names of the partitions created.
+    """
+    through_year = through_year or jst_today().year + PARTITION_YEARS_AHEAD
+    first_year = db.execute(text(
+        "SELECT min(extract(year FROM date AT TIME ZONE 'Asia/Tokyo'))::int FROM activities"
+    )).scalar() or through_year
+
+    created = []
+    for year in range(first_year, through_year + 1):
+        name = f"activities_y{year}"
+        if _partition_exists(db, name):
+            continue
+        start, end = f"{year}-01-01 00:00+09", f"{year + 1}-01-01 00:00+09"
+        # A partition can't be attached while the default one still holds
+        # rows in its range, so they move over first.
+        db.execute(text(f"CREATE TABLE {name} (LIKE activities INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        db.execute(text(
+            f"WITH moved AS (DELETE FROM activities_default WHERE date >= '{start}' AND date < '{end}' RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ))
+        db.execute(text(f"ALTER TABLE activities ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"))
+        db.commit()
+        created.append(name)
+        logger.info("Created partition %s", name)
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="Rebuild all rollups instead of the dirty days")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        ensure_activity_partitions(db)
+        days = refresh_activity_rollups(db, full=args.full)
+    print(f"Rolled up {days} day(s) of activities.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main()
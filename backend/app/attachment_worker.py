@@ -0,0 +1,163 @@
+# backend/app/attachment_worker.py
+
+"""
+Background worker that generates attachment previews and extracts their
+text for search.
+
+New attachments are inserted with preview_status 'pending', which queues
+them; save_attachment_async also sends a NOTIFY on ATTACHMENT_JOBS_CHANNEL
+so an idle worker wakes up right away instead of at its next poll. Each
+worker claims one attachment at a time with FOR UPDATE SKIP LOCKED, so
+several can run side by side, and attachments uploaded before the worker
+existed are backfilled the same way.
+
+A failing iteration (database restart, dropped LISTEN connection, ...) is
+logged and retried after an exponential backoff, reconnecting the
+listener; it drains the queue first, so notifications sent while it was
+disconnected aren't lost.
+
+Usage (from backend/):
+
+    python -m app.attachment_worker
+"""
+
+import logging
+import os
+import select
+import time
+from contextlib import nullcontext
+
+import psycopg2
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy.sql import func
+
+from app import storage
+from app.crud.crud_attachment import ATTACHMENT_JOBS_CHANNEL
+from app.database import DATABASE_URL, SessionLocal
+from app.models.attachment import Attachment
+from app.services import preview_service
+
+logger = logging.getLogger("app.attachment_worker")
+
+# Seconds between polls when no notification arrives.
+POLL_INTERVAL = float(os.getenv("ATTACHMENT_WORKER_POLL_INTERVAL", "30"))
+# Seconds to wait after a failed iteration, doubling up to the maximum.
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+
+
+def _local_file(attachment: Attachment):
+    if attachment.content_hash:
+        return storage.get_backend().local_copy(attachment.content_hash)
+    # Uploaded before content-addressed storage.
+    return nullcontext(attachment.file_path)
+
+
+def _reuse_preview(db: Session, attachment: Attachment) -> bool:
+    """
+    Copies the preview and text of an attachment with the same content, if
+    they were already generated.
+    """
+    if not attachment.content_hash:
+        return False
+    done = (
+        db.query(Attachment)
+        .options(undefer(Attachment.thumbnail), undefer(Attachment.content_text))
+        .filter(
+            Attachment.content_hash == attachment.content_hash,
+            Attachment.id != attachment.id,
+            Attachment.preview_status.in_(("ready", "unsupported")),
+        )
+        .first()
+    )
+    if done is None:
+        return False
+    attachment.preview_status = done.preview_status
+    attachment.thumbnail = done.thumbnail
+    attachment.text_excerpt = done.text_excerpt
+    attachment.content_text = done.content_text
+    return True
+
+
+def generate_preview(db: Session, attachment: Attachment):
+    if _reuse_preview(db, attachment):
+        return
+    try:
+        with _local_file(attachment) as path:
+            preview = preview_service.generate_preview(path, attachment.file_name, attachment.file_type)
+            content_text = preview_service.extract_text(path, attachment.file_name, attachment.file_type)
+    except Exception:
+        logger.exception("Preview generation failed for attachment %s", attachment.id)
+        attachment.preview_status = "failed"
+        return
+    if preview is None:
+        attachment.preview_status = "unsupported"
+        return
+    attachment.thumbnail = preview.thumbnail
+    attachment.content_text = content_text
+    attachment.text_excerpt = preview.text_excerpt
+    attachment.preview_status = "ready"
+
+
+def process_next(db: Session) -> bool:
+    """
+    Claims and processes one pending attachment. Returns False when the
+    queue is empty.
+    """
+    attachment = (
+        db.query(Attachment)
+        .filter(Attachment.preview_status == "pending")
+        .order_by(Attachment.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if attachment is None:
+        db.rollback()
+        return False
+
+    generate_preview(db, attachment)
+    attachment.previewed_at = func.now()
+    db.commit()
+    logger.info("Attachment %s: preview %s", attachment.id, attachment.preview_status)
+    return True
+
+
+def drain():
+    with SessionLocal() as db:
+        while process_next(db):
+            pass
+
+
+def _listen():
+    listener = psycopg2.connect(DATABASE_URL)
+    listener.autocommit = True
+    with listener.cursor() as cursor:
+        cursor.execute(f"LISTEN {ATTACHMENT_JOBS_CHANNEL}")
+    logger.info("Waiting for attachments on channel %s", ATTACHMENT_JOBS_CHANNEL)
+    return listener
+
+
+def run():
+    listener = None
+    delay = RETRY_DELAY
+    while True:
+        try:
+            if listener is None:
+                listener = _listen()
+            drain()
+            if select.select([listener], [], [], POLL_INTERVAL)[0]:
+                listener.poll()
+                listener.notifies.clear()
+            delay = RETRY_DELAY
+        except Exception:
+            logger.exception("Worker iteration failed; retrying in %g s", delay)
+            if listener is not None:
+                listener.close()
+                listener = None
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    run()
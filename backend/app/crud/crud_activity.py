@@ -1,15 +1,36 @@
 # backend/app/crud/crud_activity.py
 
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
 from app import models
 from app.schemas import activity as activity_schema
 
 def get_activity(db: Session, activity_id: int) -> Optional[models.activity.Activity]:
     return db.query(models.activity.Activity).filter(models.activity.Activity.id == activity_id).first()
 
-def get_activities_for_deal(db: Session, deal_id: int) -> List[models.activity.Activity]:
-    return db.query(models.activity.Activity).filter(models.activity.Activity.deal_id == deal_id).order_by(models.activity.Activity.date.desc()).all()
+def get_activities_for_deal(
+    db: Session,
+    deal_id: int,
+    limit: int = 100,
+    before_date: Optional[datetime] = None,
+    before_id: Optional[int] = None
+) -> List[models.activity.Activity]:
+    """
+    A deal's activities, newest first. For the next page, pass the `date`
+    and `id` of the last activity received as `before_date`/`before_id`;
+    the (deal_id, date DESC, id DESC) index serves every page directly.
+    """
+    Activity = models.activity.Activity
+    query = db.query(Activity).filter(Activity.deal_id == deal_id)
+    if before_date is not None:
+        if before_id is None:
+            query = query.filter(Activity.date < before_date)
+        else:
+            query = query.filter(tuple_(Activity.date, Activity.id) < tuple_(before_date, before_id))
+    return query.order_by(Activity.date.desc(), Activity.id.desc()).limit(limit).all()
 
 def create_activity(db: Session, activity: activity_schema.ActivityCreate) -> models.activity.Activity:
     db_activity = models.activity.Activity(**activity.model_dump())
@@ -27,4 +48,47 @@ def create_activity_for_deal(db: Session, activity_in: activity_schema.ActivityC
     db.add(db_activity)
     db.commit()
     db.refresh(db_activity)
-    return db_activity
\ No newline at end of file
+    return db_activity
+
+def create_activities_bulk(db: Session, activities: List[activity_schema.ActivityCreate]) -> List[int]:
+    """
+    Inserts many activities with one multi-row INSERT and a single commit.
+    Returns the new ids.
+    """
+    if not activities:
+        return []
+    result = db.execute(
+        insert(models.activity.Activity)
+        .values([activity.model_dump() for activity in activities])
+        .returning(models.activity.Activity.id)
+    )
+    ids = [row.id for row in result]
+    db.commit()
+    return ids
+
+def get_missing_deal_ids(db: Session, deal_ids: List[int]) -> List[int]:
+    existing = set(db.scalars(select(models.deal.Deal.id).where(models.deal.Deal.id.in_(set(deal_ids)))))
+    return sorted(set(deal_ids) - existing)
+
+def get_existing_external_ids(db: Session, external_ids: Iterable[str]) -> Set[str]:
+    external_ids = list(external_ids)
+    if not external_ids:
+        return set()
+    Activity = models.activity.Activity
+    return set(db.scalars(select(Activity.external_id).where(Activity.external_id.in_(external_ids))))
+
+def create_imported_activities(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Inserts activity rows (dicts of column values including `external_id`),
+    skipping any already imported, and commits. Returns the number of rows
+    inserted.
+    """
+    if not rows:
+        return 0
+    # Passed as executemany parameters, SQLAlchemy batches the rows into
+    # multi-row INSERTs itself, much faster than compiling one huge VALUES.
+    Activity = models.activity.Activity
+    result = db.execute(pg_insert(Activity).on_conflict_do_nothing().returning(Activity.id), rows)
+    inserted = len(result.all())
+    db.commit()
+    return inserted
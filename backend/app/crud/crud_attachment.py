@@ -1,49 +1,109 @@
 # backend/app/crud/crud_attachment.py
 
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from sqlalchemy import select, text, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, undefer
+from starlette.concurrency import run_in_threadpool
+from typing import Callable, List, Optional
 from app.models import attachment as attachment_model
+from app.models.stored_file import StoredFile
+from app.models.upload_session import UploadSession
+from app import storage
 import os
-import shutil
-from fastapi import UploadFile
-
-# Define the base directory for uploads inside the container
-UPLOAD_DIRECTORY = "/code/uploads"
-
-def save_attachment(
-    db: Session, 
-    file: UploadFile, 
-    related_to: str, 
-    related_id: int, 
-    user_id: int
+
+# Channel the preview worker (app.attachment_worker) listens on.
+ATTACHMENT_JOBS_CHANNEL = "attachment_jobs"
+
+async def save_attachment_async(
+    db: AsyncSession,
+    sha256: str,
+    size: int,
+    place: Callable[[], str],
+    file_name: str,
+    file_type: Optional[str],
+    related_to: str,
+    related_id: int,
+    user_id: int,
+    upload_session: Optional[UploadSession] = None
 ) -> attachment_model.Attachment:
-    
-    # Create a unique path for the file to avoid name collisions
-    # e.g., /code/uploads/deal_123/original_filename.pdf
-    item_upload_dir = os.path.join(UPLOAD_DIRECTORY, f"{related_to}_{related_id}")
-    os.makedirs(item_upload_dir, exist_ok=True)
-    
-    file_path = os.path.join(item_upload_dir, file.filename)
-    
-    # Save the file to the filesystem
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    file_size = os.path.getsize(file_path)
+    """
+    Records a fully received upload. `place` moves the content into the
+    storage backend and returns its location; it runs in the threadpool.
+
+    The stored_files row is created or has its reference count incremented
+    *before* the content is placed; the row lock this takes keeps a
+    concurrent delete of the same content from removing it underneath us.
+    A finished resumable `upload_session` is deleted in the same transaction.
+    The new attachment is queued for preview generation; the NOTIFY is
+    delivered to the worker when the transaction commits.
+    """
+    await db.execute(
+        insert(StoredFile)
+        .values(sha256=sha256, size=size, ref_count=1)
+        .on_conflict_do_update(
+            index_elements=[StoredFile.sha256],
+            set_={"ref_count": StoredFile.ref_count + 1},
+        )
+    )
+    file_path = await run_in_threadpool(place)
 
     db_attachment = attachment_model.Attachment(
         related_to=related_to,
         related_id=related_id,
         user_id=user_id,
-        file_name=file.filename,
+        file_name=file_name,
         file_path=file_path,
-        file_type=file.content_type,
-        file_size=file_size
+        file_type=file_type,
+        file_size=size,
+        content_hash=sha256,
     )
-    
     db.add(db_attachment)
+    if upload_session is not None:
+        await db.delete(upload_session)
+    await db.execute(text(f"NOTIFY {ATTACHMENT_JOBS_CHANNEL}"))
+    await db.commit()
+    return db_attachment
+
+def delete_attachment(db: Session, db_attachment: attachment_model.Attachment):
+    """
+    Deletes an attachment and releases its reference to the stored file,
+    removing the blob once nothing references it any more.
+
+    Content is only removed after the deletion has committed. The blob of
+    a stored file whose count dropped to zero is deleted in a second
+    transaction, together with its row: if an upload of the same content
+    took a reference in between, the row no longer matches and the blob
+    stays; if one is waiting on the row lock, it inserts a fresh row and
+    places the content again once we commit.
+    """
+    content_hash, file_path = db_attachment.content_hash, db_attachment.file_path
+    db.delete(db_attachment)
+    db.flush()
+
+    remaining = None
+    if content_hash is not None:
+        remaining = db.execute(
+            update(StoredFile)
+            .where(StoredFile.sha256 == content_hash)
+            .values(ref_count=StoredFile.ref_count - 1)
+            .returning(StoredFile.ref_count)
+        ).scalar()
     db.commit()
-    db.refresh(db_attachment)
+
+    if content_hash is None:
+        # Uploaded before content-addressed storage; the file is its own.
+        if os.path.exists(file_path):
+            os.remove(file_path)
+    elif remaining is not None and remaining <= 0:
+        unreferenced = db.execute(
+            delete(StoredFile)
+            .where(StoredFile.sha256 == content_hash, StoredFile.ref_count <= 0)
+            .returning(StoredFile.sha256)
+        ).scalar()
+        if unreferenced is not None:
+            storage.get_backend().delete_object(content_hash)
+        db.commit()
     return db_attachment
 
 def get_attachments_for_item(db: Session, related_to: str, related_id: int) -> List[attachment_model.Attachment]:
@@ -56,4 +116,22 @@ def get_attachments_for_item(db: Session, related_to: str, related_id: int) -> L
     )
 
 def get_attachment(db: Session, attachment_id: int) -> attachment_model.Attachment:
-    return db.query(attachment_model.Attachment).filter_by(id=attachment_id).first()
\ No newline at end of file
+    return db.query(attachment_model.Attachment).filter_by(id=attachment_id).first()
+
+def get_attachment_thumbnail(db: Session, attachment_id: int) -> Optional[attachment_model.Attachment]:
+    return (
+        db.query(attachment_model.Attachment)
+        .options(undefer(attachment_model.Attachment.thumbnail))
+        .filter_by(id=attachment_id)
+        .first()
+    )
+
+async def get_attachment_async(db: AsyncSession, attachment_id: int) -> Optional[attachment_model.Attachment]:
+    stmt = (
+        select(attachment_model.Attachment)
+        .options(joinedload(attachment_model.Attachment.uploader))
+        .filter_by(id=attachment_id)
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    return result.scalars().first()
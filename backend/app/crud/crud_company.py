@@ -1,6 +1,8 @@
 # backend/app/crud/crud_company.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 from app import models
 from app.schemas import company as company_schema
 
@@ -22,6 +24,49 @@ def get_companies(db: Session, skip: int = 0, limit: int = 100):
     """
     return db.query(models.company.Company).offset(skip).limit(limit).all()
 
+# --- Async READ Operations ---
+
+def _company_with_deals():
+    """
+    Eager-loading options for the Company response schema, which nests every
+    deal together with its user and company.
+    """
+    deals = selectinload(models.company.Company.deals)
+    return (
+        deals.joinedload(models.deal.Deal.user),
+        deals.joinedload(models.deal.Deal.company),
+    )
+
+async def get_company_async(db: AsyncSession, company_id: int):
+    """
+    Read a single company, with its deals, on an AsyncSession.
+    """
+    stmt = (
+        select(models.company.Company)
+        .options(*_company_with_deals())
+        .filter(models.company.Company.id == company_id)
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    return result.scalars().first()
+
+async def get_company_by_name_async(db: AsyncSession, company_name: str):
+    """
+    Read a single company by its unique name on an AsyncSession.
+    """
+    result = await db.execute(
+        select(models.company.Company).filter(models.company.Company.company_name == company_name)
+    )
+    return result.scalars().first()
+
+async def get_companies_async(db: AsyncSession, skip: int = 0, limit: int = 100):
+    """
+    Read a list of companies, with their deals, on an AsyncSession.
+    """
+    stmt = select(models.company.Company).options(*_company_with_deals()).offset(skip).limit(limit)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
 def create_company(db: Session, company: company_schema.CompanyCreate) -> models.company.Company:
     """
     Create a new company record in the database.
@@ -1,10 +1,12 @@
 # backend/app/crud/crud_deal.py
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from app import models
 from app.schemas import deal as deal_schema
-from app.crud import crud_audit_log
+from app.crud import crud_audit_log, crud_item_counts
 from app.schemas.audit_log import AuditLogCreate
 
 # --- READ Operations ---
@@ -19,28 +21,47 @@ def get_deals(
     search: Optional[str] = None,
     status: Optional[str] = None,
     user_id: Optional[int] = None,
-    company_id: Optional[int] = None
+    company_id: Optional[int] = None,
+    include_counts: bool = False
 ) -> List[models.deal.Deal]:
+    """
+    With `include_counts`, each deal also gets its note and attachment
+    counts as `item_counts`, fetched in a single extra query.
+    """
     query = db.query(models.deal.Deal).options(
         joinedload(models.deal.Deal.user), 
         joinedload(models.deal.Deal.company)
     )
 
     # Apply filters if they are provided
+    query = _filtered_deals_query(query, search=search, status=status, user_id=user_id, company_id=company_id)
+
+    deals = query.offset(skip).limit(limit).all()
+    if include_counts:
+        _attach_item_counts(deals, crud_item_counts.get_item_counts(db, "deal", [deal.id for deal in deals]))
+    return deals
+
+def _attach_item_counts(deals, counts):
+    for deal in deals:
+        deal.item_counts = counts[deal.id]
+
+
+def _filtered_deals_query(
+    query,
+    search: Optional[str] = None,
+    status: Optional[str] = None,
+    user_id: Optional[int] = None,
+    company_id: Optional[int] = None
+):
     if search:
         query = query.filter(models.deal.Deal.title.ilike(f"%{search}%"))
-    
     if status:
         query = query.filter(models.deal.Deal.status == status)
-
     if user_id:
         query = query.filter(models.deal.Deal.user_id == user_id)
-        
     if company_id:
         query = query.filter(models.deal.Deal.company_id == company_id)
-
-    return query.offset(skip).limit(limit).all()
-
+    return query
 
 def get_deals_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[models.deal.Deal]:
     return (
@@ -52,6 +73,42 @@ def get_deals_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100
         .all()
     )
 
+# --- Async READ Operations ---
+# Used by the async routers. Relationships the response schemas need are
+# loaded eagerly, since lazy loading is not available on an AsyncSession.
+
+async def get_deal_async(db: AsyncSession, deal_id: int) -> Optional[models.deal.Deal]:
+    stmt = (
+        select(models.deal.Deal)
+        .options(joinedload(models.deal.Deal.user), joinedload(models.deal.Deal.company))
+        .filter(models.deal.Deal.id == deal_id)
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    return result.scalars().first()
+
+async def get_deals_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    status: Optional[str] = None,
+    user_id: Optional[int] = None,
+    company_id: Optional[int] = None,
+    include_counts: bool = False
+) -> List[models.deal.Deal]:
+    stmt = select(models.deal.Deal).options(
+        joinedload(models.deal.Deal.user),
+        joinedload(models.deal.Deal.company)
+    )
+    stmt = _filtered_deals_query(stmt, search=search, status=status, user_id=user_id, company_id=company_id)
+    result = await db.execute(stmt.offset(skip).limit(limit))
+    deals = result.scalars().all()
+    if include_counts:
+        counts = await crud_item_counts.get_item_counts_async(db, "deal", [deal.id for deal in deals])
+        _attach_item_counts(deals, counts)
+    return deals
+
 # --- CREATE Operation ---
 
 def create_deal(db: Session, deal: deal_schema.DealCreate, current_user_id: int) -> models.deal.Deal:
@@ -62,7 +119,9 @@ def create_deal(db: Session, deal: deal_schema.DealCreate, current_user_id: int)
     crud_audit_log.create_log_entry(db, log=AuditLogCreate(
         user_id=current_user_id,
         action="create_deal",
-        details=f"Created deal '{db_deal.title}' with ID {db_deal.id}."
+        details=f"Created deal '{db_deal.title}' with ID {db_deal.id}.",
+        related_to="deal",
+        related_id=db_deal.id
     ))
     return db_deal
 
@@ -78,7 +137,9 @@ def update_deal(db: Session, db_deal: models.deal.Deal, deal_update: deal_schema
     crud_audit_log.create_log_entry(db, log=AuditLogCreate(
         user_id=current_user_id,
         action="update_deal",
-        details=f"Updated deal '{db_deal.title}' (ID: {db_deal.id})."
+        details=f"Updated deal '{db_deal.title}' (ID: {db_deal.id}).",
+        related_to="deal",
+        related_id=db_deal.id
     ))
     return db_deal
 
@@ -94,6 +155,8 @@ def delete_deal(db: Session, deal_id: int, current_user_id: int) -> Optional[mod
         crud_audit_log.create_log_entry(db, log=AuditLogCreate(
             user_id=current_user_id,
             action="delete_deal",
-            details=f"Deleted deal '{deal_title}' (ID: {deal_id})."
+            details=f"Deleted deal '{deal_title}' (ID: {deal_id}).",
+            related_to="deal",
+            related_id=deal_id
         ))
     return db_deal
@@ -0,0 +1,71 @@
+# backend/app/crud/crud_item_counts.py
+
+"""
+Note and attachment counts for many deals or companies at once, for the
+badges in list views. Both tables are grouped in one query that reads
+only the (related_to, related_id, created_at) indexes.
+"""
+
+from sqlalchemy import func, literal, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable
+from app.models.attachment import Attachment
+from app.models.note import Note
+from app.schemas.item_counts import ItemCounts
+
+def _item_counts_query(related_to: str, related_ids: list):
+    notes = (
+        select(
+            Note.related_id,
+            func.count().label("note_count"),
+            func.max(Note.created_at).label("latest_note_at"),
+            literal(0).label("attachment_count"),
+            null().label("latest_attachment_at"),
+        )
+        .where(Note.related_to == related_to, Note.related_id.in_(related_ids))
+        .group_by(Note.related_id)
+    )
+    attachments = (
+        select(
+            Attachment.related_id,
+            literal(0).label("note_count"),
+            null().label("latest_note_at"),
+            func.count().label("attachment_count"),
+            func.max(Attachment.created_at).label("latest_attachment_at"),
+        )
+        .where(Attachment.related_to == related_to, Attachment.related_id.in_(related_ids))
+        .group_by(Attachment.related_id)
+    )
+    counts = union_all(notes, attachments).subquery("counts")
+    return (
+        select(
+            counts.c.related_id,
+            func.sum(counts.c.note_count).label("note_count"),
+            func.max(counts.c.latest_note_at).label("latest_note_at"),
+            func.sum(counts.c.attachment_count).label("attachment_count"),
+            func.max(counts.c.latest_attachment_at).label("latest_attachment_at"),
+        )
+        .group_by(counts.c.related_id)
+    )
+
+def _to_counts(related_ids: list, rows) -> Dict[int, ItemCounts]:
+    # Items without notes or attachments get zero counts.
+    counts = {related_id: ItemCounts(related_id=related_id) for related_id in related_ids}
+    for row in rows:
+        counts[row.related_id] = ItemCounts.model_validate(row)
+    return counts
+
+def get_item_counts(db: Session, related_to: str, related_ids: Iterable[int]) -> Dict[int, ItemCounts]:
+    related_ids = list(dict.fromkeys(related_ids))
+    if not related_ids:
+        return {}
+    rows = db.execute(_item_counts_query(related_to, related_ids)).all()
+    return _to_counts(related_ids, rows)
+
+async def get_item_counts_async(db: AsyncSession, related_to: str, related_ids: Iterable[int]) -> Dict[int, ItemCounts]:
+    related_ids = list(dict.fromkeys(related_ids))
+    if not related_ids:
+        return {}
+    rows = (await db.execute(_item_counts_query(related_to, related_ids))).all()
+    return _to_counts(related_ids, rows)
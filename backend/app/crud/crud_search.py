@@ -0,0 +1,134 @@
+# backend/app/crud/crud_search.py
+
+"""
+Full-text search over note contents and the text the attachment worker
+extracts from uploaded files.
+
+Both are matched through GIN indexes: attachments.search_vector (a stored
+generated column) and an expression index on to_tsvector(content) for
+notes, so the query must use exactly the same configuration and
+expression as migration dff95e9c50cf. Matches are grouped by the deal or
+company they belong to; snippets are only generated for the rows that end
+up in the response.
+"""
+
+import html
+from itertools import groupby
+from typing import List
+
+from sqlalchemy import and_, func, literal, literal_column, null, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.attachment import Attachment
+from app.models.company import Company
+from app.models.deal import Deal
+from app.models.note import Note
+from app.schemas import search as search_schemas
+
+# 'simple' neither stems nor drops stop words, which suits the mix of
+# Japanese and English in this data. Text without spaces (most Japanese)
+# is indexed as whole runs, so it matches on complete words or phrases.
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+MATCHES_PER_RESULT = 3
+
+# Control characters can't occur in indexed text, so they safely mark the
+# highlights until the snippet has been HTML-escaped.
+_START, _STOP = "\x02", "\x03"
+_HEADLINE_OPTIONS = f"StartSel={_START}, StopSel={_STOP}, MinWords=10, MaxWords=30, MaxFragments=2"
+
+
+def _snippet(headline: str) -> str:
+    return html.escape(headline).replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def search(db: Session, query: str, limit: int = 20) -> List[search_schemas.SearchResult]:
+    """
+    The `limit` deals and companies whose notes or attachments best match
+    `query` (web search syntax: words, "quoted phrases", OR, -excluded),
+    each with up to MATCHES_PER_RESULT matches.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    note_vector = func.to_tsvector(SEARCH_CONFIG, Note.content)
+
+    notes = (
+        select(
+            literal("note").label("source"),
+            Note.id.label("source_id"),
+            Note.related_to,
+            Note.related_id,
+            null().label("file_name"),
+            func.ts_rank(note_vector, tsquery).label("rank"),
+        )
+        .where(note_vector.op("@@")(tsquery), Note.related_to.in_(("deal", "company")))
+    )
+    attachments = (
+        select(
+            literal("attachment").label("source"),
+            Attachment.id.label("source_id"),
+            Attachment.related_to,
+            Attachment.related_id,
+            Attachment.file_name,
+            func.ts_rank(Attachment.search_vector, tsquery).label("rank"),
+        )
+        .where(Attachment.search_vector.op("@@")(tsquery), Attachment.related_to.in_(("deal", "company")))
+    )
+    hits = union_all(notes, attachments).subquery("hits")
+
+    entity = (hits.c.related_to, hits.c.related_id)
+    ranked = (
+        select(
+            hits,
+            func.max(hits.c.rank).over(partition_by=entity).label("entity_rank"),
+            func.row_number().over(partition_by=entity, order_by=(hits.c.rank.desc(), hits.c.source_id)).label("position"),
+        )
+        .subquery("ranked")
+    )
+
+    # Notes and attachments can outlive the deal or company they were
+    # attached to; those are skipped before counting results.
+    name = func.coalesce(Deal.title, Company.company_name)
+    numbered = (
+        select(
+            ranked,
+            name.label("name"),
+            func.dense_rank().over(
+                order_by=(ranked.c.entity_rank.desc(), ranked.c.related_to, ranked.c.related_id)
+            ).label("result_number"),
+        )
+        .outerjoin(Deal, and_(ranked.c.related_to == "deal", Deal.id == ranked.c.related_id))
+        .outerjoin(Company, and_(ranked.c.related_to == "company", Company.id == ranked.c.related_id))
+        .where(ranked.c.position <= MATCHES_PER_RESULT, or_(Deal.id.isnot(None), Company.id.isnot(None)))
+        .subquery("numbered")
+    )
+
+    headline = func.ts_headline(
+        SEARCH_CONFIG, func.coalesce(Note.content, Attachment.content_text), tsquery, _HEADLINE_OPTIONS
+    )
+    stmt = (
+        select(numbered, headline.label("headline"))
+        .outerjoin(Note, and_(numbered.c.source == "note", Note.id == numbered.c.source_id))
+        .outerjoin(Attachment, and_(numbered.c.source == "attachment", Attachment.id == numbered.c.source_id))
+        .where(numbered.c.result_number <= limit)
+        .order_by(numbered.c.result_number, numbered.c.position)
+    )
+    rows = db.execute(stmt).all()
+
+    results = []
+    for (related_to, related_id), group in groupby(rows, key=lambda row: (row.related_to, row.related_id)):
+        group = list(group)
+        results.append(search_schemas.SearchResult(
+            related_to=related_to,
+            related_id=related_id,
+            name=group[0].name,
+            rank=group[0].entity_rank,
+            matches=[
+                search_schemas.SearchMatch(
+                    source=row.source,
+                    source_id=row.source_id,
+                    file_name=row.file_name,
+                    snippet=_snippet(row.headline),
+                )
+                for row in group
+            ],
+        ))
+    return results
@@ -0,0 +1,152 @@
+# backend/app/crud/crud_timeline.py
+
+"""
+Company and deal timelines: activities, notes, attachments and audit
+events merged into one feed, newest first.
+
+Every source is one branch of a UNION ALL. Each branch filters on its own
+item and timestamp columns, applies the keyset condition and stops at
+`limit + 1` rows; the outer query merges the branches and keeps the first
+`limit + 1`. A page therefore costs the same however long the history is
+and however many deals a company has. Events are ordered by
+(occurred_at, type, id) descending, and the cursor is the position of the
+last event on the page.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import String, cast, literal, null, select, true, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activity import Activity
+from app.models.attachment import Attachment
+from app.models.audit_log import AuditLog
+from app.models.deal import Deal
+from app.models.enums import ActivityType
+from app.models.note import Note
+from app.schemas.timeline import TimelineEvent, TimelinePage
+
+PAGE_SIZE = 50
+EVENT_TYPES = ("activity", "attachment", "audit", "note")
+
+Cursor = Tuple[datetime, str, int]
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(event: TimelineEvent) -> str:
+    raw = json.dumps([event.occurred_at.isoformat(), event.type, event.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        occurred_at, event_type, event_id = json.loads(raw)
+        occurred_at = datetime.fromisoformat(occurred_at)
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor("Invalid cursor")
+    if occurred_at.tzinfo is None or event_type not in EVENT_TYPES or not isinstance(event_id, int):
+        raise InvalidCursor("Invalid cursor")
+    return occurred_at, event_type, event_id
+
+def _after(event_type: str, timestamp, id_column, cursor: Optional[Cursor]):
+    """
+    (timestamp, event_type, id) < cursor, spelled out per branch so that
+    each one compares only its own timestamp and id.
+    """
+    if cursor is None:
+        return true()
+    occurred_at, cursor_type, cursor_id = cursor
+    if event_type < cursor_type:
+        return timestamp <= occurred_at
+    if event_type > cursor_type:
+        return timestamp < occurred_at
+    return tuple_(timestamp, id_column) < tuple_(occurred_at, cursor_id)
+
+def _branch(event_type, id_column, timestamp, deal_id, user_id, summary, detail, condition, cursor, limit):
+    return (
+        select(
+            literal(event_type).label("type"),
+            id_column.label("id"),
+            timestamp.label("occurred_at"),
+            deal_id.label("deal_id"),
+            user_id.label("user_id"),
+            summary.label("summary"),
+            detail.label("detail"),
+        )
+        .where(condition, timestamp.isnot(None), _after(event_type, timestamp, id_column, cursor))
+        .order_by(timestamp.desc(), id_column.desc())
+        .limit(limit + 1)
+    )
+
+def _item_branches(related_to: str, item_ids, cursor, limit):
+    """
+    The note, attachment and audit branches for deals or companies.
+    `item_ids` is one id or a subquery of ids.
+    """
+    def on(model):
+        if isinstance(item_ids, int):
+            return (model.related_to == related_to) & (model.related_id == item_ids)
+        return (model.related_to == related_to) & model.related_id.in_(item_ids)
+
+    def deal_id(model):
+        return model.related_id if related_to == "deal" else null()
+
+    return [
+        _branch("note", Note.id, Note.created_at, deal_id(Note), Note.user_id,
+                null(), Note.content, on(Note), cursor, limit),
+        _branch("attachment", Attachment.id, Attachment.created_at, deal_id(Attachment), Attachment.user_id,
+                Attachment.file_name, Attachment.text_excerpt, on(Attachment), cursor, limit),
+        _branch("audit", AuditLog.id, AuditLog.timestamp, deal_id(AuditLog), AuditLog.user_id,
+                AuditLog.action, AuditLog.details, on(AuditLog), cursor, limit),
+    ]
+
+def _activity_branch(condition, cursor, limit):
+    return _branch("activity", Activity.id, Activity.date, Activity.deal_id, null(),
+                   cast(Activity.type, String), Activity.notes, condition, cursor, limit)
+
+def _timeline_query(deal_id: Optional[int], company_id: Optional[int], cursor: Optional[Cursor], limit: int):
+    if deal_id is not None:
+        branches = [_activity_branch(Activity.deal_id == deal_id, cursor, limit)]
+        branches += _item_branches("deal", deal_id, cursor, limit)
+    else:
+        company_deals = select(Deal.id).where(Deal.company_id == company_id).scalar_subquery()
+        branches = [_activity_branch(Activity.deal_id.in_(company_deals), cursor, limit)]
+        branches += _item_branches("deal", company_deals, cursor, limit)
+        branches += _item_branches("company", company_id, cursor, limit)
+
+    events = union_all(*branches).subquery("events")
+    return (
+        select(events)
+        .order_by(events.c.occurred_at.desc(), events.c.type.desc(), events.c.id.desc())
+        .limit(limit + 1)
+    )
+
+def _to_event(row) -> TimelineEvent:
+    event = TimelineEvent.model_validate(row._mapping)
+    if event.type == "activity":
+        # Stored as the enum name; show its label like the activity APIs.
+        event.summary = ActivityType[event.summary].value
+    return event
+
+async def get_timeline_async(
+    db: AsyncSession,
+    deal_id: Optional[int] = None,
+    company_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = PAGE_SIZE
+) -> TimelinePage:
+    """
+    One page of a deal's timeline, or of a company's: its own notes,
+    attachments and audit events plus everything on all of its deals.
+    Raises InvalidCursor for a malformed `cursor`.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    rows = (await db.execute(_timeline_query(deal_id, company_id, position, limit))).all()
+    events = [_to_event(row) for row in rows[:limit]]
+    next_cursor = encode_cursor(events[-1]) if len(rows) > limit else None
+    return TimelinePage(events=events, next_cursor=next_cursor)
@@ -0,0 +1,69 @@
+# backend/app/crud/crud_upload_session.py
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.models.upload_session import UploadSession
+from app.schemas import attachment as attachment_schemas
+
+def create_upload_session(
+    db: Session,
+    upload_id: str,
+    upload: attachment_schemas.UploadSessionCreate,
+    user_id: int,
+    chunk_size: int,
+    backend: str,
+    backend_handle: str
+) -> UploadSession:
+    db_upload = UploadSession(
+        id=upload_id,
+        user_id=user_id,
+        related_to=upload.related_to,
+        related_id=upload.related_id,
+        file_name=upload.file_name,
+        file_type=upload.file_type,
+        size=upload.size,
+        received_bytes=0,
+        chunk_size=chunk_size,
+        backend=backend,
+        backend_handle=backend_handle,
+    )
+    db.add(db_upload)
+    db.commit()
+    db.refresh(db_upload)
+    return db_upload
+
+def advance_upload_session(db: Session, upload_id: str, from_offset: int, to_offset: int) -> bool:
+    """
+    Moves the received offset forward, unless another request already did.
+    Returns False if the session was not at `from_offset`.
+    """
+    result = db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload_id, UploadSession.received_bytes == from_offset)
+        .values(received_bytes=to_offset)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def delete_upload_session(db: Session, db_upload: UploadSession):
+    db.delete(db_upload)
+    db.commit()
+
+async def get_upload_session_async(
+    db: AsyncSession, upload_id: str, user_id: int, for_update: bool = False
+) -> Optional[UploadSession]:
+    """
+    Sessions are only visible to the user who created them. With
+    `for_update` the row stays locked until the transaction ends.
+    """
+    stmt = (
+        select(UploadSession)
+        .filter(UploadSession.id == upload_id, UploadSession.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    if for_update:
+        stmt = stmt.with_for_update()
+    result = await db.execute(stmt)
+    return result.scalars().first()
@@ -1,5 +1,7 @@
 # backend/app/crud/crud_user.py
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 from app import models
@@ -26,6 +28,10 @@ def get_user(db: Session, user_id: int):
 def get_user_by_email(db: Session, email: str):
     return db.query(models.user.User).filter(models.user.User.email == email).first()
 
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(select(models.user.User).filter(models.user.User.email == email))
+    return result.scalars().first()
+
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.user.User).offset(skip).limit(limit).all()
 
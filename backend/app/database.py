@@ -1,15 +1,27 @@
 # backend/app/database.py
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 DATABASE_URL = "postgresql://softsu:softool@db:5432/softsusales"
 
+# The same database, reached through asyncpg instead of psycopg2.
+ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
 engine = create_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the I/O-bound routers. Requests awaiting the database
+# yield the event loop instead of holding a threadpool worker.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=20, max_overflow=20, pool_pre_ping=True)
+
+# expire_on_commit=False so returned objects can still be serialized after a
+# commit without triggering an implicit (and, in async, illegal) refresh.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # --- THIS IS THE MISSING FUNCTION ---
@@ -21,4 +33,11 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """
+    Async counterpart of get_db, yielding an AsyncSession for each request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
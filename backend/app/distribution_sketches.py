@@ -0,0 +1,141 @@
+# backend/app/distribution_sketches.py
+
+"""
+Monthly quantile sketches of deal metrics, for approximate percentiles
+and histograms over long ranges.
+
+For each metric and JST month, distribution_sketches counts the values
+that fell in each logarithmic bucket: bucket i holds the values in
+(GAMMA^(i-1), GAMMA^i], and its midpoint is within RELATIVE_ACCURACY of
+every one of them (the DDSketch scheme). Values of 0 or less share
+ZERO_BUCKET. Sketches merge by adding counts, so percentiles over years of
+deals come from a few thousand rows.
+
+Metrics, by the JST month the deal closed in:
+
+  deal_value           value of won deals
+  time_to_close        days from creation to close of won deals
+  activities_per_deal  activities logged on won and lost deals up to their close
+
+The scheduler (app.scheduler) runs it daily. It rebuilds the last
+RECOMPUTE_MONTHS months (or everything, on the first run); corrections to
+deals closed earlier show up after a --full run:
+
+    python -m app.distribution_sketches
+    python -m app.distribution_sketches --full
+"""
+
+import argparse
+import enum
+import logging
+import math
+
+from sqlalchemy import Integer, case, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.fiscal_calendar import add_months, ensure_calendar, jst_start, jst_today, on_calendar_day
+from app.models.activity import Activity
+from app.models.calendar_day import CalendarDay
+from app.models.deal import Deal
+from app.models.distribution_sketch import DistributionSketch
+from app.models.enums import DealStatus
+
+logger = logging.getLogger("app.distribution_sketches")
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+ZERO_BUCKET = -(2 ** 31)
+RECOMPUTE_MONTHS = 3
+
+SECONDS_PER_DAY = 60 * 60 * 24
+
+
+class DistributionMetric(str, enum.Enum):
+    deal_value = "deal_value"
+    time_to_close = "time_to_close"
+    activities_per_deal = "activities_per_deal"
+
+
+def metric_values(metric: DistributionMetric):
+    """
+    SELECT of the metric's values ("value"), one per deal, with the deal's
+    closed_at; callers add the range and owner filters on Deal.
+    """
+    if metric == DistributionMetric.deal_value:
+        return select(Deal.value.label("value"), Deal.closed_at).where(Deal.status == DealStatus.won)
+    if metric == DistributionMetric.time_to_close:
+        return select((Deal.seconds_to_close / float(SECONDS_PER_DAY)).label("value"), Deal.closed_at).where(
+            Deal.status == DealStatus.won, Deal.seconds_to_close.isnot(None)
+        )
+    activity_count = (
+        select(func.count())
+        .where(Activity.deal_id == Deal.id, Activity.date <= Deal.closed_at)
+        .scalar_subquery()
+    )
+    return select(activity_count.label("value"), Deal.closed_at).where(
+        Deal.status.in_([DealStatus.won, DealStatus.lost])
+    )
+
+
+def bucket_of(value):
+    """The sketch bucket of a (SQL) value."""
+    return case(
+        (value > 0, func.ceil(func.ln(value) / math.log(GAMMA))),
+        else_=ZERO_BUCKET,
+    ).cast(Integer)
+
+
+def bucket_value(bucket: int) -> float:
+    """The value a bucket stands for: the midpoint that minimizes the relative error."""
+    return 0.0 if bucket == ZERO_BUCKET else 2 * GAMMA ** bucket / (GAMMA + 1)
+
+
+def refresh_sketches(db: Session, full: bool = False) -> int:
+    """
+    Rebuilds the sketches of the last RECOMPUTE_MONTHS months, or of every
+    month with `full` or when there are none yet, and commits. Returns the
+    number of sketch rows written.
+    """
+    ensure_calendar(db)
+    full = full or db.execute(select(DistributionSketch.month).limit(1)).first() is None
+    first_month = None if full else add_months(jst_today(), -(RECOMPUTE_MONTHS - 1))
+
+    written = 0
+    for metric in DistributionMetric:
+        values = metric_values(metric)
+        if first_month is not None:
+            values = values.where(Deal.closed_at >= jst_start(first_month))
+        values = values.subquery()
+        bucket = bucket_of(values.c.value).label("bucket")
+        sketch = (
+            select(literal(metric.value), CalendarDay.month, bucket, func.count())
+            .select_from(values.join(CalendarDay, on_calendar_day(values.c.closed_at)))
+            .group_by(CalendarDay.month, "bucket")
+        )
+
+        stale = delete(DistributionSketch).where(DistributionSketch.metric == metric.value)
+        if first_month is not None:
+            stale = stale.where(DistributionSketch.month >= first_month)
+        db.execute(stale)
+        written += db.execute(
+            insert(DistributionSketch).from_select(["metric", "month", "bucket", "value_count"], sketch)
+        ).rowcount
+    db.commit()
+    logger.info("Rebuilt %s distribution sketches (%d rows)", "all" if full else f"since {first_month}", written)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="Rebuild every month, not just the recent ones")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        rows = refresh_sketches(db, full=args.full)
+    print(f"Wrote {rows} sketch row(s).")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main()
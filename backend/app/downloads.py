@@ -0,0 +1,159 @@
+# backend/app/downloads.py
+
+"""
+File responses for attachment downloads.
+
+AttachmentResponse adds what a plain FileResponse lacks for large, rarely
+changing files: strong ETags with If-None-Match (304) handling, single
+byte-range requests (206/416, guarded by If-Range) and cache headers. The
+body is handed to the server with the ASGI zero-copy send extension when the
+server offers it, which lets it use os.sendfile(); otherwise it is read with
+os.pread() in the threadpool, in large chunks.
+"""
+
+import os
+from urllib.parse import quote
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+CHUNK_SIZE = 256 * 1024
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+# Content-addressed files never change under the same URL.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def strong_etag(content_hash: str = None, stat_result: os.stat_result = None) -> str:
+    """
+    The stored content hash when there is one, otherwise size and mtime.
+    """
+    if content_hash:
+        return f'"{content_hash}"'
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored.
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def parse_range(header: str, size: int):
+    """
+    Parses a single `bytes=` range into (start, end_exclusive).
+
+    Returns None when the header should be ignored (not a valid byte range,
+    e.g. one ending before it starts, or several ranges, which are answered
+    with the full file) and raises ValueError when a valid range cannot be
+    satisfied (it starts past the end of the file, RFC 9110 section 14.1.1).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - suffix), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    return start, min(int(last) + 1, size) if last else size
+
+
+def content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+class AttachmentResponse(Response):
+    """
+    Response streaming (part of) a file from disk. `stat_result` is taken by
+    the caller, which already needs it for the ETag.
+    """
+
+    def __init__(self, path: str, stat_result: os.stat_result, filename: str, media_type: str = None, content_hash: str = None):
+        self.background = None
+        self.path = path
+        self.size = stat_result.st_size
+        self.etag = strong_etag(content_hash, stat_result)
+        self.common_headers = [
+            (b"etag", self.etag.encode("latin-1")),
+            (b"cache-control", (IMMUTABLE_CACHE_CONTROL if content_hash else REVALIDATE_CACHE_CONTROL).encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+        ]
+        self.body_headers = [
+            (b"content-type", (media_type or "application/octet-stream").encode("latin-1")),
+            (b"content-disposition", content_disposition(filename).encode("latin-1")),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        await self._send_file(scope, send)
+        if self.background is not None:
+            await self.background()
+
+    async def _send_file(self, scope, send):
+        request_headers = Headers(scope=scope)
+        headers = list(self.common_headers)
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, self.etag):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        status, start, end = 200, 0, self.size
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range == self.etag):
+            try:
+                byte_range = parse_range(range_header, self.size)
+            except ValueError:
+                headers.append((b"content-range", f"bytes */{self.size}".encode("latin-1")))
+                await send({"type": "http.response.start", "status": 416, "headers": headers + [(b"content-length", b"0")]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            if byte_range is not None:
+                status, (start, end) = 206, byte_range
+                headers.append((b"content-range", f"bytes {start}-{end - 1}/{self.size}".encode("latin-1")))
+
+        headers += self.body_headers
+        headers.append((b"content-length", str(end - start).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+
+        if scope["method"] == "HEAD" or end == start:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            file = await run_in_threadpool(open, self.path, "rb")
+            try:
+                await send({"type": ZEROCOPY_EXTENSION, "file": file, "offset": start, "count": end - start})
+            finally:
+                await run_in_threadpool(file.close)
+            return
+
+        fd = await run_in_threadpool(os.open, self.path, os.O_RDONLY)
+        try:
+            offset = start
+            while offset < end:
+                chunk = await run_in_threadpool(os.pread, fd, min(CHUNK_SIZE, end - offset), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": offset < end})
+            if offset < end:
+                # The file shrank while being served; end the body.
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            await run_in_threadpool(os.close, fd)
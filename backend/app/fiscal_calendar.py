@@ -0,0 +1,260 @@
+# backend/app/fiscal_calendar.py
+
+"""
+The calendar dimension table: one row per JST day with its month, fiscal
+quarter and fiscal year, and whether it is a business day.
+
+Fiscal years start in April and are named after the calendar year they
+start in (FY2025 runs from 2025-04-01 to 2026-03-31). Business days are
+weekdays that are neither a Japanese public holiday (including substitute
+and citizens' holidays) nor part of the year-end closure.
+
+Analytics group timestamps by period by joining the day they fall on:
+
+    query = db.query(period_label(Period.quarter), func.sum(Deal.value)).select_from(Deal)
+    query = join_calendar(query, Deal.closed_at).group_by("period")
+
+Each day stores its JST start and end as timestamps, so the join is a
+range condition Postgres answers from the index on the joined column, one
+day at a time, instead of converting every row to JST.
+
+ensure_calendar() keeps the table filled from CALENDAR_FIRST_YEAR through
+CALENDAR_YEARS_AHEAD years from now, and join_calendar() calls it, so a
+fresh database fills itself on first use. It writes in a session of its
+own, leaving the caller's transaction alone. To extend it, or to recompute
+existing days after the holiday rules change:
+
+    python -m app.fiscal_calendar [--through 2040] [--rebuild]
+"""
+
+import argparse
+import enum
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Query, Session
+
+from app.database import SessionLocal
+from app.models.calendar_day import CalendarDay
+
+# Japan has no daylight saving time, so a fixed offset is exact.
+JST = timezone(timedelta(hours=9), "JST")
+JST_NAME = "Asia/Tokyo"
+
+CALENDAR_FIRST_YEAR = 2000
+CALENDAR_YEARS_AHEAD = 2
+FISCAL_YEAR_START_MONTH = 4
+# Observed by most Japanese companies, on top of the public holidays
+YEAR_END_CLOSURE = {(12, 29), (12, 30), (12, 31), (1, 1), (1, 2), (1, 3)}
+YEAR_END_CLOSURE_NAME = "年末年始"
+
+# Holidays moved by special laws: (year, name) -> date, or None if not held
+MOVED_HOLIDAYS = {
+    (2019, "天皇誕生日"): None,
+    (2020, "海の日"): date(2020, 7, 23),
+    (2020, "スポーツの日"): date(2020, 7, 24),
+    (2020, "山の日"): date(2020, 8, 10),
+    (2021, "海の日"): date(2021, 7, 22),
+    (2021, "スポーツの日"): date(2021, 7, 23),
+    (2021, "山の日"): date(2021, 8, 8),
+}
+ONE_OFF_HOLIDAYS = {
+    date(2019, 5, 1): "即位の日",
+    date(2019, 10, 22): "即位礼正殿の儀",
+}
+
+# Year the calendar is known to reach in this process, so join_calendar()
+# only checks the table once.
+_ready_through: Optional[int] = None
+
+
+class Period(str, enum.Enum):
+    month = "month"
+    quarter = "quarter"
+    year = "year"
+
+
+def jst_today() -> date:
+    return datetime.now(JST).date()
+
+
+def jst_start(day: date) -> datetime:
+    return datetime.combine(day, time(), tzinfo=JST)
+
+
+def add_months(month: date, months: int) -> date:
+    """The first day of the month `months` months after `month`'s."""
+    year, index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, index + 1, 1)
+
+
+def _nth_monday(year: int, month: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(7 - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _equinox_day(year: int, base: float) -> int:
+    # Approximation published by the National Astronomical Observatory, good for 1980-2099
+    return int(base + 0.242194 * (year - 1980)) - (year - 1980) // 4
+
+
+def japanese_holidays(year: int) -> Dict[date, str]:
+    """Public holidays of `year` under the Act on National Holidays."""
+    fixed = [
+        ("元日", date(year, 1, 1)),
+        ("成人の日", _nth_monday(year, 1, 2)),
+        ("建国記念の日", date(year, 2, 11)),
+        ("春分の日", date(year, 3, _equinox_day(year, 20.8431))),
+        ("昭和の日" if year >= 2007 else "みどりの日", date(year, 4, 29)),
+        ("憲法記念日", date(year, 5, 3)),
+        ("こどもの日", date(year, 5, 5)),
+        ("海の日", _nth_monday(year, 7, 3) if year >= 2003 else date(year, 7, 20)),
+        ("敬老の日", _nth_monday(year, 9, 3) if year >= 2003 else date(year, 9, 15)),
+        ("秋分の日", date(year, 9, _equinox_day(year, 23.2488))),
+        ("スポーツの日" if year >= 2020 else "体育の日", _nth_monday(year, 10, 2)),
+        ("文化の日", date(year, 11, 3)),
+        ("勤労感謝の日", date(year, 11, 23)),
+    ]
+    if year >= 2007:
+        fixed.append(("みどりの日", date(year, 5, 4)))
+    if year >= 2016:
+        fixed.append(("山の日", date(year, 8, 11)))
+    if year <= 2018:
+        fixed.append(("天皇誕生日", date(year, 12, 23)))
+    elif year >= 2020:
+        fixed.append(("天皇誕生日", date(year, 2, 23)))
+
+    holidays = {}
+    for name, day in fixed:
+        day = MOVED_HOLIDAYS.get((year, name), day)
+        if day is not None:
+            holidays[day] = name
+    holidays.update({day: name for day, name in ONE_OFF_HOLIDAYS.items() if day.year == year})
+
+    # A day between two holidays is a holiday too (not Sundays, which are
+    # already off)...
+    for day in list(holidays):
+        between = day + timedelta(days=1)
+        if between not in holidays and between.weekday() != 6 and between + timedelta(days=1) in holidays:
+            holidays[between] = "国民の休日"
+    # ...and a holiday on a Sunday moves the day off to the next non-holiday.
+    for day in sorted(holidays):
+        if day.weekday() == 6:
+            substitute = day + timedelta(days=1)
+            while substitute in holidays:
+                substitute += timedelta(days=1)
+            if substitute.year == year:
+                holidays[substitute] = "振替休日"
+    return holidays
+
+
+def fiscal_year(day: date) -> int:
+    return day.year if day.month >= FISCAL_YEAR_START_MONTH else day.year - 1
+
+
+def calendar_rows(first: date, last: date) -> List[Dict]:
+    """Rows of the calendar table for every day from `first` to `last`."""
+    holidays = {}
+    for year in range(first.year, last.year + 1):
+        holidays.update(japanese_holidays(year))
+
+    rows = []
+    day = first
+    while day <= last:
+        next_day = day + timedelta(days=1)
+        name = holidays.get(day)
+        if name is None and (day.month, day.day) in YEAR_END_CLOSURE:
+            name = YEAR_END_CLOSURE_NAME
+        rows.append({
+            "day": day,
+            "starts_at": jst_start(day),
+            "ends_at": jst_start(next_day),
+            "month": day.replace(day=1),
+            "fiscal_year": fiscal_year(day),
+            "fiscal_quarter": (day.month - FISCAL_YEAR_START_MONTH) % 12 // 3 + 1,
+            "is_business_day": day.weekday() < 5 and name is None,
+            "holiday_name": name,
+        })
+        day = next_day
+    return rows
+
+
+def ensure_calendar(db: Session, through_year: int = None, rebuild: bool = False) -> int:
+    """
+    Adds the days up to the end of `through_year` (default:
+    CALENDAR_YEARS_AHEAD years from now) that the calendar lacks, or
+    rewrites every day with `rebuild`. Writes and commits in a separate
+    session on `db`'s database, so `db` is neither committed nor left with
+    pending changes. Returns the number of days written.
+    """
+    global _ready_through
+    through_year = through_year or jst_today().year + CALENDAR_YEARS_AHEAD
+    if not rebuild and _ready_through is not None and _ready_through >= through_year:
+        return 0
+
+    with Session(bind=db.get_bind()) as calendar_db:
+        last_day = None if rebuild else calendar_db.execute(select(func.max(CalendarDay.day))).scalar()
+        first = last_day + timedelta(days=1) if last_day else date(CALENDAR_FIRST_YEAR, 1, 1)
+        rows = calendar_rows(first, date(through_year, 12, 31)) if first.year <= through_year else []
+        if rows:
+            statement = pg_insert(CalendarDay)
+            statement = statement.on_conflict_do_update(
+                index_elements=[CalendarDay.day],
+                set_={column: statement.excluded[column] for column in rows[0] if column != "day"},
+            ) if rebuild else statement.on_conflict_do_nothing()
+            calendar_db.execute(statement, rows)
+            calendar_db.commit()
+    _ready_through = max(through_year, _ready_through or through_year)
+    return len(rows)
+
+
+def on_calendar_day(timestamp):
+    """Join condition matching `timestamp` to the calendar day it falls on."""
+    return and_(timestamp >= CalendarDay.starts_at, timestamp < CalendarDay.ends_at)
+
+
+def join_calendar(query: Query, timestamp, since: datetime = None, until: datetime = None) -> Query:
+    """
+    Joins to `query` the calendar day (JST) that `timestamp` falls on,
+    keeping only rows with `since <= timestamp < until` when given. Rows
+    whose timestamp is NULL or outside the calendar drop out.
+    """
+    ensure_calendar(query.session)
+    query = query.join(CalendarDay, on_calendar_day(timestamp))
+    # Bounding the calendar too keeps Postgres from walking every day of it.
+    if since is not None:
+        query = query.filter(timestamp >= since, CalendarDay.day >= since.astimezone(JST).date())
+    if until is not None:
+        query = query.filter(timestamp < until, CalendarDay.day <= until.astimezone(JST).date())
+    return query
+
+
+def period_label(period: Period):
+    """
+    The period a joined calendar day falls in, labelled "period" and
+    sortable as text: 2025-04, FY2025-Q1 or FY2025.
+    """
+    if period == Period.quarter:
+        label = func.format("FY%s-Q%s", CalendarDay.fiscal_year, CalendarDay.fiscal_quarter)
+    elif period == Period.year:
+        label = func.format("FY%s", CalendarDay.fiscal_year)
+    else:
+        label = func.to_char(CalendarDay.month, "YYYY-MM")
+    return label.label("period")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--through", type=int, help="Last year to cover (default: %d years from now)" % CALENDAR_YEARS_AHEAD)
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every day, not just the missing ones")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        days = ensure_calendar(db, through_year=args.through, rebuild=args.rebuild)
+    print(f"Wrote {days} calendar day(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# backend/app/instrumentation.py
+
+"""
+Per-request SQL instrumentation.
+
+SQLAlchemy cursor events record every statement executed while a request is
+being served: how many queries ran, how long the database took, and how
+often each statement shape repeated. The middleware reports this as a
+`Server-Timing` header and one structured log line per request.
+
+With SQL_STRICT=1 (meant for development and tests) a request that goes over
+its query budget, or that repeats the same statement often enough to look
+like an N+1 pattern, fails with QueryBudgetExceeded instead of returning.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.database import engine, async_engine
+
+logger = logging.getLogger("app.sql")
+
+SQL_STRICT = os.getenv("SQL_STRICT", "0") == "1"
+# Maximum number of statements a single request may execute.
+SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", "25"))
+# How many times one statement shape may repeat before it counts as N+1.
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "5"))
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanding IN lists render one placeholder per value; collapse them so
+# "IN (1, 2)" and "IN (1, 2, 3)" share a fingerprint.
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]*)\)", re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a request breaks its query budget."""
+
+
+class RequestQueryStats:
+    __slots__ = ("count", "duration", "fingerprints")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.duration += elapsed
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated_statements(self, threshold: int = None):
+        """
+        Statement fingerprints executed at least `threshold` times, i.e. the
+        likely N+1 offenders, most frequent first.
+        """
+        threshold = threshold or SQL_REPEAT_THRESHOLD
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def fingerprint(statement: str) -> str:
+    statement = _IN_LIST.sub("IN (?)", statement)
+    statement = _LITERAL.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries():
+    """
+    Collects RequestQueryStats for everything executed inside the block,
+    outside of an HTTP request (benchmarks, scripts).
+    """
+    stats = RequestQueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def instrument_engine(target: Engine):
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+
+def check_budget(path: str, stats: RequestQueryStats):
+    """
+    Raises QueryBudgetExceeded if the request ran too many queries or shows
+    an N+1 pattern.
+    """
+    if stats.count > SQL_QUERY_BUDGET:
+        raise QueryBudgetExceeded(
+            f"{path} executed {stats.count} queries (budget {SQL_QUERY_BUDGET})"
+        )
+    repeated = stats.repeated_statements()
+    if repeated:
+        statement, times = repeated[0]
+        raise QueryBudgetExceeded(
+            f"{path} looks like an N+1: executed {times} times: {statement[:200]}"
+        )
+
+
+class QueryInstrumentationMiddleware:
+    """
+    ASGI middleware that collects RequestQueryStats for every HTTP request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = None
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SQL_STRICT:
+                    check_budget(scope["path"], stats)
+                total_ms = (time.perf_counter() - started) * 1000
+                server_timing = (
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+                    f"app;dur={total_ms:.2f}"
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", server_timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            logger.info(json.dumps({
+                "event": "request_sql",
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "queries": stats.count,
+                "db_ms": round(stats.duration * 1000, 2),
+                "total_ms": round((time.perf_counter() - started) * 1000, 2),
+                "repeated": [{"statement": fp[:200], "count": n} for fp, n in stats.repeated_statements()],
+            }, ensure_ascii=False))
@@ -0,0 +1,198 @@
+# backend/app/kpi_snapshots.py
+
+"""
+Daily KPI snapshots for trend charts.
+
+snapshot_kpis() writes a kpi_snapshots row for every JST day in a range,
+company-wide (user_id 0) and for every user:
+
+  * open_deals / open_pipeline_value: deals open at the end of the day;
+  * deals_created / deals_won / deals_lost / won_value: during the day;
+  * win_rate / average_deal_size: over the KPI_WINDOW_DAYS days ending
+    with the day.
+
+Everything comes from one INSERT ... SELECT. Deals are bucketed into days
+through the calendar table, the open pipeline is the pipeline at the
+start of the range plus a running total of deals opened and closed, and
+the windowed rates are window sums over the days. A deal counts as closed
+once its status is no longer in progress, on the day of its closed_at.
+
+The scheduler (app.scheduler) runs it daily, shortly after midnight JST.
+By default it recomputes the last RECOMPUTE_DAYS days before the latest
+snapshot, to pick up deals closed or edited late, through today:
+
+    python -m app.kpi_snapshots                      # catch up through today
+    python -m app.kpi_snapshots --since 2025-04-01   # recompute from a day on
+    python -m app.kpi_snapshots --full               # every day since the first deal
+"""
+
+import argparse
+import logging
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, case, func, literal, or_, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.fiscal_calendar import JST, join_calendar, jst_start, jst_today
+from app.models.calendar_day import CalendarDay
+from app.models.deal import Deal
+from app.models.enums import DealStatus
+from app.models.kpi_snapshot import KpiSnapshot
+from app.models.user import User
+
+logger = logging.getLogger("app.kpi_snapshots")
+
+COMPANY_WIDE = 0
+KPI_WINDOW_DAYS = 90
+RECOMPUTE_DAYS = 7
+
+SNAPSHOT_COLUMNS = [
+    "user_id", "day", "open_deals", "open_pipeline_value", "deals_created",
+    "deals_won", "deals_lost", "won_value", "win_rate", "average_deal_size",
+]
+
+
+def _first_deal_day(db: Session) -> Optional[date]:
+    first_deal = db.execute(select(func.min(Deal.created_at))).scalar()
+    return first_deal.astimezone(JST).date() if first_deal else None
+
+
+def _scope():
+    # GROUP BY ROLLUP(user_id) adds a company-wide row per group
+    return case((func.grouping(Deal.user_id) == 1, COMPANY_WIDE), else_=Deal.user_id).label("user_id")
+
+
+def _closed():
+    return Deal.status != DealStatus.in_progress
+
+
+def _snapshot_select(db: Session, first: date, last: date):
+    """The snapshot rows of every scope for the days `first` to `last`."""
+    # The window sums need the days before `first` too.
+    window_start = first - timedelta(days=KPI_WINDOW_DAYS - 1)
+    since = jst_start(window_start)
+
+    baseline = (
+        db.query(_scope(), func.count().label("open_deals"), func.sum(Deal.value).label("open_value"))
+        .filter(Deal.created_at < since, or_(~_closed(), Deal.closed_at.is_(None), Deal.closed_at >= since))
+        .group_by(func.rollup(Deal.user_id))
+        .subquery()
+    )
+    opened = join_calendar(
+        db.query(CalendarDay.day, _scope(), func.count().label("created"), func.sum(Deal.value).label("value"))
+        .select_from(Deal),
+        Deal.created_at, since=since,
+    ).group_by(CalendarDay.day, func.rollup(Deal.user_id)).subquery()
+    closed = join_calendar(
+        db.query(
+            CalendarDay.day, _scope(),
+            func.count().label("closed"),
+            func.sum(Deal.value).label("value"),
+            func.count(case((Deal.status == DealStatus.won, Deal.id))).label("won"),
+            func.count(case((Deal.status == DealStatus.lost, Deal.id))).label("lost"),
+            func.coalesce(func.sum(case((Deal.status == DealStatus.won, Deal.value))), 0).label("won_value"),
+        ).select_from(Deal).filter(_closed()),
+        Deal.closed_at, since=since,
+    ).group_by(CalendarDay.day, func.rollup(Deal.user_id)).subquery()
+
+    days = select(CalendarDay.day).where(CalendarDay.day >= window_start, CalendarDay.day <= last).subquery()
+    scopes = select(User.id.label("user_id")).union_all(select(literal(COMPANY_WIDE).label("user_id"))).subquery()
+    grid = (
+        select(days.c.day, scopes.c.user_id)
+        .select_from(days.join(scopes, true()))
+        .subquery()
+    )
+
+    def zero(column):
+        return func.coalesce(column, 0)
+
+    def running(column):
+        return func.sum(column).over(partition_by=grid.c.user_id, order_by=grid.c.day, rows=(None, 0))
+
+    def windowed(column):
+        return func.sum(column).over(partition_by=grid.c.user_id, order_by=grid.c.day, rows=(-(KPI_WINDOW_DAYS - 1), 0))
+
+    series = (
+        select(
+            grid.c.user_id,
+            grid.c.day,
+            (zero(baseline.c.open_deals) + running(zero(opened.c.created) - zero(closed.c.closed))).label("open_deals"),
+            (zero(baseline.c.open_value) + running(zero(opened.c.value) - zero(closed.c.value))).label("open_pipeline_value"),
+            zero(opened.c.created).label("deals_created"),
+            zero(closed.c.won).label("deals_won"),
+            zero(closed.c.lost).label("deals_lost"),
+            zero(closed.c.won_value).label("won_value"),
+            windowed(zero(closed.c.won)).label("window_won"),
+            windowed(zero(closed.c.lost)).label("window_lost"),
+            windowed(zero(closed.c.won_value)).label("window_won_value"),
+        )
+        .select_from(
+            grid
+            .outerjoin(baseline, baseline.c.user_id == grid.c.user_id)
+            .outerjoin(opened, and_(opened.c.day == grid.c.day, opened.c.user_id == grid.c.user_id))
+            .outerjoin(closed, and_(closed.c.day == grid.c.day, closed.c.user_id == grid.c.user_id))
+        )
+        .subquery()
+    )
+
+    return select(
+        series.c.user_id,
+        series.c.day,
+        series.c.open_deals,
+        series.c.open_pipeline_value,
+        series.c.deals_created,
+        series.c.deals_won,
+        series.c.deals_lost,
+        series.c.won_value,
+        (100.0 * series.c.window_won / func.nullif(series.c.window_won + series.c.window_lost, 0)).label("win_rate"),
+        (series.c.window_won_value / func.nullif(series.c.window_won, 0)).label("average_deal_size"),
+    ).where(series.c.day >= first)
+
+
+def snapshot_kpis(db: Session, first: Optional[date] = None, last: Optional[date] = None) -> int:
+    """
+    Writes (or rewrites) the snapshots of the days `first` to `last`
+    (default: see the module docstring) and commits. Returns the number
+    of rows written.
+    """
+    last = last or jst_today()
+    if first is None:
+        latest = db.execute(select(func.max(KpiSnapshot.day))).scalar()
+        if latest is not None:
+            first = min(latest, last) - timedelta(days=RECOMPUTE_DAYS)
+        else:
+            first = _first_deal_day(db) or last
+    if first > last:
+        return 0
+
+    statement = pg_insert(KpiSnapshot).from_select(SNAPSHOT_COLUMNS, _snapshot_select(db, first, last))
+    statement = statement.on_conflict_do_update(
+        index_elements=[KpiSnapshot.user_id, KpiSnapshot.day],
+        set_={
+            **{column: statement.excluded[column] for column in SNAPSHOT_COLUMNS[2:]},
+            "computed_at": func.now(),
+        },
+    )
+    written = db.execute(statement).rowcount
+    db.commit()
+    logger.info("Snapshotted KPIs for %s to %s (%d rows)", first, last, written)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--since", type=date.fromisoformat, help="First day to (re)compute")
+    parser.add_argument("--full", action="store_true", help="Recompute every day since the first deal")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        rows = snapshot_kpis(db, first=_first_deal_day(db) if args.full else args.since)
+    print(f"Wrote {rows} KPI snapshot row(s).")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main()
@@ -2,7 +2,10 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import analytics, companies, users, agencies, activities, deals, importer, auth, notes, attachments, audit_logs
+from fastapi.responses import PlainTextResponse
+from app.instrumentation import QueryInstrumentationMiddleware
+from app.metrics import PrometheusMiddleware, render_metrics
+from app.routers import analytics, companies, users, agencies, activities, deals, importer, auth, notes, attachments, audit_logs, search, item_counts
 
 app = FastAPI(title="営業管理システム")
 
@@ -19,8 +22,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+app.add_middleware(QueryInstrumentationMiddleware)
+# Added last so it is outermost and times the whole middleware stack.
+app.add_middleware(PrometheusMiddleware)
+
 app.include_router(auth.router, prefix="/api")
 
 app.include_router(analytics.router, prefix="/api")
@@ -33,7 +41,16 @@ app.include_router(importer.router, prefix="/api")
 app.include_router(notes.router, prefix="/api")
 app.include_router(attachments.router, prefix="/api")
 app.include_router(audit_logs.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
+app.include_router(item_counts.router, prefix="/api")
 
 @app.get("/")
 def read_root():
-    return {"message": "いらっしゃい!"}
\ No newline at end of file
+    return {"message": "いらっしゃい!"}
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """
+    Prometheus scrape endpoint.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
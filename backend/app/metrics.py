@@ -0,0 +1,181 @@
+# backend/app/metrics.py
+
+"""
+Prometheus-format metrics for route latency, DB pool usage and caches.
+
+Everything is kept in plain dicts and lists and only turned into the
+Prometheus text format when /metrics is scraped, so recording a request
+costs a couple of dict lookups and a bisect.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from app.database import engine, async_engine
+
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self):
+        # One slot per bound plus the +Inf bucket; cumulated at render time.
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+# (method, route) -> Histogram, (method, route, status) -> count
+_latency = defaultdict(Histogram)
+_requests = defaultdict(int)
+# Scopes of requests currently being served; grouped by route on scrape.
+_in_flight = {}
+
+_cache_lock = threading.Lock()
+_cache_requests = defaultdict(int)
+
+
+def record_cache(cache: str, hit: bool):
+    """
+    Counts one lookup against a named cache, e.g. record_cache("outcome_cube", hit=True).
+    """
+    with _cache_lock:
+        _cache_requests[(cache, "hit" if hit else "miss")] += 1
+
+
+def route_template(scope) -> str:
+    """
+    The path template of the route that handled the request
+    (e.g. /api/deals/{deal_id}). FastAPI stores the matched route in the
+    scope while routing; unmatched requests share one label so raw paths
+    never become label values.
+    """
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    # Newer FastAPI versions keep included routes unprefixed and record the
+    # effective (prefixed) path separately.
+    effective = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(effective, "path", None) or route.path
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware that records request counts, latency and in-flight
+    requests per route template.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        request_key = id(scope)
+        _in_flight[request_key] = scope
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            del _in_flight[request_key]
+            route = route_template(scope)
+            method = scope["method"]
+            _latency[(method, route)].observe(time.perf_counter() - started)
+            _requests[(method, route, status_code)] += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _pool_stats():
+    for name, target in (("sync", engine), ("async", async_engine)):
+        pool = target.pool
+        # Only QueuePool-style pools expose these counters.
+        if not hasattr(pool, "checkedout"):
+            continue
+        yield name, {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        }
+
+
+def render_metrics() -> str:
+    """
+    Renders all metrics in the Prometheus text exposition format (0.0.4).
+    """
+    lines = []
+
+    lines.append("# HELP http_requests_total Total HTTP requests by route template and status.")
+    lines.append("# TYPE http_requests_total counter")
+    for (method, route, status), count in list(_requests.items()):
+        lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    lines.append("# HELP http_request_duration_seconds HTTP request latency by route template.")
+    lines.append("# TYPE http_request_duration_seconds histogram")
+    for (method, route), histogram in list(_latency.items()):
+        cumulative = 0
+        for bound, bucket in zip(LATENCY_BUCKETS + ("+Inf",), histogram.buckets):
+            cumulative += bucket
+            labels = _labels(method=method, route=route, le=bound)
+            lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+        labels = _labels(method=method, route=route)
+        lines.append(f"http_request_duration_seconds_sum{labels} {histogram.sum}")
+        lines.append(f"http_request_duration_seconds_count{labels} {histogram.count}")
+
+    in_flight = defaultdict(int)
+    for scope in list(_in_flight.values()):
+        in_flight[(scope["method"], route_template(scope))] += 1
+    lines.append("# HELP http_requests_in_flight HTTP requests currently being served.")
+    lines.append("# TYPE http_requests_in_flight gauge")
+    for (method, route), count in in_flight.items():
+        lines.append(f"http_requests_in_flight{_labels(method=method, route=route)} {count}")
+
+    lines.append("# HELP db_pool_connections Database connection pool state.")
+    lines.append("# TYPE db_pool_connections gauge")
+    for name, stats in _pool_stats():
+        for state, value in stats.items():
+            lines.append(f"db_pool_connections{_labels(engine=name, state=state)} {value}")
+
+    with _cache_lock:
+        cache_requests = dict(_cache_requests)
+    lines.append("# HELP cache_requests_total Cache lookups by result.")
+    lines.append("# TYPE cache_requests_total counter")
+    for (cache, result), count in cache_requests.items():
+        lines.append(f"cache_requests_total{_labels(cache=cache, result=result)} {count}")
+
+    lines.append("# HELP cache_hit_ratio Share of cache lookups that were hits.")
+    lines.append("# TYPE cache_hit_ratio gauge")
+    for cache in sorted({cache for cache, _ in cache_requests}):
+        hits = cache_requests.get((cache, "hit"), 0)
+        total = hits + cache_requests.get((cache, "miss"), 0)
+        lines.append(f"cache_hit_ratio{_labels(cache=cache)} {hits / total if total else 0}")
+
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,6 @@
 # backend/app/models/activity.py
 
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
 from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -9,14 +9,20 @@ from .enums import ActivityType
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = {"postgresql_partition_by": "RANGE (date)"}
 
+    # The table is range-partitioned by `date` (one partition per JST year),
+    # so its primary key is (id, date); id alone stays unique through its
+    # sequence.
     id = Column(Integer, primary_key=True, index=True)
     deal_id = Column(Integer, ForeignKey("deals.id"), nullable=False)
     
     type = Column(ENUM(ActivityType, name='activity_type', create_type=False), nullable=False)
     
-    date = Column(DateTime(timezone=True), server_default=func.now())
+    date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     notes = Column(Text)
+    # Message-ID or calendar UID for activities brought in by app.activity_importer.
+    external_id = Column(String(255))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False)
     deal = relationship("Deal", back_populates="activities")
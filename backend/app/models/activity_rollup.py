@@ -0,0 +1,32 @@
+# backend/app/models/activity_rollup.py
+
+from sqlalchemy import Column, Integer, SmallInteger, Date, DateTime
+from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.sql import func
+from app.database import Base
+from .enums import ActivityType
+
+class ActivityDailyCount(Base):
+    """
+    Activities per JST day, hour, deal owner and type, maintained by
+    app.activity_maintenance for the activity analytics.
+    """
+    __tablename__ = "activity_daily_counts"
+
+    day = Column(Date, primary_key=True)
+    hour = Column(SmallInteger, primary_key=True)
+    # Owner of the activity's deal when the day was last rolled up
+    user_id = Column(Integer, primary_key=True)
+    type = Column(ENUM(ActivityType, name='activity_type', create_type=False), primary_key=True)
+
+    activity_count = Column(Integer, nullable=False)
+
+class ActivityRollupDirtyDay(Base):
+    """
+    JST days whose activities changed since they were last rolled up.
+    Filled by statement-level triggers on activities.
+    """
+    __tablename__ = "activity_rollup_dirty_days"
+
+    day = Column(Date, primary_key=True)
+    marked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
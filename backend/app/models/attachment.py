@@ -1,7 +1,8 @@
 # backend/app/models/attachment.py
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, String, Text, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -16,9 +17,24 @@ class Attachment(Base):
 
     # File metadata
     file_name = Column(String(255), nullable=False)
-    file_path = Column(String(512), nullable=False, unique=True)
+    # Attachments with the same content share one stored file
+    file_path = Column(String(512), nullable=False)
     file_type = Column(String(100))
     file_size = Column(Integer) # Size in bytes
+    content_hash = Column(String(64), ForeignKey("stored_files.sha256"), nullable=True, index=True)
+
+    # Preview generated by the attachment worker: pending, ready,
+    # unsupported or failed. The PNG is deferred so listings don't load it.
+    preview_status = Column(String(20), nullable=False, default="pending", server_default="pending")
+    thumbnail = deferred(Column(LargeBinary))
+    text_excerpt = Column(Text)
+    previewed_at = Column(DateTime(timezone=True))
+
+    # Full text extracted by the worker for search (see crud_search).
+    content_text = deferred(Column(Text))
+    search_vector = deferred(Column(
+        TSVECTOR, Computed("to_tsvector('simple', coalesce(content_text, ''))", persisted=True)
+    ))
 
     # Foreign key to the user who uploaded the file
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -18,6 +18,10 @@ class AuditLog(Base):
     
     # Details about the action
     details = Column(Text, nullable=True)
+
+    # The item the action was performed on, if any (e.g. 'deal', 12)
+    related_to = Column(String(50), nullable=True)
+    related_id = Column(Integer, nullable=True)
     
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -0,0 +1,25 @@
+# backend/app/models/calendar_day.py
+
+from sqlalchemy import Column, Boolean, Date, DateTime, SmallInteger, String
+from app.database import Base
+
+class CalendarDay(Base):
+    """
+    One row per JST day with the periods it belongs to, filled in by
+    app.fiscal_calendar. Analytics join timestamps to it by range instead
+    of converting every row to JST.
+    """
+    __tablename__ = "calendar"
+
+    day = Column(Date, primary_key=True)
+    # JST midnight at the start of this day and of the next
+    starts_at = Column(DateTime(timezone=True), nullable=False)
+    ends_at = Column(DateTime(timezone=True), nullable=False)
+
+    month = Column(Date, nullable=False) # First day of the JST month
+    # Fiscal years start in April and are named after the year they start in
+    fiscal_year = Column(SmallInteger, nullable=False)
+    fiscal_quarter = Column(SmallInteger, nullable=False)
+
+    is_business_day = Column(Boolean, nullable=False)
+    holiday_name = Column(String(50), nullable=True)
@@ -13,6 +13,8 @@ class Company(Base):
     company_kana = Column(String(255))
     industry = Column(String(100))
     other_details = Column(JSON)
+    # e.g. "example.co.jp"; matches imported emails and meetings to the company.
+    email_domain = Column(String(255), index=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
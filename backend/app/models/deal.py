@@ -1,6 +1,6 @@
 # backend/app/models/deal.py
 
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Computed, Integer, String, Numeric, DateTime, ForeignKey, Text
 from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -30,6 +30,8 @@ class Deal(Base):
     cancellation_reason = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+    # Kept by Postgres; NULL until the deal closes.
+    seconds_to_close = Column(Integer, Computed("extract(epoch FROM closed_at - created_at)::integer", persisted=True))
 
     user = relationship("User", back_populates="deals")
     company = relationship("Company", back_populates="deals")
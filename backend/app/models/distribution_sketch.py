@@ -0,0 +1,20 @@
+# backend/app/models/distribution_sketch.py
+
+from sqlalchemy import Column, Integer, String, Date, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class DistributionSketch(Base):
+    """
+    Per JST month, how many values of a deal metric fell in each
+    logarithmic bucket, maintained by app.distribution_sketches for
+    approximate percentiles.
+    """
+    __tablename__ = "distribution_sketches"
+
+    metric = Column(String(30), primary_key=True)
+    month = Column(Date, primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+
+    value_count = Column(Integer, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,33 @@
+# backend/app/models/kpi_snapshot.py
+
+from sqlalchemy import Column, Integer, Date, DateTime, Float, Numeric
+from sqlalchemy.sql import func
+from app.database import Base
+
+class KpiSnapshot(Base):
+    """
+    KPIs as of the end of each JST day, company-wide (user_id 0) and per
+    deal owner, written by app.kpi_snapshots for trend charts.
+    """
+    __tablename__ = "kpi_snapshots"
+
+    # user_id first, so one scope's series is a single primary key range
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    # Deals still open at the end of the day
+    open_deals = Column(Integer, nullable=False)
+    open_pipeline_value = Column(Numeric(15, 2), nullable=False)
+
+    # Deals created / won / lost during the day
+    deals_created = Column(Integer, nullable=False)
+    deals_won = Column(Integer, nullable=False)
+    deals_lost = Column(Integer, nullable=False)
+    won_value = Column(Numeric(15, 2), nullable=False)
+
+    # Over the KPI_WINDOW_DAYS days up to and including the day; NULL
+    # when no deal closed (or was won) in that window
+    win_rate = Column(Float, nullable=True)
+    average_deal_size = Column(Numeric(15, 2), nullable=True)
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
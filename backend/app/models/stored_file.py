@@ -0,0 +1,18 @@
+# backend/app/models/stored_file.py
+
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class StoredFile(Base):
+    __tablename__ = "stored_files"
+
+    # One row per distinct file content, keyed by its SHA-256 hex digest
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+
+    # Number of attachments pointing at this content; the blob is removed
+    # together with the last one
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,34 @@
+# backend/app/models/upload_session.py
+
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    # Random hex token; also names the upload in the storage backend
+    id = Column(String(32), primary_key=True)
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # The attachment that will be created when the upload is finalized
+    related_to = Column(String(50), nullable=False)
+    related_id = Column(Integer, nullable=False)
+    file_name = Column(String(255), nullable=False)
+    file_type = Column(String(100))
+
+    size = Column(BigInteger, nullable=False)
+    received_bytes = Column(BigInteger, nullable=False, default=0)
+    # Fixed when the session is created, since chunk numbers derive from it
+    chunk_size = Column(Integer, nullable=False)
+
+    # Which backend holds the chunks, and its handle (e.g. S3 UploadId)
+    backend = Column(String(20), nullable=False)
+    backend_handle = Column(String(1024))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+    uploader = relationship("User")
@@ -1,8 +1,10 @@
 # backend/app/routers/activities.py
 
-from fastapi import APIRouter, Depends, HTTPException, status # type: ignore
+from fastapi import APIRouter, Depends, HTTPException, Query, status # type: ignore
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from app import crud, schemas, security, models
 from app.database import get_db
 
@@ -31,12 +33,40 @@ def create_activity_for_deal(
 def read_activities_for_deal(
     deal_id: int, 
     db: Session = Depends(get_db), 
-    skip: int = 0, 
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
+    before_date: Optional[datetime] = None,
+    before_id: Optional[int] = None,
     current_user: models.user.User = Depends(security.get_current_user),
 ):
     """
-    Retrieve all activities for a specific deal.
+    Retrieve the activities for a specific deal, newest first.
+
+    Returns at most `limit` activities. To get the next page, pass the
+    `date` and `id` of the last one as `before_date` and `before_id`.
     """
-    activities = crud.activity.get_activities_for_deal(db, deal_id=deal_id, skip=skip, limit=limit)
+    activities = crud.activity.get_activities_for_deal(
+        db, deal_id=deal_id, limit=limit, before_date=before_date, before_id=before_id
+    )
     return activities
+
+
+@router.post("/activities/bulk", response_model=schemas.activity.ActivityBulkResult, status_code=status.HTTP_201_CREATED)
+def create_activities_bulk(
+    payload: schemas.activity.ActivityBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: models.user.User = Depends(security.get_current_user),
+):
+    """
+    Create up to 1000 activities, on any deals, in one statement (e.g. from
+    an email sync). Either all of them are created or none.
+    """
+    missing = crud.activity.get_missing_deal_ids(db, [activity.deal_id for activity in payload.activities])
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Deals not found: {missing}")
+    try:
+        ids = crud.activity.create_activities_bulk(db, activities=payload.activities)
+    except IntegrityError:
+        # A deal was deleted after the check above.
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A referenced deal no longer exists.")
+    return {"created": len(ids), "ids": ids}
@@ -1,117 +1,154 @@
 # backend/app/routers/analytics.py
 
-from fastapi import APIRouter, Depends, HTTPException # type: ignore
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services import analytics_service
+from fastapi import APIRouter, Depends, HTTPException, Query # type: ignore
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.services import activity_analytics_service, analytics_service, distribution_service, funnel_service, kpi_trend_service, outcome_cube_service, pivot_service
 from app.schemas import analytics as analytics_schema
 from app.schemas.churn import MonthlyDataPayload
 from app import security, models
-from typing import List
+from app.distribution_sketches import DistributionMetric
+from app.fiscal_calendar import Period
+from app.models.enums import ActivityType, DealStatus, DealType
+from app.services.funnel_service import FunnelDimension
+from app.services.pivot_service import PivotDimension, PivotMeasure, PivotSource
+from datetime import date
+from typing import Any, Callable, List, Optional
 
 router = APIRouter(
     prefix="/analytics",
     tags=["Analytics"]
 )
 
+async def run_analytics(db: AsyncSession, service_fn: Callable, response_model: Any = None, **kwargs):
+    """
+    Runs a (sync) analytics_service function on the AsyncSession's connection.
+
+    The service code is shared with the sync stack; run_sync executes it in a
+    greenlet so every query still goes through asyncpg without blocking the
+    event loop. Results are validated against the response model inside the
+    same greenlet, so any relationships the schema touches can still load.
+    """
+    def call(session):
+        result = service_fn(session, **kwargs)
+        if response_model is None or result is None:
+            return result
+        return TypeAdapter(response_model).validate_python(result, from_attributes=True)
+
+    return await db.run_sync(call)
+
+def _check_range(start: Optional[date], end: Optional[date]):
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end.")
+
 @router.get("/dashboard", response_model=analytics_schema.DashboardData)
-def get_dashboard_analytics(
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+async def get_dashboard_analytics(
+    compare: Optional[analytics_service.Comparison] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
-    Endpoint to get all necessary data for the main dashboard.
+    Endpoint to get all necessary data for the main dashboard; compare=mom|yoy adds month-over-month
+    or year-over-year changes to the KPIs.
     """
-    return analytics_service.get_dashboard_data(db)
+    return await run_analytics(db, analytics_service.get_dashboard_data, analytics_schema.DashboardData, compare=compare)
 
 @router.get("/overall-kpis", response_model=analytics_schema.OverallKPIs)
-def get_simple_kpis_route(
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+async def get_simple_kpis_route(
+    compare: Optional[analytics_service.Comparison] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
-    Endpoint to get simple, overall KPIs for the main dashboard.
+    Endpoint to get simple, overall KPIs for the main dashboard (compare=mom|yoy adds changes).
     """
-    return analytics_service.get_simple_kpis(db)
+    return await run_analytics(db, analytics_service.get_simple_kpis, compare=compare)
 
 @router.get("/detailed-kpis", response_model=analytics_schema.DetailedKPIs)
-def get_detailed_kpis_route(
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+async def get_detailed_kpis_route(
+    period: Period = Period.month,
+    compare: Optional[analytics_service.Comparison] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
-    Endpoint for more detailed analytics dashboard.
+    Endpoint for more detailed analytics dashboard, with sales per JST month or fiscal quarter/year
+    (compare=mom|yoy adds changes).
     """
-    return analytics_service.get_detailed_dashboard_kpis(db)
+    return await run_analytics(db, analytics_service.get_detailed_dashboard_kpis, period=period, compare=compare)
 
 @router.get("/user-performance/detailed/{user_id}", response_model=analytics_schema.UserPerformanceMetrics)
-def get_detailed_user_performance_route(
+async def get_detailed_user_performance_route(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+    period: Period = Period.month,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
-    Endpoint to get a comprehensive breakdown of a single user's performance.
+    Endpoint to get a comprehensive breakdown of a single user's performance,
+    per JST month or fiscal quarter/year.
     """
-    metrics = analytics_service.get_detailed_user_performance(db, user_id=user_id)
+    metrics = await run_analytics(db, analytics_service.get_detailed_user_performance, user_id=user_id, period=period)
     if metrics is None:
         raise HTTPException(status_code=404, detail="User not found")
     return metrics
 
 @router.get("/channel-performance", response_model=analytics_schema.ChannelAnalyticsData)
-def get_channel_performance_route(
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+async def get_channel_performance_route(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Endpoint to get a performance breakdown by sales channel (direct vs. agency).
     """
-    return analytics_service.get_channel_performance_analytics(db)
+    return await run_analytics(db, analytics_service.get_channel_performance_analytics)
 
 @router.get("/agency-performance", response_model=List[analytics_schema.AgencyPerformance])
-def get_agency_performance_route(
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+async def get_agency_performance_route(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Endpoint to get a performance breakdown by agency.
     """
-    return analytics_service.get_agency_performance(db)
+    return await run_analytics(db, analytics_service.get_agency_performance)
 
 @router.get("/deal-outcomes", response_model=analytics_schema.DealOutcomesData)
-def get_deal_outcomes_analysis_route(
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+async def get_deal_outcomes_analysis_route(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Endpoint to get detailed analysis of deal outcomes.
     """
-    return analytics_service.get_deal_outcomes_analysis(db)
+    return await run_analytics(db, analytics_service.get_deal_outcomes_analysis)
 
 @router.get("/churn-analysis", response_model=analytics_schema.ChurnAnalysisData)
-def get_churn_analysis_route(
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+async def get_churn_analysis_route(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Endpoint to get a detailed breakdown of churn analytics.
     """
-    return analytics_service.get_churn_analysis(db)
+    return await run_analytics(db, analytics_service.get_churn_analysis)
 
 @router.get("/monthly-cancellation-rate")
-def get_monthly_cancellation_rate_route(
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+async def get_monthly_cancellation_rate_route(
+    period: Period = Period.month,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
-    Endpoint to get the overall monthly cancellation rate.
+    Endpoint to get the overall cancellation rate per JST month or fiscal quarter/year.
     """
-    return analytics_service.calculate_monthly_cancellation_rate(db)
+    return await run_analytics(db, analytics_service.calculate_monthly_cancellation_rate, period=period)
 
 @router.post("/monthly-churn")
-def receive_monthly_churn_data(
+async def receive_monthly_churn_data(
     payload: MonthlyDataPayload,
-    current_user: models.user.User = Depends(security.get_current_user),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Placeholder to receive data from the frontend's churn form.
@@ -120,44 +157,44 @@ def receive_monthly_churn_data(
     return {"message": "Data received successfully", "data": payload.monthly_data}
 
 @router.get("/outcome-breakdowns")
-def get_deal_outcome_breakdowns(
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+async def get_deal_outcome_breakdowns(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Breakitdown yeah break it brekit
     """
-    return analytics_service.get_deal_outcome_breakdowns(db)
+    return await run_analytics(db, analytics_service.get_deal_outcome_breakdowns)
 
 @router.get("/leaderboard", response_model=List[analytics_schema.LeaderboardEntry])
-def get_sales_leaderboard_route(db: Session = Depends(get_db)):
+async def get_sales_leaderboard_route(db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint to get sales leaderboard data.
     """
-    return analytics_service.get_sales_leaderboard(db)
+    return await run_analytics(db, analytics_service.get_sales_leaderboard)
 
 @router.get("/forecast", response_model=List[analytics_schema.ForecastEntry])
-def get_sales_forecast_route(db: Session = Depends(get_db)):
+async def get_sales_forecast_route(period: Period = Period.month, db: AsyncSession = Depends(get_async_db)):
     """
-    Endpoint to get a simple sales forecast.
+    Endpoint to get a simple sales forecast, per JST month or fiscal quarter/year.
     """
-    return analytics_service.get_sales_forecast(db)
+    return await run_analytics(db, analytics_service.get_sales_forecast, period=period)
 
 @router.get("/search", response_model=List[analytics_schema.SearchResult])
-def global_search_route(q: str, db: Session = Depends(get_db)):
+async def global_search_route(q: str, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint for global search across users, companies, and deals.
     """
     if not q:
         return []
-    return analytics_service.perform_global_search(db, query=q)
+    return await run_analytics(db, analytics_service.perform_global_search, query=q)
 
 @router.get("/reports/monthly", response_model=analytics_schema.MonthlyReportData)
-def get_monthly_report_route(
+async def get_monthly_report_route(
     year: int, 
     month: int,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
 ):
     """
     Endpoint to get aggregated data for a monthly report.
@@ -165,4 +202,155 @@ def get_monthly_report_route(
     if not (1 <= month <= 12):
         raise HTTPException(status_code=400, detail="Month must be between 1 and 12.")
     
-    return analytics_service.get_monthly_report_data(db, year=year, month=month)
\ No newline at end of file
+    return await run_analytics(db, analytics_service.get_monthly_report_data, analytics_schema.MonthlyReportData, year=year, month=month)
+
+@router.get("/activities/volume", response_model=analytics_schema.ActivityVolume)
+async def get_activity_volume_route(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Endpoint to get activity counts by type, user and week (default: the last 12 weeks).
+    """
+    _check_range(start, end)
+    return await run_analytics(db, activity_analytics_service.get_activity_volume, analytics_schema.ActivityVolume,
+                               start=start, end=end, user_id=user_id)
+
+@router.get("/activities/heatmap", response_model=analytics_schema.ActivityHeatmap)
+async def get_activity_heatmap_route(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    type: Optional[ActivityType] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Endpoint to get activity counts per weekday and hour (default: the last 90 days).
+    """
+    _check_range(start, end)
+    return await run_analytics(db, activity_analytics_service.get_activity_heatmap, analytics_schema.ActivityHeatmap,
+                               start=start, end=end, user_id=user_id, activity_type=type)
+
+@router.get("/activities/win-correlation", response_model=analytics_schema.ActivityWinCorrelation)
+async def get_activity_win_correlation_route(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Endpoint to get how activity counts on closed deals relate to winning them (default: the last 365 days).
+    """
+    _check_range(start, end)
+    return await run_analytics(db, activity_analytics_service.get_activity_win_correlation,
+                               analytics_schema.ActivityWinCorrelation, start=start, end=end)
+
+@router.get("/kpi-trend", response_model=analytics_schema.KpiTrend)
+async def get_kpi_trend_route(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Endpoint to get daily KPI snapshots, company-wide or for one user (default: the last 90 days).
+    """
+    _check_range(start, end)
+    return await run_analytics(db, kpi_trend_service.get_kpi_trend, analytics_schema.KpiTrend,
+                               start=start, end=end, user_id=user_id)
+
+@router.get("/distributions/{metric}", response_model=analytics_schema.Distribution)
+async def get_distribution_route(
+    metric: DistributionMetric,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    buckets: int = Query(20, ge=1, le=100),
+    approximate: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Endpoint to get percentiles and a histogram of deal value, time to close or activities per deal
+    over the deals closed in a range (default: the last 365 days). `approximate` uses the monthly sketches
+    when there are any for the range, and exact values otherwise.
+    """
+    _check_range(start, end)
+    if approximate and user_id is not None:
+        raise HTTPException(status_code=400, detail="Approximate distributions are company-wide only.")
+    return await run_analytics(db, distribution_service.get_distribution, analytics_schema.Distribution,
+                               metric=metric, start=start, end=end, user_id=user_id,
+                               buckets=buckets, approximate=approximate)
+
+@router.get("/pivot", response_model=analytics_schema.PivotResult)
+async def get_pivot_route(
+    dimensions: List[PivotDimension] = Query(...),
+    measures: List[PivotMeasure] = Query([PivotMeasure.count]),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    status: Optional[List[DealStatus]] = Query(None),
+    type: Optional[DealType] = None,
+    user_id: Optional[int] = None,
+    sort: Optional[PivotMeasure] = None,
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    subtotals: bool = False,
+    source: PivotSource = PivotSource.deals,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Endpoint to pivot deals by any of the whitelisted dimensions and measures, e.g.
+    ?dimensions=industry&dimensions=month&measures=count&measures=win_rate.
+    start/end keep the deals closed in that range; subtotals adds every subtotal level.
+    """
+    _check_range(start, end)
+    if source == PivotSource.snapshots and not pivot_service.snapshots_support(
+            dimensions, measures + ([sort] if sort else []), status, type, subtotals):
+        raise HTTPException(status_code=400, detail="The KPI snapshots only cover won_count, won_value and win_rate by user and month.")
+    return await run_analytics(db, pivot_service.get_pivot, analytics_schema.PivotResult,
+                               dimensions=dimensions, measures=measures, start=start, end=end, statuses=status,
+                               deal_type=type, user_id=user_id, sort=sort, limit=limit, subtotals=subtotals,
+                               source=source)
+
+@router.get("/outcome-cube", response_model=analytics_schema.OutcomeCube)
+async def get_outcome_cube_route(
+    status: Optional[DealStatus] = None,
+    industry: Optional[str] = None,
+    reason: Optional[str] = None,
+    by: Optional[PivotDimension] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Endpoint to drill down into deal outcomes: the totals of the node fixed by status/industry/reason
+    and its children by the next dimension (or `by`), read from the cached outcome cube.
+    """
+    _check_range(start, end)
+    if by is not None and by not in outcome_cube_service.CUBE_DIMENSIONS:
+        raise HTTPException(status_code=400, detail="by must be status, industry or reason.")
+    return await run_analytics(db, outcome_cube_service.get_outcome_cube, analytics_schema.OutcomeCube,
+                               status=status, industry=industry, reason=reason, by=by, start=start, end=end)
+
+@router.get("/lead-funnel", response_model=analytics_schema.LeadFunnel)
+async def get_lead_funnel_route(
+    by: FunnelDimension = FunnelDimension.lead_source,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    value: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Endpoint to get lead funnels (conversion, time in funnel, revenue) per lead source or product
+    and lead cohort month (default: the last 12 months). `value` limits it to some sources or products.
+    """
+    _check_range(start, end)
+    return await run_analytics(db, funnel_service.get_lead_funnel, analytics_schema.LeadFunnel,
+                               by=by, start=start, end=end, values=value)
@@ -1,13 +1,21 @@
 # backend/app/routers/attachments.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException
+from typing import List, Optional
 from app.schemas import attachment as attachment_schemas
-from app.crud import crud_attachment
-from app import models, security
-from app.database import get_db
+from app.crud import crud_attachment, crud_upload_session
+from app import models, security, storage
+from app.database import get_db, get_async_db
+from app.downloads import AttachmentResponse, IMMUTABLE_CACHE_CONTROL, etag_matches
+from functools import partial
+import os
+import secrets
 
 router = APIRouter(
     prefix="/attachments",
@@ -15,22 +23,292 @@ router = APIRouter(
 )
 
 @router.post("/upload", response_model=attachment_schemas.Attachment)
-def upload_attachment(
-    related_to: str = Form(...),
-    related_id: int = Form(...),
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user)
+async def upload_attachment(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
 ):
     """
     Upload a file and associate it with a deal or company.
+
+    Expects a multipart form with `file`, `related_to` and `related_id`. The
+    body is read directly from the request stream so the file is hashed and
+    stored as it arrives, and rejected with 413 as soon as it exceeds
+    ATTACHMENT_MAX_SIZE.
     """
-    if related_to not in ["deal", "company"]:
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > storage.MAX_UPLOAD_SIZE + storage.MULTIPART_OVERHEAD:
+        raise HTTPException(status_code=413, detail="File is too large.")
+
+    if request.headers.get("content-type", "").split(";")[0].strip().lower() != "multipart/form-data":
+        raise HTTPException(status_code=400, detail="Invalid multipart upload.")
+
+    parser = storage.StreamingUploadParser(request.headers, request.stream())
+    try:
+        try:
+            form = await parser.parse()
+        except storage.UploadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
+        except MultiPartException:
+            raise HTTPException(status_code=400, detail="Invalid multipart upload.")
+
+        file = form.get("file")
+        related_to = form.get("related_to")
+        related_id = form.get("related_id")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=400, detail="No file uploaded.")
+        if related_to not in ["deal", "company"]:
+            raise HTTPException(status_code=400, detail="Invalid 'related_to' type.")
+        if not isinstance(related_id, str) or not related_id.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid 'related_id'.")
+
+        writer = file.file
+        db_attachment = await crud_attachment.save_attachment_async(
+            db,
+            sha256=writer.sha256,
+            size=writer.size,
+            place=partial(writer.commit, storage.get_backend()),
+            file_name=file.filename,
+            file_type=file.content_type,
+            related_to=related_to,
+            related_id=int(related_id),
+            user_id=current_user.id,
+        )
+    finally:
+        await parser.close()
+
+    return await crud_attachment.get_attachment_async(db, attachment_id=db_attachment.id)
+
+# --- Resumable uploads ---
+# POST /uploads creates a session, PATCH /uploads/{id} appends one chunk at
+# the offset given in the Upload-Offset header, GET /uploads/{id} reports
+# how much has been received (to resume after a failure), and
+# POST /uploads/{id}/finalize turns the upload into an attachment. Every
+# chunk but the last must be exactly `chunk_size` bytes.
+
+def _upload_headers(db_upload) -> dict:
+    return {"Upload-Offset": str(db_upload.received_bytes)}
+
+async def _get_upload_or_404(db: AsyncSession, upload_id: str, user_id: int, for_update: bool = False):
+    db_upload = await crud_upload_session.get_upload_session_async(db, upload_id=upload_id, user_id=user_id, for_update=for_update)
+    if not db_upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if db_upload.backend != storage.get_backend().name:
+        raise HTTPException(status_code=409, detail="Upload was started on a different storage backend")
+    return db_upload
+
+@router.post("/uploads", response_model=attachment_schemas.UploadSession, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload: attachment_schemas.UploadSessionCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Start a resumable upload of `size` bytes for a deal or company.
+    """
+    if upload.related_to not in ["deal", "company"]:
         raise HTTPException(status_code=400, detail="Invalid 'related_to' type.")
-    
-    return crud_attachment.save_attachment(
-        db=db, file=file, related_to=related_to, related_id=related_id, user_id=current_user.id
+    if not 0 < upload.size <= storage.MAX_RESUMABLE_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail=f"Size must be between 1 and {storage.MAX_RESUMABLE_UPLOAD_SIZE} bytes.")
+
+    backend = storage.get_backend()
+    upload_id = secrets.token_hex(16)
+    handle = await run_in_threadpool(backend.create_upload, upload_id)
+    db_upload = await db.run_sync(
+        crud_upload_session.create_upload_session,
+        upload_id=upload_id,
+        upload=upload,
+        user_id=current_user.id,
+        chunk_size=storage.UPLOAD_CHUNK_SIZE,
+        backend=backend.name,
+        backend_handle=handle,
+    )
+    response.headers.update(_upload_headers(db_upload))
+    return db_upload
+
+@router.get("/uploads/{upload_id}", response_model=attachment_schemas.UploadSession)
+async def read_upload(
+    upload_id: str,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Get how many bytes of a resumable upload have been received.
+    """
+    db_upload = await _get_upload_or_404(db, upload_id, current_user.id)
+    response.headers.update(_upload_headers(db_upload))
+    return db_upload
+
+@router.patch("/uploads/{upload_id}", response_model=attachment_schemas.UploadSession)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Upload the next chunk as the raw request body. Answers 409 with the
+    current offset if `Upload-Offset` does not match it.
+    """
+    db_upload = await _get_upload_or_404(db, upload_id, current_user.id)
+    if upload_offset != db_upload.received_bytes or db_upload.received_bytes >= db_upload.size:
+        raise HTTPException(status_code=409, detail="Upload offset mismatch", headers=_upload_headers(db_upload))
+
+    expected = min(db_upload.chunk_size, db_upload.size - db_upload.received_bytes)
+    # Don't hold a pooled connection while a (possibly slow) chunk streams
+    # in; nothing is pending, and loaded objects survive the commit.
+    await db.commit()
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > expected:
+        raise HTTPException(status_code=413, detail=f"Chunk must be {expected} bytes.")
+
+    try:
+        writer = await storage.spool_body(request.stream(), max_size=expected)
+    except storage.UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"Chunk must be {expected} bytes.")
+    try:
+        if writer.size != expected:
+            raise HTTPException(status_code=400, detail=f"Chunk must be {expected} bytes.", headers=_upload_headers(db_upload))
+        await run_in_threadpool(
+            storage.get_backend().write_chunk, db_upload.id, db_upload.backend_handle,
+            db_upload.received_bytes, db_upload.chunk_size, writer.finish(),
+        )
+    finally:
+        await run_in_threadpool(writer.close)
+
+    advanced = await db.run_sync(
+        crud_upload_session.advance_upload_session,
+        upload_id=db_upload.id,
+        from_offset=upload_offset,
+        to_offset=upload_offset + expected,
     )
+    db_upload = await _get_upload_or_404(db, upload_id, current_user.id)
+    if not advanced:
+        raise HTTPException(status_code=409, detail="Upload offset mismatch", headers=_upload_headers(db_upload))
+    response.headers.update(_upload_headers(db_upload))
+    return db_upload
+
+@router.post("/uploads/{upload_id}/finalize", response_model=attachment_schemas.Attachment)
+async def finalize_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Turn a completely received upload into an attachment.
+    """
+    db_upload = await _get_upload_or_404(db, upload_id, current_user.id)
+    if db_upload.received_bytes != db_upload.size:
+        raise HTTPException(status_code=409, detail="Upload is incomplete", headers=_upload_headers(db_upload))
+    # Assembling and hashing reads the whole upload back (up to
+    # ATTACHMENT_MAX_RESUMABLE_SIZE), so it happens before the session is
+    # locked and without holding a pooled connection.
+    await db.commit()
+
+    backend = storage.get_backend()
+    chunks = -(-db_upload.size // db_upload.chunk_size)
+    try:
+        sha256, size = await run_in_threadpool(backend.complete_upload, db_upload.id, db_upload.backend_handle, chunks)
+    except Exception:
+        # A concurrent finalize may have promoted the upload already.
+        await _get_upload_or_404(db, upload_id, current_user.id)
+        raise
+
+    # Locked until the attachment is committed, so a concurrent finalize
+    # waits and then finds the session gone.
+    db_upload = await _get_upload_or_404(db, upload_id, current_user.id, for_update=True)
+    db_attachment = await crud_attachment.save_attachment_async(
+        db,
+        sha256=sha256,
+        size=size,
+        place=partial(backend.promote_upload, db_upload.id, sha256),
+        file_name=db_upload.file_name,
+        file_type=db_upload.file_type,
+        related_to=db_upload.related_to,
+        related_id=db_upload.related_id,
+        user_id=current_user.id,
+        upload_session=db_upload,
+    )
+    return await crud_attachment.get_attachment_async(db, attachment_id=db_attachment.id)
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async)
+):
+    """
+    Abandon a resumable upload and discard the chunks received so far.
+    """
+    db_upload = await _get_upload_or_404(db, upload_id, current_user.id)
+    await run_in_threadpool(storage.get_backend().abort_upload, db_upload.id, db_upload.backend_handle)
+    await db.run_sync(crud_upload_session.delete_upload_session, db_upload=db_upload)
+    return None
+
+# Registered before /{related_to}/{related_id}, which would otherwise match it.
+@router.get("/download/{attachment_id}")
+def download_attachment(
+    attachment_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.user.User = Depends(security.get_current_user)
+):
+    """
+    Download a specific attachment file.
+
+    Supports single byte ranges and conditional requests: the ETag is the
+    stored content hash, so a cached copy is revalidated with a 304 (and
+    content-addressed files are marked immutable).
+    """
+    attachment = crud_attachment.get_attachment(db, attachment_id=attachment_id)
+    if not attachment:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    path = attachment.file_path
+    if attachment.content_hash:
+        backend = storage.get_backend()
+        path = backend.local_path(attachment.content_hash)
+        if path is None:
+            # Remote storage serves the file (ranges and caching included) itself.
+            url = backend.download_url(attachment.content_hash, attachment.file_name, attachment.file_type)
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Attachment file is missing")
+
+    return AttachmentResponse(
+        path=path,
+        stat_result=stat_result,
+        filename=attachment.file_name,
+        media_type=attachment.file_type,
+        content_hash=attachment.content_hash,
+    )
+
+@router.get("/thumbnail/{attachment_id}")
+def read_attachment_thumbnail(
+    attachment_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: models.user.User = Depends(security.get_current_user)
+):
+    """
+    Get the PNG thumbnail generated for an attachment by the preview worker.
+    404 until it is ready or if the file type has no thumbnail.
+    """
+    attachment = crud_attachment.get_attachment_thumbnail(db, attachment_id=attachment_id)
+    if not attachment or attachment.preview_status != "ready" or not attachment.thumbnail:
+        raise HTTPException(status_code=404, detail="Thumbnail not available")
+
+    # A thumbnail never changes once generated.
+    etag = f'"{attachment.content_hash or attachment.id}-thumb"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=attachment.thumbnail, media_type="image/png", headers=headers)
 
 @router.get("/{related_to}/{related_id}", response_model=List[attachment_schemas.Attachment])
 def read_attachments_for_item(
@@ -44,17 +322,17 @@ def read_attachments_for_item(
     """
     return crud_attachment.get_attachments_for_item(db=db, related_to=related_to, related_id=related_id)
 
-@router.get("/download/{attachment_id}")
-def download_attachment(
+@router.delete("/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_attachment(
     attachment_id: int,
     db: Session = Depends(get_db),
     current_user: models.user.User = Depends(security.get_current_user)
 ):
     """
-    Download a specific attachment file.
+    Delete an attachment. The stored file is removed with its last reference.
     """
     attachment = crud_attachment.get_attachment(db, attachment_id=attachment_id)
     if not attachment:
         raise HTTPException(status_code=404, detail="Attachment not found")
-        
-    return FileResponse(path=attachment.file_path, filename=attachment.file_name, media_type=attachment.file_type)
\ No newline at end of file
+    crud_attachment.delete_attachment(db, db_attachment=attachment)
+    return None
@@ -1,11 +1,12 @@
 # backend/app/routers/companies.py
 
-from fastapi import Depends, HTTPException, APIRouter # type: ignore
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import Depends, HTTPException, APIRouter, Query # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.schemas import company as company_schema
-from app.crud import crud_company
-from app.database import get_db
+from app.schemas.timeline import TimelinePage
+from app.crud import crud_company, crud_timeline
+from app.database import get_async_db
 from app import security, models
 
 # Dependency to get a database session
@@ -16,72 +17,96 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=company_schema.Company, status_code=201)
-def create_new_company(
+async def create_new_company(
     company: company_schema.CompanyCreate,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Create a new company.
     - Checks if a company with the same name already exists.
     """
-    db_company = crud_company.get_company_by_name(db, company_name=company.company_name)
+    db_company = await crud_company.get_company_by_name_async(db, company_name=company.company_name)
     if db_company:
         raise HTTPException(status_code=400, detail="Company with this name already registered")
-    return crud_company.create_company(db=db, company=company)
+    db_company = await db.run_sync(crud_company.create_company, company=company)
+    return await crud_company.get_company_async(db, company_id=db_company.id)
 
 @router.get("/", response_model=List[company_schema.Company])
-def read_all_companies(
+async def read_all_companies(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Retrieve a list of all companies with pagination.
     """
-    companies = crud_company.get_companies(db, skip=skip, limit=limit)
+    companies = await crud_company.get_companies_async(db, skip=skip, limit=limit)
     return companies
 
 @router.get("/{company_id}", response_model=company_schema.Company)
-def read_single_company(
+async def read_single_company(
     company_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Retrieve a single company by its ID.
     """
-    db_company = crud_company.get_company(db, company_id=company_id)
+    db_company = await crud_company.get_company_async(db, company_id=company_id)
     if db_company is None:
         raise HTTPException(status_code=404, detail="Company not found")
     return db_company
 
+@router.get("/{company_id}/timeline", response_model=TimelinePage)
+async def read_company_timeline(
+    company_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(crud_timeline.PAGE_SIZE, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
+    ):
+    """
+    Retrieve a company's history, newest first: activities, notes,
+    attachments and audit events on the company and all of its deals.
+    Pass `next_cursor` back as `cursor` for the following page.
+    """
+    db_company = await crud_company.get_company_async(db, company_id=company_id)
+    if db_company is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    try:
+        return await crud_timeline.get_timeline_async(db, company_id=company_id, cursor=cursor, limit=limit)
+    except crud_timeline.InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
 @router.put("/{company_id}", response_model=company_schema.Company)
-def update_existing_company(
+async def update_existing_company(
     company_id: int,
     company_update: company_schema.CompanyUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Update a company's details.
     """
-    db_company = crud_company.get_company(db, company_id=company_id)
+    db_company = await crud_company.get_company_async(db, company_id=company_id)
     if db_company is None:
         raise HTTPException(status_code=404, detail="Company not found")
-    return crud_company.update_company(db=db, db_company=db_company, company_update=company_update)
+    await db.run_sync(crud_company.update_company, db_company=db_company, company_update=company_update)
+    return await crud_company.get_company_async(db, company_id=company_id)
 
 @router.delete("/{company_id}", response_model=company_schema.Company)
-def delete_existing_company(
+async def delete_existing_company(
     company_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Delete a company.
     """
-    db_company = crud_company.delete_company(db, company_id=company_id)
+    db_company = await crud_company.get_company_async(db, company_id=company_id)
     if db_company is None:
         raise HTTPException(status_code=404, detail="Company not found")
+    await db.run_sync(crud_company.delete_company, company_id=company_id)
     return db_company
@@ -1,11 +1,12 @@
 # backend/app/routers/deals.py
 
-from fastapi import APIRouter, Depends, HTTPException, status # type: ignore
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app import security, schemas, models
-from app.crud import crud_deal
-from app.database import get_db
+from app.schemas.timeline import TimelinePage
+from app.crud import crud_deal, crud_timeline
+from app.database import get_async_db
 
 router = APIRouter(
     prefix="/deals",
@@ -13,81 +14,109 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[schemas.deal.Deal])
-def read_all_deals(
-    db: Session = Depends(get_db),
+async def read_all_deals(
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
     status: Optional[str] = None,
     user_id: Optional[int] = None,
     company_id: Optional[int] = None,
-    current_user: models.user.User = Depends(security.get_current_user),
+    include_counts: bool = False,
+    current_user: models.user.User = Depends(security.get_current_user_async),
 ):
     """
     Retrieve a list of all deals with optional pagination and filtering.
+
+    With `include_counts=true` every deal carries `item_counts`: its number
+    of notes and attachments and when the latest of each was added.
     """
-    deals = crud_deal.get_deals(
+    deals = await crud_deal.get_deals_async(
         db, 
         skip=skip, 
         limit=limit, 
         search=search, 
         status=status, 
         user_id=user_id, 
-        company_id=company_id
+        company_id=company_id,
+        include_counts=include_counts
     )
     return deals
 
 @router.post("/", response_model=schemas.deal.Deal, status_code=status.HTTP_201_CREATED)
-def create_new_deal(
+async def create_new_deal(
     deal: schemas.deal.DealCreate,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Create a new deal.
     """
-    return crud_deal.create_deal(db=db, deal=deal)
+    db_deal = await db.run_sync(crud_deal.create_deal, deal=deal, current_user_id=current_user.id)
+    return await crud_deal.get_deal_async(db, deal_id=db_deal.id)
 
 @router.get("/{deal_id}", response_model=schemas.deal.Deal)
-def read_deal_by_id(
+async def read_deal_by_id(
     deal_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Retrieve a single deal by its ID.
     """
-    db_deal = crud_deal.get_deal(db, deal_id=deal_id)
+    db_deal = await crud_deal.get_deal_async(db, deal_id=deal_id)
     if not db_deal:
         raise HTTPException(status_code=404, detail="Deal not found")
     return db_deal
 
+@router.get("/{deal_id}/timeline", response_model=TimelinePage)
+async def read_deal_timeline(
+    deal_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(crud_timeline.PAGE_SIZE, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
+    ):
+    """
+    Retrieve a deal's history, newest first: activities, notes, attachments
+    and audit events. Pass `next_cursor` back as `cursor` for the following
+    page.
+    """
+    db_deal = await crud_deal.get_deal_async(db, deal_id=deal_id)
+    if not db_deal:
+        raise HTTPException(status_code=404, detail="Deal not found")
+    try:
+        return await crud_timeline.get_timeline_async(db, deal_id=deal_id, cursor=cursor, limit=limit)
+    except crud_timeline.InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
 @router.put("/{deal_id}", response_model=schemas.deal.Deal)
-def update_existing_deal(
+async def update_existing_deal(
     deal_id: int,
     deal_update: schemas.deal.DealUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Update an existing deal.
     """
-    db_deal = crud_deal.get_deal(db, deal_id=deal_id)
+    db_deal = await crud_deal.get_deal_async(db, deal_id=deal_id)
     if not db_deal:
         raise HTTPException(status_code=404, detail="Deal not found")
     
-    return crud_deal.update_deal(db, db_deal=db_deal, deal_update=deal_update)
+    await db.run_sync(crud_deal.update_deal, db_deal=db_deal, deal_update=deal_update, current_user_id=current_user.id)
+    return await crud_deal.get_deal_async(db, deal_id=deal_id)
 
 @router.delete("/{deal_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_existing_deal(
+async def delete_existing_deal(
     deal_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(security.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.user.User = Depends(security.get_current_user_async),
     ):
     """
     Delete a deal.
     """
-    db_deal = crud_deal.delete_deal(db, deal_id=deal_id)
+    db_deal = await db.run_sync(crud_deal.delete_deal, deal_id=deal_id, current_user_id=current_user.id)
     if not db_deal:
         raise HTTPException(status_code=404, detail="Deal not found")
     return None
\ No newline at end of file
@@ -0,0 +1,35 @@
+# backend/app/routers/item_counts.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+from app.schemas.item_counts import ItemCounts
+from app.crud import crud_item_counts
+from app import models, security
+from app.database import get_db
+
+router = APIRouter(
+    prefix="/item-counts",
+    tags=["Item Counts"]
+)
+
+MAX_IDS = 500
+
+@router.get("/{related_to}", response_model=List[ItemCounts])
+def read_item_counts(
+    related_to: str,
+    ids: List[int] = Query(...),
+    db: Session = Depends(get_db),
+    current_user: models.user.User = Depends(security.get_current_user)
+):
+    """
+    Get note and attachment counts, and when the latest of each was added,
+    for many items at once (e.g., /item-counts/deal?ids=1&ids=2&ids=3).
+    """
+    if related_to not in ["deal", "company"]:
+        raise HTTPException(status_code=400, detail="Invalid 'related_to' type. Must be 'deal' or 'company'.")
+    if len(ids) > MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_IDS} ids per request.")
+
+    counts = crud_item_counts.get_item_counts(db, related_to=related_to, related_ids=ids)
+    return list(counts.values())
@@ -0,0 +1,29 @@
+# backend/app/routers/search.py
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+from app.schemas import search as search_schemas
+from app.crud import crud_search
+from app import models, security
+from app.database import get_db
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Search"]
+)
+
+@router.get("/", response_model=List[search_schemas.SearchResult])
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.user.User = Depends(security.get_current_user)
+):
+    """
+    Search the contents of notes and attachments (e.g., /search/?q=見積 OR proposal).
+
+    Returns the best matching deals and companies, each with highlighted
+    snippets of the notes and files that matched.
+    """
+    return crud_search.search(db=db, query=q, limit=limit)
@@ -0,0 +1,89 @@
+# backend/app/scheduler.py
+
+"""
+Runs the periodic maintenance jobs in one long-lived process, so the
+analytics endpoints only ever read:
+
+  * activity rollups (app.activity_maintenance): the dirty days, every
+    ACTIVITY_ROLLUP_INTERVAL seconds;
+  * activity partitions for the coming years: daily;
+  * KPI snapshots (app.kpi_snapshots): daily;
+  * distribution sketches (app.distribution_sketches): daily.
+
+Every job runs once at startup, then daily jobs run again shortly after
+each JST midnight. A failed job is logged and retried after RETRY_DELAY
+seconds; the others carry on.
+
+Usage (from backend/):
+
+    python -m app.scheduler
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from app.activity_maintenance import ensure_activity_partitions, refresh_activity_rollups
+from app.database import SessionLocal
+from app.distribution_sketches import refresh_sketches
+from app.fiscal_calendar import JST, jst_start
+from app.kpi_snapshots import snapshot_kpis
+
+logger = logging.getLogger("app.scheduler")
+
+# Seconds between activity rollup refreshes, i.e. how stale the activity
+# analytics can be.
+ACTIVITY_ROLLUP_INTERVAL = float(os.getenv("ACTIVITY_ROLLUP_INTERVAL", "60"))
+# Seconds after JST midnight at which daily jobs run.
+DAILY_DELAY = 10 * 60
+# Seconds before a failed job is tried again.
+RETRY_DELAY = 60.0
+# Seconds between checks for due jobs.
+TICK = 1.0
+
+
+def every(seconds: float):
+    return lambda: seconds
+
+
+def daily() -> float:
+    """Seconds until DAILY_DELAY past the next JST midnight."""
+    now = datetime.now(JST)
+    return (jst_start(now.date() + timedelta(days=1)) - now).total_seconds() + DAILY_DELAY
+
+
+# (name, job, seconds until its next run after a successful one)
+JOBS = [
+    ("activity partitions", ensure_activity_partitions, daily),
+    ("activity rollups", refresh_activity_rollups, every(ACTIVITY_ROLLUP_INTERVAL)),
+    ("KPI snapshots", snapshot_kpis, daily),
+    ("distribution sketches", refresh_sketches, daily),
+]
+
+
+def run_job(name: str, job) -> bool:
+    started = time.monotonic()
+    try:
+        with SessionLocal() as db:
+            job(db)
+    except Exception:
+        logger.exception("Job %s failed; retrying in %g s", name, RETRY_DELAY)
+        return False
+    logger.debug("Job %s done in %.2f s", name, time.monotonic() - started)
+    return True
+
+
+def run():
+    due = {name: time.monotonic() for name, _, _ in JOBS}
+    while True:
+        for name, job, next_delay in JOBS:
+            if due[name] <= time.monotonic():
+                delay = next_delay() if run_job(name, job) else RETRY_DELAY
+                due[name] = time.monotonic() + delay
+        time.sleep(max(0.0, min(min(due.values()) - time.monotonic(), TICK)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    run()
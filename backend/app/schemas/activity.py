@@ -1,8 +1,8 @@
 # backend/app/schemas/activity.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from app.models.enums import ActivityType
 
 class ActivityBase(BaseModel):
@@ -23,4 +23,11 @@ class Activity(ActivityBase):
     updated_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ActivityBulkCreate(BaseModel):
+    activities: List[ActivityCreate] = Field(..., min_length=1, max_length=1000)
+
+class ActivityBulkResult(BaseModel):
+    created: int
+    ids: List[int]
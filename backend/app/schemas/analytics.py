@@ -1,6 +1,7 @@
 # backend/app/schemas/analytics.py
 
 from pydantic import BaseModel
+from datetime import date
 from typing import List, Dict, Any, Optional, Union, Literal
 from .deal import Deal
 from .user import User
@@ -9,13 +10,36 @@ class MonthlySale(BaseModel):
     name: str 
     total: float
 
+class MetricComparison(BaseModel):
+    # Month to date. Earlier months cover the same days (1st to today's day
+    # of the month, all of a shorter month), so the values are comparable
+    # throughout the month; they are not those months' full totals.
+    current: float
+    # The month compared against, and the difference from it
+    previous: Optional[float] = None
+    change: Optional[float] = None
+    change_percent: Optional[float] = None
+    previous_month: Optional[float] = None
+    last_year: Optional[float] = None
+
+class KpiComparison(BaseModel):
+    compare: Literal["mom", "yoy"]
+    period: str  # The JST month to date
+    previous_period: str  # Over the same days of the month, see MetricComparison
+    # Metric name (revenue, deals_won, deals_lost, new_deals, win_rate,
+    # average_deal_size) -> values
+    metrics: Dict[str, MetricComparison]
+
 class OverallKPIs(BaseModel):
     total_deals: int
     total_value: float
     win_rate: float
     average_deal_size: float
     average_time_to_close: float
+    median_time_to_close: float = 0
+    p90_time_to_close: float = 0
     arpu: float
+    comparison: Optional[KpiComparison] = None
 
     class Config:
         from_attributes = True
@@ -48,6 +72,7 @@ class DetailedKPIs(BaseModel):
     average_customer_unit_price: float
     monthly_sales_data: List[MonthlySale]
     total_annual_sales: float
+    comparison: Optional[KpiComparison] = None
 
 class MonthlyMetric(BaseModel):
     label: str
@@ -92,6 +117,8 @@ class UserPerformanceMetrics(BaseModel):
     user_id: int
     user_name: str
     average_days_to_win: float
+    median_days_to_win: float
+    p90_days_to_win: float
     total_revenue: float
     deals_won: int
     win_rate: float
@@ -187,4 +214,152 @@ class MonthlyReportData(BaseModel):
     top_performer: Optional[LeaderboardEntry] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+class ActivityTypeCount(BaseModel):
+    type: str
+    count: int
+
+class ActivityUserCount(BaseModel):
+    user_id: int
+    user_name: str
+    count: int
+
+class ActivityWeek(BaseModel):
+    week_start: date
+    total: int
+    # Activity type label -> count
+    by_type: Dict[str, int]
+
+class ActivityVolume(BaseModel):
+    start: date
+    end: date
+    total: int
+    by_type: List[ActivityTypeCount]
+    by_user: List[ActivityUserCount]
+    by_week: List[ActivityWeek]
+
+class ActivityHeatmapCell(BaseModel):
+    weekday: int  # 1 = Monday ... 7 = Sunday
+    hour: int
+    count: int
+
+class ActivityHeatmap(BaseModel):
+    start: date
+    end: date
+    max_count: int
+    cells: List[ActivityHeatmapCell]
+
+class ActivityCountBucket(BaseModel):
+    label: str
+    min_activities: int
+    max_activities: Optional[int] = None
+    deals: int
+    won: int
+    win_rate: float
+
+class ActivityTypeWinComparison(BaseModel):
+    type: str
+    avg_won: Optional[float] = None
+    avg_lost: Optional[float] = None
+    correlation: Optional[float] = None
+
+class ActivityWinCorrelation(BaseModel):
+    start: date
+    end: date
+    deals: int
+    correlation: Optional[float] = None
+    buckets: List[ActivityCountBucket]
+    by_type: List[ActivityTypeWinComparison]
+
+class KpiSnapshotPoint(BaseModel):
+    day: date
+    open_deals: int
+    open_pipeline_value: float
+    deals_created: int
+    deals_won: int
+    deals_lost: int
+    won_value: float
+    # Over the window_days days ending with `day`
+    win_rate: Optional[float] = None
+    average_deal_size: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+class KpiTrend(BaseModel):
+    start: date
+    end: date
+    user_id: Optional[int] = None  # None: company-wide
+    window_days: int
+    points: List[KpiSnapshotPoint]
+
+class DistributionBucket(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+class Distribution(BaseModel):
+    metric: str
+    start: date
+    end: date
+    # False when approximate was asked for but no sketches cover the range
+    approximate: bool
+    count: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    percentiles: Dict[str, float]  # e.g. "p50", "p95"
+    histogram: List[DistributionBucket]
+
+class PivotResult(BaseModel):
+    dimensions: List[str]
+    measures: List[str]
+    source: str
+    # One per combination: each dimension's value (plus user_name /
+    # agency_name) and each measure
+    rows: List[Dict[str, Any]]
+
+class OutcomeCubeNode(BaseModel):
+    # None: summed over every value
+    status: Optional[str] = None
+    industry: Optional[str] = None
+    reason: Optional[str] = None
+    count: int
+    total_value: float
+    win_rate: Optional[float] = None
+
+class OutcomeCube(BaseModel):
+    start: Optional[date] = None
+    end: Optional[date] = None
+    by: Optional[str] = None
+    node: Optional[OutcomeCubeNode] = None
+    children: List[OutcomeCubeNode]
+
+class LeadFunnelStats(BaseModel):
+    cohort: Optional[str] = None  # YYYY-MM; None for totals
+    leads: int
+    in_progress: int
+    won: int
+    lost: int
+    cancelled: int
+    close_rate: Optional[float] = None
+    win_rate: Optional[float] = None
+    lead_to_win_rate: Optional[float] = None
+    cancellation_rate: Optional[float] = None
+    average_days_to_deal: Optional[float] = None
+    average_days_to_close: Optional[float] = None
+    median_days_to_win: Optional[float] = None
+    won_value: float
+    revenue_per_lead: Optional[float] = None
+
+class LeadFunnelGroup(BaseModel):
+    key: Optional[str] = None  # lead source or product name
+    totals: LeadFunnelStats
+    cohorts: List[LeadFunnelStats]
+
+class LeadFunnel(BaseModel):
+    by: str
+    start: date
+    end: date
+    total: Optional[LeadFunnelStats] = None
+    groups: List[LeadFunnelGroup]
@@ -14,7 +14,28 @@ class Attachment(AttachmentBase):
     id: int
     user_id: int
     created_at: datetime
+    preview_status: Optional[str] = None
+    text_excerpt: Optional[str] = None
     uploader: Optional[UserSchema] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class UploadSessionCreate(BaseModel):
+    file_name: str
+    file_type: Optional[str] = None
+    size: int
+    related_to: str
+    related_id: int
+
+class UploadSession(BaseModel):
+    id: str
+    file_name: str
+    file_type: Optional[str] = None
+    size: int
+    received_bytes: int
+    chunk_size: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -8,6 +8,8 @@ from .user import UserInDBBase as UserSchema
 class AuditLogBase(BaseModel):
     action: str
     details: Optional[str] = None
+    related_to: Optional[str] = None
+    related_id: Optional[int] = None
 
 class AuditLogCreate(AuditLogBase):
     user_id: Optional[int] = None
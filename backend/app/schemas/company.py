@@ -14,6 +14,7 @@ class CompanyBase(BaseModel):
     company_kana: Optional[str] = None
     industry: Optional[str] = None
     other_details: Optional[Dict[str, Any]] = None
+    email_domain: Optional[str] = None
 
 class CompanyInDBBase(CompanyBase):
     id: int
@@ -30,6 +31,7 @@ class CompanyUpdate(BaseModel):
     company_kana: Optional[str] = None
     industry: Optional[str] = None
     other_details: Optional[Dict[str, Any]] = None
+    email_domain: Optional[str] = None
 
 # --- Main Schema with Relationships ---
 class Company(CompanyInDBBase):
@@ -6,6 +6,7 @@ from datetime import datetime
 from app.models.deal import DealStatus, DealType, ForecastAccuracy
 from .user import User, UserInDBBase as UserSchema
 from .company import Company, CompanyInDBBase as CompanySchema
+from .item_counts import ItemCounts
 
 # --- Base Schema ---
 class DealBase(BaseModel):
@@ -58,6 +59,8 @@ class Deal(DealBase):
     updated_at: datetime
     user: UserSchema
     company: CompanySchema
+    # Only filled in when requested with include_counts.
+    item_counts: Optional[ItemCounts] = None
     
     class Config:
         from_attributes = True
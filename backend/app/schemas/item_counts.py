@@ -0,0 +1,15 @@
+# backend/app/schemas/item_counts.py
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class ItemCounts(BaseModel):
+    related_id: int
+    note_count: int = 0
+    attachment_count: int = 0
+    latest_note_at: Optional[datetime] = None
+    latest_attachment_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,18 @@
+# backend/app/schemas/search.py
+
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+class SearchMatch(BaseModel):
+    source: Literal["note", "attachment"]
+    source_id: int
+    file_name: Optional[str] = None
+    # HTML-escaped, with the matched words wrapped in <mark></mark>.
+    snippet: str
+
+class SearchResult(BaseModel):
+    related_to: Literal["deal", "company"]
+    related_id: int
+    name: str
+    rank: float
+    matches: List[SearchMatch]
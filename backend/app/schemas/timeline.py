@@ -0,0 +1,22 @@
+# backend/app/schemas/timeline.py
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Literal, Optional
+
+class TimelineEvent(BaseModel):
+    type: Literal["activity", "note", "attachment", "audit"]
+    id: int
+    occurred_at: datetime
+    # The deal the event belongs to; None for events on the company itself.
+    deal_id: Optional[int] = None
+    user_id: Optional[int] = None
+    # Activity type, file name or audit action
+    summary: Optional[str] = None
+    # Activity notes, note content or audit details
+    detail: Optional[str] = None
+
+class TimelinePage(BaseModel):
+    events: List[TimelineEvent]
+    # Pass as `cursor` to get the next page; None on the last page.
+    next_cursor: Optional[str] = None
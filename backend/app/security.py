@@ -7,10 +7,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud
-from app.database import get_db
+from app.database import get_db, get_async_db
 
 SECRET_KEY = "your-very-secret-key" 
 ALGORITHM = "HS256"
@@ -28,22 +29,36 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str) -> TokenData:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
+            raise _credentials_exception()
+        return TokenData(email=email)
     except JWTError:
-        raise credentials_exception
-    
+        raise _credentials_exception()
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    token_data = _decode_token(token)
     user = crud.user.get_user_by_email(db, email=token_data.email)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    return user
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """
+    Same as get_current_user, but resolved on the event loop for async routers.
+    """
+    token_data = _decode_token(token)
+    user = await crud.user.get_user_by_email_async(db, email=token_data.email)
+    if user is None:
+        raise _credentials_exception()
     return user
\ No newline at end of file
@@ -159,4 +159,23 @@ def seed_database():
         db.close()
 
 if __name__ == "__main__":
-    seed_database()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Seed the database with realistic sample data.")
+    parser.add_argument("--bulk", action="store_true", help="Use the parallel COPY-based bulk seeder (app/seed_bulk.py)")
+    parser.add_argument("--deals", type=int, default=1_000_000, help="Deals to create in bulk mode")
+    parser.add_argument("--users", type=int, help="Users to create in bulk mode (default: scaled with --deals)")
+    parser.add_argument("--companies", type=int, help="Companies to create in bulk mode (default: scaled with --deals)")
+    parser.add_argument("--agencies", type=int, help="Agencies to create in bulk mode (default: scaled with --deals)")
+    parser.add_argument("--workers", type=int, help="Worker processes in bulk mode (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=42, help="Base random seed in bulk mode")
+    args = parser.parse_args()
+
+    if args.bulk:
+        from app.seed_bulk import bulk_seed
+        bulk_seed(
+            deals=args.deals, users=args.users, companies=args.companies,
+            agencies=args.agencies, workers=args.workers, seed=args.seed,
+        )
+    else:
+        seed_database()
\ No newline at end of file
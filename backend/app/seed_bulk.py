@@ -0,0 +1,255 @@
+# backend/app/seed_bulk.py
+
+"""
+High-throughput bulk seeder.
+
+Generates users, companies, agencies, deals and activities in parallel
+worker processes and streams each chunk into Postgres with COPY FROM STDIN,
+instead of going through the ORM with a commit per row like seed_all.py.
+
+Every chunk seeds its own Faker ja_JP instance and Random from the base seed
+and the chunk number, so the generated data does not depend on how many
+workers run. Distributions and reason pools are the ones seed_all.py uses.
+
+Usage (from backend/):
+
+    python -m app.seed_all --bulk --deals 10000000 --workers 8
+"""
+
+import io
+import multiprocessing
+import random
+import time
+from datetime import datetime, timedelta
+
+import psycopg2
+from faker import Faker
+
+from app.database import DATABASE_URL
+from app.models.enums import DealStatus, DealType, ForecastAccuracy, ActivityType
+from app.seed_all import (
+    INDUSTRIES, PRODUCTS, LEAD_SOURCES, WIN_REASONS, LOSS_REASONS, CANCEL_REASONS, NOTES_POOL,
+    ACTIVITIES_PER_DEAL_RANGE, DAYS_IN_PAST,
+)
+
+CHUNK_SIZE = 50_000
+
+# Same weights as seed_all.py, in enum declaration order.
+STATUS_WEIGHTS = [40, 35, 20, 5]
+TYPE_WEIGHTS = [70, 30]
+
+USER_COLUMNS = ("id", "name", "name_kana", "email", "password_hash")
+COMPANY_COLUMNS = ("id", "company_name", "company_kana", "industry")
+AGENCY_COLUMNS = ("id", "agency_name", "contact_person", "contact_email")
+DEAL_COLUMNS = (
+    "id", "title", "value", "status", "type", "forecast_accuracy", "lead_source", "product_name",
+    "user_id", "company_id", "agency_id", "lead_generated_at", "created_at", "closed_at",
+    "win_reason", "loss_reason", "cancellation_reason",
+)
+ACTIVITY_COLUMNS = ("deal_id", "type", "date", "notes")
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_line(values) -> str:
+    """One row in COPY text format: tab separated, \\N for NULL."""
+    return "\t".join(
+        "\\N" if v is None else (v.isoformat() if isinstance(v, datetime) else str(v).translate(_COPY_ESCAPES))
+        for v in values
+    ) + "\n"
+
+
+def _chunk_generators(seed: int, chunk: int):
+    rng = random.Random(seed * 1_000_003 + chunk)
+    fake = Faker("ja_JP")
+    fake.seed_instance(seed * 1_000_003 + chunk)
+    return rng, fake
+
+
+# --- Row generators: each writes one chunk of COPY lines into `out` ---
+
+def _write_users(out, rng, fake, first_id, count, password_hash):
+    for user_id in range(first_id, first_id + count):
+        out.write(_copy_line((
+            user_id, fake.name(), fake.kana_name(),
+            f"{fake.user_name()}.{user_id}@{fake.free_email_domain()}", password_hash,
+        )))
+    return count, 0
+
+
+def _write_companies(out, rng, fake, first_id, count):
+    for company_id in range(first_id, first_id + count):
+        # Faker's ja_JP company names repeat quickly; the ID keeps them unique.
+        out.write(_copy_line((
+            company_id, f"{fake.company()} {company_id}", fake.kana_name(), rng.choice(INDUSTRIES),
+        )))
+    return count, 0
+
+
+def _write_agencies(out, rng, fake, first_id, count):
+    for agency_id in range(first_id, first_id + count):
+        out.write(_copy_line((
+            agency_id, f"{fake.company()}代理店 {agency_id}", fake.name(),
+            f"agency.{agency_id}@{fake.free_email_domain()}",
+        )))
+    return count, 0
+
+
+def _write_deals(out, activities_out, rng, fake, first_id, count, id_ranges, today):
+    statuses, types, accuracies, activity_types = list(DealStatus), list(DealType), list(ForecastAccuracy), list(ActivityType)
+    users, companies, agencies = id_ranges["users"], id_ranges["companies"], id_ranges["agencies"]
+    activities = 0
+
+    for deal_id in range(first_id, first_id + count):
+        created_date = today - timedelta(days=rng.randint(0, DAYS_IN_PAST))
+        status = rng.choices(statuses, weights=STATUS_WEIGHTS, k=1)[0]
+        deal_type = rng.choices(types, weights=TYPE_WEIGHTS, k=1)[0]
+        closed_date, win_reason, loss_reason, cancellation_reason, agency_id = None, None, None, None, None
+        if status != DealStatus.in_progress:
+            closed_date = created_date + timedelta(days=rng.randint(15, 90))
+            if status == DealStatus.won: win_reason = rng.choice(WIN_REASONS)
+            elif status == DealStatus.lost: loss_reason = rng.choice(LOSS_REASONS)
+            elif status == DealStatus.cancelled: cancellation_reason = rng.choice(CANCEL_REASONS)
+        if deal_type == DealType.agency and agencies[1] >= agencies[0]:
+            agency_id = rng.randint(*agencies)
+
+        out.write(_copy_line((
+            deal_id, f"{created_date.strftime('%Y-%m')} {fake.bs()} Project",
+            rng.randrange(100000, 10000000, 50000),
+            status.name, deal_type.name, rng.choice(accuracies).name,
+            rng.choice(LEAD_SOURCES), rng.choice(PRODUCTS),
+            rng.randint(*users), rng.randint(*companies), agency_id,
+            created_date, created_date, closed_date,
+            win_reason, loss_reason, cancellation_reason,
+        )))
+
+        for _ in range(rng.randint(*ACTIVITIES_PER_DEAL_RANGE)):
+            activities_out.write(_copy_line((
+                deal_id, rng.choice(activity_types).name,
+                created_date + timedelta(days=rng.randint(1, 30)), rng.choice(NOTES_POOL),
+            )))
+            activities += 1
+
+    return count, activities
+
+
+def _copy(cursor, table, columns, buffer):
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def _load_chunk(task):
+    """
+    Worker entry point: generates one chunk and COPYs it in its own
+    transaction. Returns (table, rows, activity_rows).
+    """
+    table, chunk, first_id, count, options = task
+    rng, fake = _chunk_generators(options["seed"], chunk)
+    out, activities_out = io.StringIO(), io.StringIO()
+
+    if table == "users":
+        rows = _write_users(out, rng, fake, first_id, count, options["password_hash"])
+    elif table == "companies":
+        rows = _write_companies(out, rng, fake, first_id, count)
+    elif table == "agencies":
+        rows = _write_agencies(out, rng, fake, first_id, count)
+    else:
+        rows = _write_deals(out, activities_out, rng, fake, first_id, count, options["id_ranges"], options["today"])
+
+    conn = psycopg2.connect(options["database_url"])
+    try:
+        with conn, conn.cursor() as cursor:
+            columns = {"users": USER_COLUMNS, "companies": COMPANY_COLUMNS, "agencies": AGENCY_COLUMNS, "deals": DEAL_COLUMNS}[table]
+            _copy(cursor, table, columns, out)
+            if table == "deals":
+                _copy(cursor, "activities", ACTIVITY_COLUMNS, activities_out)
+    finally:
+        conn.close()
+    return (table,) + rows
+
+
+def _tasks(table, chunk_offset, first_id, total, options):
+    tasks = []
+    for n, start in enumerate(range(0, total, CHUNK_SIZE)):
+        tasks.append((table, chunk_offset + n, first_id + start, min(CHUNK_SIZE, total - start), options))
+    return tasks
+
+
+def _next_ids(cursor):
+    ids = {}
+    for table in ("users", "companies", "agencies", "deals"):
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+        ids[table] = cursor.fetchone()[0]
+    return ids
+
+
+def bulk_seed(
+    deals: int,
+    users: int = None,
+    companies: int = None,
+    agencies: int = None,
+    workers: int = None,
+    seed: int = 42,
+    database_url: str = DATABASE_URL,
+):
+    """
+    Appends `deals` deals (with 1-10 activities each) plus the users,
+    companies and agencies they reference. Dimension counts default to the
+    seed_all.py proportions, scaled with the number of deals.
+    """
+    users = users or max(10, deals // 250)
+    companies = companies or max(50, deals // 50)
+    agencies = agencies or max(5, deals // 500)
+    workers = workers or multiprocessing.cpu_count()
+
+    from app.crud.crud_user import pwd_context
+    started = time.perf_counter()
+
+    conn = psycopg2.connect(database_url)
+    with conn, conn.cursor() as cursor:
+        first_ids = _next_ids(cursor)
+    conn.close()
+
+    options = {
+        "seed": seed,
+        "database_url": database_url,
+        # bcrypt is deliberately slow; every seeded user shares one hash.
+        "password_hash": pwd_context.hash("password123"),
+        "today": datetime.now(),
+        "id_ranges": {
+            table: (first_ids[table], first_ids[table] + count - 1)
+            for table, count in (("users", users), ("companies", companies), ("agencies", agencies))
+        },
+    }
+
+    # Chunk numbers are global so every chunk gets its own seed.
+    dimension_tasks = (
+        _tasks("users", 0, first_ids["users"], users, options)
+        + _tasks("companies", 100_000, first_ids["companies"], companies, options)
+        + _tasks("agencies", 200_000, first_ids["agencies"], agencies, options)
+    )
+    deal_tasks = _tasks("deals", 300_000, first_ids["deals"], deals, options)
+
+    totals = {"users": 0, "companies": 0, "agencies": 0, "deals": 0, "activities": 0}
+    with multiprocessing.Pool(processes=workers) as pool:
+        # Deals reference the dimension rows, so those must be committed first.
+        for tasks in (dimension_tasks, deal_tasks):
+            for table, rows, activity_rows in pool.imap_unordered(_load_chunk, tasks):
+                totals[table] += rows
+                totals["activities"] += activity_rows
+                if table == "deals":
+                    print(f"   - {totals['deals']:,}/{deals:,} deals, {totals['activities']:,} activities "
+                          f"({time.perf_counter() - started:.0f}s)")
+
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        # Rows were loaded with explicit IDs; move the sequences past them.
+        for table in ("users", "companies", "agencies", "deals"):
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))")
+        cursor.execute("ANALYZE users, companies, agencies, deals, activities")
+    conn.close()
+
+    print(f"✅ Bulk seeding complete in {time.perf_counter() - started:.0f}s: " +
+          ", ".join(f"{count:,} {table}" for table, count in totals.items()))
+    return totals
@@ -0,0 +1,206 @@
+# backend/app/services/activity_analytics_service.py
+
+"""
+Activity analytics. Volume and heatmap read activity_daily_counts, the
+per-day rollup kept by app.activity_maintenance, so a dashboard costs the
+same whether it covers a week or several years. They only read: the
+scheduler refreshes the rollup every ACTIVITY_ROLLUP_INTERVAL seconds, so
+activities show up there within about a minute. The win correlation reads
+the raw activities of the closed deals in range, one index lookup per deal.
+
+Days are JST days; an activity is credited to the owner of its deal.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Integer, and_, case, func, literal, select
+from sqlalchemy.orm import Session
+
+from app.fiscal_calendar import jst_start, jst_today
+from app.models.activity import Activity
+from app.models.activity_rollup import ActivityDailyCount
+from app.models.deal import Deal
+from app.models.enums import ActivityType, DealStatus
+from app.models.user import User
+
+# (label, lowest count, highest count or None)
+ACTIVITY_BUCKETS = [("0", 0, 0), ("1-2", 1, 2), ("3-5", 3, 5), ("6-9", 6, 9), ("10+", 10, None)]
+
+
+def _range(start: Optional[date], end: Optional[date], default_days: int):
+    end = end or jst_today()
+    return start or end - timedelta(days=default_days - 1), end
+
+
+def _rollup_conditions(start: date, end: date, user_id: Optional[int] = None, activity_type: Optional[ActivityType] = None):
+    conditions = [ActivityDailyCount.day >= start, ActivityDailyCount.day <= end]
+    if user_id is not None:
+        conditions.append(ActivityDailyCount.user_id == user_id)
+    if activity_type is not None:
+        conditions.append(ActivityDailyCount.type == activity_type)
+    return conditions
+
+
+def get_activity_volume(db: Session, start: Optional[date] = None, end: Optional[date] = None, user_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Activity counts by type, by user and by week (weeks start on Monday)
+    between `start` and `end` inclusive; the last 12 weeks by default.
+    """
+    start, end = _range(start, end, 12 * 7)
+
+    week = func.date_trunc("week", ActivityDailyCount.day).cast(ActivityDailyCount.day.type)
+    rows = db.execute(
+        select(week.label("week"), ActivityDailyCount.user_id, ActivityDailyCount.type,
+               func.sum(ActivityDailyCount.activity_count).label("count"))
+        .where(*_rollup_conditions(start, end, user_id))
+        .group_by("week", ActivityDailyCount.user_id, ActivityDailyCount.type)
+    ).all()
+
+    by_week = defaultdict(lambda: defaultdict(int))
+    by_type = defaultdict(int)
+    by_user = defaultdict(int)
+    for row in rows:
+        by_week[row.week][row.type.value] += row.count
+        by_type[row.type.value] += row.count
+        by_user[row.user_id] += row.count
+
+    names = dict(db.execute(select(User.id, User.name).where(User.id.in_(list(by_user)))).all()) if by_user else {}
+
+    return {
+        "start": start,
+        "end": end,
+        "total": sum(by_type.values()),
+        "by_type": [{"type": t.value, "count": by_type.get(t.value, 0)} for t in ActivityType],
+        "by_user": sorted(
+            ({"user_id": uid, "user_name": names.get(uid, "Unknown"), "count": count} for uid, count in by_user.items()),
+            key=lambda entry: -entry["count"],
+        ),
+        "by_week": [
+            {"week_start": week_start, "total": sum(counts.values()), "by_type": dict(counts)}
+            for week_start, counts in sorted(by_week.items())
+        ],
+    }
+
+
+def get_activity_heatmap(
+    db: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    activity_type: Optional[ActivityType] = None,
+) -> Dict[str, Any]:
+    """
+    Activity counts per weekday (1 = Monday ... 7 = Sunday) and JST hour,
+    all 168 cells, between `start` and `end`; the last 90 days by default.
+    """
+    start, end = _range(start, end, 90)
+
+    weekday = func.extract("isodow", ActivityDailyCount.day).cast(Integer)
+    counts = {
+        (row.weekday, row.hour): row.count
+        for row in db.execute(
+            select(weekday.label("weekday"), ActivityDailyCount.hour,
+                   func.sum(ActivityDailyCount.activity_count).label("count"))
+            .where(*_rollup_conditions(start, end, user_id, activity_type))
+            .group_by("weekday", ActivityDailyCount.hour)
+        )
+    }
+
+    cells = [
+        {"weekday": weekday, "hour": hour, "count": counts.get((weekday, hour), 0)}
+        for weekday in range(1, 8) for hour in range(24)
+    ]
+    return {"start": start, "end": end, "max_count": max(counts.values(), default=0), "cells": cells}
+
+
+def get_activity_win_correlation(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, Any]:
+    """
+    How the number of activities logged on a deal before it closed relates
+    to winning it, for deals closed won or lost between `start` and `end`
+    (the last 365 days by default): win rates per activity-count bucket,
+    average activities per type for won and lost deals, and the
+    point-biserial correlation between activity count and winning.
+    """
+    start, end = _range(start, end, 365)
+
+    type_counts = [
+        func.count().filter(Activity.type == activity_type).label(activity_type.name)
+        for activity_type in ActivityType
+    ]
+    activity_counts = (
+        select(func.count().label("total"), *type_counts)
+        .where(Activity.deal_id == Deal.id, Activity.date <= Deal.closed_at)
+        .lateral("activity_counts")
+    )
+    per_deal = (
+        select(
+            case((Deal.status == DealStatus.won, 1), else_=0).label("won"),
+            activity_counts.c.total,
+            *(activity_counts.c[t.name] for t in ActivityType),
+        )
+        .join(activity_counts, literal(True))
+        .where(
+            Deal.status.in_([DealStatus.won, DealStatus.lost]),
+            Deal.closed_at >= jst_start(start),
+            Deal.closed_at < jst_start(end + timedelta(days=1)),
+        )
+        .cte("per_deal")
+    )
+
+    bucket = case(
+        *((and_(per_deal.c.total >= low, per_deal.c.total <= high), label) for label, low, high in ACTIVITY_BUCKETS if high is not None),
+        else_=ACTIVITY_BUCKETS[-1][0],
+    )
+    bucket_rows = {
+        row.bucket: row
+        for row in db.execute(
+            select(bucket.label("bucket"), func.count().label("deals"), func.sum(per_deal.c.won).label("won"))
+            .group_by("bucket")
+        )
+    }
+
+    summary = db.execute(
+        select(
+            func.count().label("deals"),
+            func.corr(per_deal.c.total, per_deal.c.won).label("correlation"),
+            *(func.avg(per_deal.c[t.name]).filter(per_deal.c.won == 1).label(f"won_{t.name}") for t in ActivityType),
+            *(func.avg(per_deal.c[t.name]).filter(per_deal.c.won == 0).label(f"lost_{t.name}") for t in ActivityType),
+            *(func.corr(per_deal.c[t.name], per_deal.c.won).label(f"corr_{t.name}") for t in ActivityType),
+        )
+    ).one()._mapping
+
+    def rounded(value, digits=2):
+        return round(float(value), digits) if value is not None else None
+
+    buckets = []
+    for label, low, high in ACTIVITY_BUCKETS:
+        row = bucket_rows.get(label)
+        deals, won = (row.deals, int(row.won)) if row else (0, 0)
+        buckets.append({
+            "label": label,
+            "min_activities": low,
+            "max_activities": high,
+            "deals": deals,
+            "won": won,
+            "win_rate": round(won / deals * 100, 2) if deals else 0,
+        })
+
+    return {
+        "start": start,
+        "end": end,
+        "deals": summary["deals"],
+        # None when every deal has the same count or the same outcome.
+        "correlation": rounded(summary["correlation"], 3),
+        "buckets": buckets,
+        "by_type": [
+            {
+                "type": t.value,
+                "avg_won": rounded(summary[f"won_{t.name}"]),
+                "avg_lost": rounded(summary[f"lost_{t.name}"]),
+                "correlation": rounded(summary[f"corr_{t.name}"], 3),
+            }
+            for t in ActivityType
+        ],
+    }
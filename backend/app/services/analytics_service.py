@@ -1,23 +1,142 @@
 # backend/app/services/analytics_service.py
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func, case, extract, or_
-from typing import List, Dict, Any
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, case, or_
+from typing import List, Dict, Any, Optional
 from app.models.deal import Deal
 from app.models.company import Company
 from app.models.user import User
 from app.models.activity import Activity
-from app.models.agency import Agency
 from app.models.enums import DealStatus, DealType, ForecastAccuracy
-from datetime import datetime, timedelta
+from app.models.calendar_day import CalendarDay
+from app.fiscal_calendar import Period, add_months, join_calendar, jst_start, jst_today, period_label
+from app.services.outcome_cube_service import NO_REASON, cube_nodes, outcome_cube
+from app.services.pivot_service import PivotDimension, PivotMeasure, pivot_rows
+from datetime import date, datetime, timedelta, timezone
 from collections import defaultdict
 from functools import reduce
+import enum
 import operator
 
-def get_dashboard_data(db: Session) -> Dict[str, Any]:
+SECONDS_PER_DAY = 60 * 60 * 24
+
+class Comparison(str, enum.Enum):
+    mom = "mom"
+    yoy = "yoy"
+
+def _change(current: float, previous: Optional[float]) -> Dict[str, Any]:
+    change = current - previous if previous is not None else None
+    return {
+        "current": current,
+        "previous": previous,
+        "change": round(change, 2) if change is not None else None,
+        "change_percent": round(change / previous * 100, 2) if change is not None and previous else None,
+    }
+
+def _month_kpis(revenue, won, lost, new_deals) -> Dict[str, float]:
+    revenue, won, lost = float(revenue), int(won), int(lost)
+    return {
+        "revenue": revenue,
+        "deals_won": won,
+        "deals_lost": lost,
+        "new_deals": int(new_deals),
+        "win_rate": round(won / (won + lost) * 100, 2) if won + lost else 0,
+        "average_deal_size": round(revenue / won, 2) if won else 0,
+    }
+
+def get_kpi_comparison(db: Session, compare: Comparison, as_of: Optional[date] = None) -> Dict[str, Any]:
+    """
+    The KPIs of the JST month to date, with the previous month's and the
+    same month last year's over the same days: the 1st to `as_of`'s day of
+    the month (all of a shorter month), so a month in progress isn't
+    measured against complete ones. One query aggregates the last 13
+    months and LAG picks both earlier months out of them; `compare`
+    decides which one the changes are measured against.
+    """
+    as_of = as_of or jst_today()
+    month = as_of.replace(day=1)
+    first_month = add_months(month, -12)
+    since, until = jst_start(first_month), jst_start(as_of + timedelta(days=1))
+    to_date = func.extract('day', CalendarDay.day) <= as_of.day
+
+    # Every month, including ones without deals, so LAG's offsets are months.
+    months = (
+        db.query(CalendarDay.month)
+        .filter(CalendarDay.day >= first_month, CalendarDay.day <= as_of)
+        .distinct()
+        .subquery()
+    )
+    closed = join_calendar(
+        db.query(
+            CalendarDay.month,
+            func.coalesce(func.sum(case((Deal.status == DealStatus.won, Deal.value))), 0).label('revenue'),
+            func.count(case((Deal.status == DealStatus.won, Deal.id))).label('deals_won'),
+            func.count(case((Deal.status == DealStatus.lost, Deal.id))).label('deals_lost'),
+        ).select_from(Deal).filter(Deal.status.in_([DealStatus.won, DealStatus.lost])),
+        Deal.closed_at, since=since, until=until,
+    ).filter(to_date).group_by(CalendarDay.month).subquery()
+    created = join_calendar(
+        db.query(CalendarDay.month, func.count(Deal.id).label('new_deals')).select_from(Deal),
+        Deal.created_at, since=since, until=until,
+    ).filter(to_date).group_by(CalendarDay.month).subquery()
+
+    values = [
+        func.coalesce(closed.c.revenue, 0),
+        func.coalesce(closed.c.deals_won, 0),
+        func.coalesce(closed.c.deals_lost, 0),
+        func.coalesce(created.c.new_deals, 0),
+    ]
+    in_order = dict(order_by=months.c.month)
+    series = (
+        db.query(
+            months.c.month,
+            *values,
+            *(func.lag(value, 1).over(**in_order) for value in values),
+            *(func.lag(value, 12).over(**in_order) for value in values),
+        )
+        .outerjoin(closed, closed.c.month == months.c.month)
+        .outerjoin(created, created.c.month == months.c.month)
+        .subquery()
+    )
+    row = db.query(series).order_by(series.c.month.desc()).first()
+
+    current = _month_kpis(*row[1:5])
+    previous_month = _month_kpis(*row[5:9]) if row[5] is not None else {}
+    last_year = _month_kpis(*row[9:13]) if row[9] is not None else {}
+    baseline, previous_period = (
+        (previous_month, add_months(month, -1)) if compare == Comparison.mom else (last_year, first_month)
+    )
+    return {
+        "compare": compare.value,
+        "period": month.strftime("%Y-%m"),
+        "previous_period": previous_period.strftime("%Y-%m"),
+        "metrics": {
+            name: {
+                **_change(value, baseline.get(name)),
+                "previous_month": previous_month.get(name),
+                "last_year": last_year.get(name),
+            }
+            for name, value in current.items()
+        },
+    }
+
+def _days_to_win(db: Session, *conditions):
+    """
+    Average, median and P90 days from creation to close of the won deals
+    matching `conditions`, read from the stored seconds_to_close.
+    """
+    seconds = db.query(
+        func.avg(Deal.seconds_to_close),
+        func.percentile_cont(0.5).within_group(Deal.seconds_to_close),
+        func.percentile_cont(0.9).within_group(Deal.seconds_to_close),
+    ).filter(Deal.status == DealStatus.won, Deal.seconds_to_close.isnot(None), *conditions).one()
+    return [round(float(value) / SECONDS_PER_DAY, 1) if value else 0 for value in seconds]
+
+def get_dashboard_data(db: Session, compare: Optional[Comparison] = None) -> Dict[str, Any]:
     """
     Calculates and retrieves all necessary data for the main dashboard,
-    using the correct nested structure that the schema expects.
+    using the correct nested structure that the schema expects. With
+    `compare`, the KPIs include this month's against an earlier one.
     """
     
     # --- KPI Calculations ---
@@ -36,11 +155,7 @@ def get_dashboard_data(db: Session) -> Dict[str, Any]:
     win_rate = (won_deals_count / total_closed_deals) * 100 if total_closed_deals > 0 else 0
     average_deal_size = total_value / won_deals_count if won_deals_count > 0 else 0
 
-    time_diff_seconds = func.extract('epoch', func.age(Deal.closed_at, Deal.created_at))
-    avg_seconds_to_win = db.query(func.avg(time_diff_seconds)).filter(
-        Deal.status == DealStatus.won, Deal.closed_at.isnot(None)
-    ).scalar()
-    average_time_to_close = avg_seconds_to_win / (60 * 60 * 24) if avg_seconds_to_win else 0
+    average_time_to_close, median_time_to_close, p90_time_to_close = _days_to_win(db)
 
     unique_winning_companies = won_deals_query.distinct(Deal.company_id).count()
     arpu = total_value / unique_winning_companies if unique_winning_companies > 0 else 0
@@ -50,20 +165,24 @@ def get_dashboard_data(db: Session) -> Dict[str, Any]:
         "total_value": round(float(total_value), 2),
         "win_rate": round(win_rate, 2),
         "average_deal_size": round(float(average_deal_size), 2),
-        "average_time_to_close": round(average_time_to_close, 1),
-        "arpu": round(float(arpu), 2)
+        "average_time_to_close": average_time_to_close,
+        "median_time_to_close": median_time_to_close,
+        "p90_time_to_close": p90_time_to_close,
+        "arpu": round(float(arpu), 2),
+        "comparison": get_kpi_comparison(db, compare) if compare else None,
     }
 
     # --- Chart Data ---
-    twelve_months_ago = datetime.utcnow() - timedelta(days=365)
+    twelve_months_ago = datetime.now(timezone.utc) - timedelta(days=365)
     
-    monthly_sales = db.query(
-        func.date_trunc('month', Deal.closed_at).label('month'),
-        func.sum(Deal.value).label('total')
-    ).filter(Deal.status == DealStatus.won, Deal.closed_at >= twelve_months_ago).group_by('month').order_by('month').all()
+    monthly_sales = join_calendar(
+        db.query(period_label(Period.month), func.sum(Deal.value).label('total'))
+        .select_from(Deal).filter(Deal.status == DealStatus.won),
+        Deal.closed_at, since=twelve_months_ago,
+    ).group_by('period').order_by('period').all()
 
     monthly_sales_chart_data = [
-        {"name": sale.month.strftime("%Y-%m"), "total": float(sale.total)}
+        {"name": sale.period, "total": float(sale.total)}
         for sale in monthly_sales
     ]
 
@@ -73,8 +192,22 @@ def get_dashboard_data(db: Session) -> Dict[str, Any]:
     ]
 
     # --- Recent Data ---
-    recent_deals = db.query(Deal).order_by(Deal.created_at.desc()).limit(5).all()
-    recent_users = db.query(User).order_by(User.created_at.desc()).limit(5).all()
+    # Eager-load everything the Deal/User response schemas nest, otherwise
+    # serialisation lazy-loads it one row at a time.
+    recent_deals = (
+        db.query(Deal)
+        .options(joinedload(Deal.user), joinedload(Deal.company))
+        .order_by(Deal.created_at.desc())
+        .limit(5)
+        .all()
+    )
+    recent_users = (
+        db.query(User)
+        .options(selectinload(User.deals).joinedload(Deal.company))
+        .order_by(User.created_at.desc())
+        .limit(5)
+        .all()
+    )
 
     return {
         "kpis": kpis,
@@ -88,36 +221,33 @@ def get_deal_outcomes_analysis(db: Session) -> Dict[str, Any]:
     """
     Performs a detailed analysis of deal outcomes, grouping by reason and industry.
     """
-    # Analysis for Win/Loss reasons
-    win_reasons = db.query(Deal.win_reason, func.count(Deal.id).label('count')).filter(Deal.status == DealStatus.won, Deal.win_reason.isnot(None)).group_by(Deal.win_reason).order_by(func.count(Deal.id).desc()).all()
-    loss_reasons = db.query(Deal.loss_reason, func.count(Deal.id).label('count')).filter(Deal.status == DealStatus.lost, Deal.loss_reason.isnot(None)).group_by(Deal.loss_reason).order_by(func.count(Deal.id).desc()).all()
+    cube = outcome_cube(db)
 
-    # Analysis by Industry
-    industry_stats = db.query(
-        Company.industry,
-        func.count(Deal.id).label('total_deals'),
-        func.sum(case((Deal.status == DealStatus.won, 1), else_=0)).label('won_deals')
-    ).join(Company, Deal.company_id == Company.id).group_by(Company.industry).all()
+    def reasons(status: DealStatus):
+        nodes = sorted(cube_nodes(cube, status=status.value, reason=None), key=lambda node: -node["count"])
+        return [{"reason": node["reason"], "count": node["count"]} for node in nodes if node["reason"] != NO_REASON]
 
+    won_by_industry = {node["industry"]: node["count"] for node in cube_nodes(cube, status=DealStatus.won.value, industry=None)}
     industry_performance = [
         {
-            "industry": stat.industry or "Unknown",
-            "total_deals": stat.total_deals,
-            "won_deals": stat.won_deals,
-            "win_rate": round((stat.won_deals / stat.total_deals) * 100, 2) if stat.total_deals > 0 else 0
+            "industry": node["industry"],
+            "total_deals": node["count"],
+            "won_deals": won_by_industry.get(node["industry"], 0),
+            "win_rate": round((won_by_industry.get(node["industry"], 0) / node["count"]) * 100, 2) if node["count"] > 0 else 0
         }
-        for stat in industry_stats
+        for node in cube_nodes(cube, industry=None)
     ]
 
     return {
-        "win_reasons": [{"reason": r.win_reason, "count": r.count} for r in win_reasons],
-        "loss_reasons": [{"reason": r.loss_reason, "count": r.count} for r in loss_reasons],
+        "win_reasons": reasons(DealStatus.won),
+        "loss_reasons": reasons(DealStatus.lost),
         "industry_performance": sorted(industry_performance, key=lambda x: x['total_deals'], reverse=True)
     }
 
-def get_simple_kpis(db: Session) -> Dict[str, Any]:
+def get_simple_kpis(db: Session, compare: Optional[Comparison] = None) -> Dict[str, Any]:
     """
-    Calculates simple, overall KPIs for the main dashboard cards.
+    Calculates simple, overall KPIs for the main dashboard cards, and with
+    `compare` this month's against an earlier one.
     This function is safe from division-by-zero errors.
     """
     total_deals = db.query(Deal).count()
@@ -131,17 +261,29 @@ def get_simple_kpis(db: Session) -> Dict[str, Any]:
 
     win_rate = (won_deals / total_closed_deals) * 100 if total_closed_deals > 0 else 0
     average_deal_size = total_value / total_deals if total_deals > 0 else 0
+    average_time_to_close, median_time_to_close, p90_time_to_close = _days_to_win(db)
+
+    winning_companies = db.query(func.count(func.distinct(Deal.company_id))).filter(Deal.status == DealStatus.won).scalar()
+    won_value = db.query(func.sum(Deal.value)).filter(Deal.status == DealStatus.won).scalar() or 0
+    arpu = won_value / winning_companies if winning_companies else 0
 
     return {
         "total_deals": total_deals,
         "total_value": total_value,
         "win_rate": round(win_rate, 2),
-        "average_deal_size": round(average_deal_size, 2)
+        "average_deal_size": round(average_deal_size, 2),
+        "average_time_to_close": average_time_to_close,
+        "median_time_to_close": median_time_to_close,
+        "p90_time_to_close": p90_time_to_close,
+        "arpu": round(float(arpu), 2),
+        "comparison": get_kpi_comparison(db, compare) if compare else None,
     }
 
-def get_detailed_dashboard_kpis(db: Session) -> Dict[str, Any]:
+def get_detailed_dashboard_kpis(db: Session, period: Period = Period.month, compare: Optional[Comparison] = None) -> Dict[str, Any]:
     """
-    Calculates a more detailed set of KPIs for an advanced analytics view.
+    Calculates a more detailed set of KPIs for an advanced analytics view,
+    with sales per JST month or fiscal period, and with `compare` this
+    month's KPIs against an earlier one.
     """
     closed_statuses = [DealStatus.won, DealStatus.lost]
     closed_deals_query = db.query(Deal).filter(Deal.status.in_(closed_statuses))
@@ -157,30 +299,32 @@ def get_detailed_dashboard_kpis(db: Session) -> Dict[str, Any]:
 
     avg_customer_price = db.query(func.avg(Deal.value)).filter(Deal.status == DealStatus.won).scalar() or 0
 
-    monthly_sales = db.query(
-        extract('year', Deal.closed_at).label('year'),
-        extract('month', Deal.closed_at).label('month'),
-        func.sum(Deal.value).label('total_sales')
-    ).filter(Deal.status == DealStatus.won, Deal.closed_at.isnot(None)).group_by('year', 'month').order_by('year', 'month').all()
+    monthly_sales = join_calendar(
+        db.query(period_label(period), func.sum(Deal.value).label('total_sales'))
+        .select_from(Deal).filter(Deal.status == DealStatus.won),
+        Deal.closed_at,
+    ).group_by('period').order_by('period').all()
 
     formatted_monthly_sales = [
-        {"label": f"{sale.year}-{str(sale.month).zfill(2)}", "sales": float(sale.total_sales)}
+        {"name": sale.period, "total": float(sale.total_sales)}
         for sale in monthly_sales
     ]
-    total_annual_sales = sum(item['sales'] for item in formatted_monthly_sales)
+    total_annual_sales = sum(item['total'] for item in formatted_monthly_sales)
 
     kpis = {
         "direct_sales": { "conclusion_rate": round(direct_conclusion_rate, 2), "won_count": won_direct_deals },
         "agency_sales": { "conclusion_rate": round(agency_conclusion_rate, 2), "won_count": won_agency_deals },
         "average_customer_unit_price": round(float(avg_customer_price), 2),
         "monthly_sales_data": formatted_monthly_sales,
-        "total_annual_sales": round(total_annual_sales, 2)
+        "total_annual_sales": round(total_annual_sales, 2),
+        "comparison": get_kpi_comparison(db, compare) if compare else None,
     }
     return kpis
 
-def get_detailed_user_performance(db: Session, user_id: int) -> Dict[str, Any]:
+def get_detailed_user_performance(db: Session, user_id: int, period: Period = Period.month) -> Dict[str, Any]:
     """
-    Calculates a comprehensive set of performance metrics for a single user.
+    Calculates a comprehensive set of performance metrics for a single user,
+    with results per JST month or fiscal period.
     """
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -200,32 +344,27 @@ def get_detailed_user_performance(db: Session, user_id: int) -> Dict[str, Any]:
     total_revenue = sum(d.value for d in won_deals)
     win_rate = (deals_won_count / total_closed) * 100 if total_closed > 0 else 0
 
-    # Average days to win
-    time_diff_seconds = func.extract('epoch', func.age(Deal.closed_at, Deal.created_at))
-    avg_seconds = db.query(func.avg(time_diff_seconds)).filter(
-        Deal.user_id == user_id, Deal.status == DealStatus.won
-    ).scalar()
-    average_days_to_win = avg_seconds / (60 * 60 * 24) if avg_seconds else 0
+    # Days to win
+    average_days_to_win, median_days_to_win, p90_days_to_win = _days_to_win(db, Deal.user_id == user_id)
 
     # --- Monthly Performance ---
-    monthly_stats = defaultdict(lambda: {'won': 0, 'lost': 0})
-    for deal in won_deals:
-        if deal.closed_at:
-            month_key = deal.closed_at.strftime('%Y-%m')
-            monthly_stats[month_key]['won'] += 1
-    for deal in lost_deals:
-        if deal.closed_at:
-            month_key = deal.closed_at.strftime('%Y-%m')
-            monthly_stats[month_key]['lost'] += 1
+    monthly_stats = join_calendar(
+        db.query(
+            period_label(period),
+            func.count(case((Deal.status == DealStatus.won, Deal.id))).label('won'),
+            func.count(case((Deal.status == DealStatus.lost, Deal.id))).label('lost'),
+        ).select_from(Deal).filter(Deal.user_id == user_id, Deal.status.in_([DealStatus.won, DealStatus.lost])),
+        Deal.closed_at,
+    ).group_by('period').order_by('period').all()
 
     monthly_performance = []
-    for month, stats in sorted(monthly_stats.items()):
-        total = stats['won'] + stats['lost']
+    for stats in monthly_stats:
+        total = stats.won + stats.lost
         monthly_performance.append({
-            "month": month,
-            "deals_won": stats['won'],
-            "deals_lost": stats['lost'],
-            "win_rate": (stats['won'] / total) * 100 if total > 0 else 0
+            "month": stats.period,
+            "deals_won": stats.won,
+            "deals_lost": stats.lost,
+            "win_rate": (stats.won / total) * 100 if total > 0 else 0
         })
 
     # --- Reason Analysis ---
@@ -238,12 +377,12 @@ def get_detailed_user_performance(db: Session, user_id: int) -> Dict[str, Any]:
     ).group_by(Deal.loss_reason).order_by(func.count(Deal.id).desc()).all()
 
     # --- Activity Summary ---
-    total_activities = db.query(func.count(Activity.id)).join(Deal).filter(Deal.user_id == user_id).scalar() or 0
     total_deals_with_activity = user_deals.count()
     
     activity_counts_by_type = db.query(Activity.type, func.count(Activity.id)).join(Deal).filter(
         Deal.user_id == user_id
     ).group_by(Activity.type).all()
+    total_activities = sum(count for _, count in activity_counts_by_type)
     
     activity_summary = {
         "total_activities": total_activities,
@@ -254,7 +393,9 @@ def get_detailed_user_performance(db: Session, user_id: int) -> Dict[str, Any]:
     return {
         "user_id": user.id,
         "user_name": user.name,
-        "average_days_to_win": round(average_days_to_win, 1),
+        "average_days_to_win": average_days_to_win,
+        "median_days_to_win": median_days_to_win,
+        "p90_days_to_win": p90_days_to_win,
         "total_revenue": float(total_revenue),
         "deals_won": deals_won_count,
         "win_rate": round(win_rate, 2),
@@ -268,117 +409,53 @@ def get_agency_performance(db: Session) -> List[Dict[str, Any]]:
     """
     Calculates sales performance metrics for each agency.
     """
-    # This query needs a more complex join through deals and companies.
-    # First, let's find which deals are associated with which agencies.
-    # Assuming a deal is linked to an agency through its company,
-    # and we need a link from company to agency.
-    # The current model doesn't directly link a Deal to an Agency.
-    # Let's assume for now that a Deal's 'type' being 'agency' is the link.
-    # And that we need to associate it with a specific agency.
-    #
-    # Looking at the Deal model, there is no direct agency_id.
-    # This is a gap in the data model to fulfill the requirement.
-    #
-    # To solve this, let's add an optional `agency_id` to the `deals` table.
-    # For now, I will write the query AS IF this field existed,
-    # and then we will add it to the model.
-
-    agency_performance_data = (
-        db.query(
-            Agency.id.label("agency_id"),
-            Agency.agency_name.label("agency_name"),
-            func.count(Deal.id).label("deals_won"),
-            func.sum(Deal.value).label("total_revenue")
-        )
-        .join(Deal, Agency.id == Deal.agency_id) # This requires agency_id on Deal
-        .filter(Deal.status == DealStatus.won)
-        .group_by(Agency.id, Agency.agency_name)
-        .order_by(func.sum(Deal.value).desc())
-        .all()
-    )
-    
+    rows = pivot_rows(db, [PivotDimension.agency], [PivotMeasure.count, PivotMeasure.total_value],
+                      statuses=[DealStatus.won], sort=PivotMeasure.total_value)
     return [
         {
-            "agency_id": row.agency_id,
-            "agency_name": row.agency_name,
-            "deals_won": row.deals_won,
-            "total_revenue": float(row.total_revenue or 0)
+            "agency_id": row["agency"],
+            "agency_name": row["agency_name"],
+            "deals_won": row["count"],
+            "total_revenue": row["total_value"]
         }
-        for row in agency_performance_data
+        for row in rows
+        if row["agency"] is not None  # won deals sold directly
     ]
 
 def get_channel_performance_analytics(db: Session) -> Dict[str, Any]:
     """
     Calculates and compares performance metrics for 'direct' vs 'agency' sales channels.
     """
-    
-    def calculate_metrics_for_channel(channel_type: DealType):
-        deals = db.query(Deal).filter(Deal.type == channel_type).all()
-        
-        total_deals = len(deals)
-        won_deals = [d for d in deals if d.status == DealStatus.won]
-        deals_won_count = len(won_deals)
-        
-        closed_deals_count = db.query(Deal).filter(
-            Deal.type == channel_type,
-            Deal.status.in_([DealStatus.won, DealStatus.lost])
-        ).count()
+    rows = pivot_rows(db, [PivotDimension.type],
+                      [PivotMeasure.count, PivotMeasure.won_count, PivotMeasure.won_value, PivotMeasure.win_rate])
+    by_type = {row["type"]: row for row in rows}
 
-        win_rate = (deals_won_count / closed_deals_count) * 100 if closed_deals_count > 0 else 0
-        total_revenue = sum(d.value for d in won_deals)
-        
+    def metrics_for_channel(channel_type: DealType):
+        row = by_type.get(channel_type.value, {})
         return {
-            "deals_won": deals_won_count,
-            "total_deals": total_deals,
-            "win_rate": round(win_rate, 2),
-            "total_revenue": float(total_revenue)
+            "deals_won": row.get("won_count", 0),
+            "total_deals": row.get("count", 0),
+            "win_rate": round(row.get("win_rate") or 0, 2),
+            "total_revenue": row.get("won_value", 0.0)
         }
 
-    direct_metrics = calculate_metrics_for_channel(DealType.direct)
-    agency_metrics = calculate_metrics_for_channel(DealType.agency)
-    
-    return {"direct": direct_metrics, "agency": agency_metrics}
+    return {"direct": metrics_for_channel(DealType.direct), "agency": metrics_for_channel(DealType.agency)}
 
 
 def get_deal_outcome_breakdowns(db: Session) -> List[Dict]:
     """
     Calculates deal counts grouped by status, industry, and reason.
     """
-    reason_expression = case(
-        (Deal.status == DealStatus.won, Deal.win_reason),
-        (Deal.status == DealStatus.lost, Deal.loss_reason),
-        (Deal.status == DealStatus.cancelled, Deal.cancellation_reason),
-        else_=None
-    ).label('reason')
-
-    query_result = (
-        db.query(
-            Deal.status,
-            Company.industry,
-            reason_expression,
-            func.count(Deal.id).label('count')
-        )
-        .join(Company, Deal.company_id == Company.id)
-        .filter(Deal.status.in_([s for s in DealStatus]))
-        .group_by(Deal.status, Company.industry, reason_expression)
-        .order_by(Deal.status, Company.industry)
-        .all()
-    )
-    
     return [
-        {
-            "status": row.status.value,
-            "industry": row.industry or "Unknown",
-            "reason": row.reason or "No Reason Given",
-            "count": row.count,
-        }
-        for row in query_result
+        {"status": node["status"], "industry": node["industry"], "reason": node["reason"], "count": node["count"]}
+        for node in cube_nodes(outcome_cube(db), status=None, industry=None, reason=None)
     ]
 
-def get_sales_forecast(db: Session) -> List[Dict[str, Any]]:
+def get_sales_forecast(db: Session, period: Period = Period.month) -> List[Dict[str, Any]]:
     """
     Calculates a simple sales forecast for the next 6 months based on
-    'in_progress' deals and their forecast accuracy.
+    'in_progress' deals and their forecast accuracy, per JST month or
+    fiscal period.
     """
     
     accuracy_weight = case(
@@ -388,25 +465,21 @@ def get_sales_forecast(db: Session) -> List[Dict[str, Any]]:
         else_=0.0
     ).label("weight")
     
-    six_months_ago = datetime.utcnow() - timedelta(days=180)
+    six_months_ago = datetime.now(timezone.utc) - timedelta(days=180)
 
-    forecast_data = (
+    forecast_data = join_calendar(
         db.query(
-            func.date_trunc('month', Deal.created_at).label('month'),
+            period_label(period),
             func.sum(Deal.value * accuracy_weight).label("projected_revenue")
         )
-        .filter(
-            Deal.status == DealStatus.in_progress,
-            Deal.created_at >= six_months_ago
-        )
-        .group_by(func.date_trunc('month', Deal.created_at))
-        .order_by(func.date_trunc('month', Deal.created_at))
-        .all()
-    )
+        .select_from(Deal)
+        .filter(Deal.status == DealStatus.in_progress),
+        Deal.created_at, since=six_months_ago,
+    ).group_by('period').order_by('period').all()
 
     return [
         {
-            "month": row.month.strftime("%Y-%m"),
+            "month": row.period,
             "projected_revenue": float(row.projected_revenue or 0)
         }
         for row in forecast_data
@@ -497,21 +570,20 @@ def get_churn_analysis(db: Session) -> Dict[str, Any]:
         "cancellation_reasons": cancellation_reasons,
     }
 
-def calculate_monthly_cancellation_rate(db: Session) -> List[Dict[str, Any]]:
+def calculate_monthly_cancellation_rate(db: Session, period: Period = Period.month) -> List[Dict[str, Any]]:
     """
-    Calculates the monthly cancellation rate of deals.
+    Calculates the cancellation rate of deals per JST month or fiscal period.
     """
     closed_statuses = [DealStatus.won, DealStatus.lost, DealStatus.cancelled]
 
-    monthly_stats = db.query(
-        extract('year', Deal.closed_at).label('year'),
-        extract('month', Deal.closed_at).label('month'),
-        func.count(Deal.id).label('total_closed_count'),
-        func.count(case((Deal.status == DealStatus.cancelled, Deal.id))).label('cancelled_count')
-    ).filter(
-        Deal.status.in_(closed_statuses),
-        Deal.closed_at.isnot(None)
-    ).group_by('year', 'month').order_by('year', 'month').all()
+    monthly_stats = join_calendar(
+        db.query(
+            period_label(period),
+            func.count(Deal.id).label('total_closed_count'),
+            func.count(case((Deal.status == DealStatus.cancelled, Deal.id))).label('cancelled_count')
+        ).select_from(Deal).filter(Deal.status.in_(closed_statuses)),
+        Deal.closed_at,
+    ).group_by('period').order_by('period').all()
 
     monthly_cancellation_rates = []
     for row in monthly_stats:
@@ -519,7 +591,7 @@ def calculate_monthly_cancellation_rate(db: Session) -> List[Dict[str, Any]]:
         cancelled_count = row.cancelled_count
         cancellation_rate = (cancelled_count / total_count) * 100 if total_count > 0 else 0
         monthly_cancellation_rates.append({
-            "label": f"{row.year}-{str(row.month).zfill(2)}",
+            "label": row.period,
             "cancelled_count": cancelled_count,
             "total_closed_count": total_count,
             "cancellation_rate": round(cancellation_rate, 2)
@@ -573,17 +645,17 @@ def get_monthly_report_data(db: Session, year: int, month: int) -> Dict[str, Any
     """
     Aggregates key performance indicators for a specific month to generate a report.
     """
-    month_start = datetime(year, month, 1)
-    # Get the first day of the next month, then subtract one day to get the last day of the target month
-    next_month = month_start.replace(day=28) + timedelta(days=4) 
-    month_end = next_month - timedelta(days=next_month.day)
+    first_day = date(year, month, 1)
+    # The JST month, up to (not including) midnight of the next month's first day
+    month_start = jst_start(first_day)
+    month_end = jst_start((first_day + timedelta(days=32)).replace(day=1))
 
-    month_label = month_start.strftime("%Y-%m")
+    month_label = first_day.strftime("%Y-%m")
 
     # Filter deals that were closed in the specified month
     deals_closed_in_month = db.query(Deal).filter(
         Deal.closed_at >= month_start,
-        Deal.closed_at <= month_end
+        Deal.closed_at < month_end
     )
     
     won_deals = deals_closed_in_month.filter(Deal.status == DealStatus.won).all()
@@ -599,7 +671,7 @@ def get_monthly_report_data(db: Session, year: int, month: int) -> Dict[str, Any
     # New deals created in the month
     new_deals_count = db.query(Deal).filter(
         Deal.created_at >= month_start,
-        Deal.created_at <= month_end
+        Deal.created_at < month_end
     ).count()
 
     # Find the top deal of the month
@@ -616,7 +688,7 @@ def get_monthly_report_data(db: Session, year: int, month: int) -> Dict[str, Any
         .filter(
             Deal.status == DealStatus.won,
             Deal.closed_at >= month_start,
-            Deal.closed_at <= month_end
+            Deal.closed_at < month_end
         )
         .group_by(User.id, User.name)
         .order_by(func.sum(Deal.value).desc())
@@ -0,0 +1,143 @@
+# backend/app/services/distribution_service.py
+
+"""
+Distributions of deal value, time to close and activities per deal:
+percentiles and an equal-width histogram.
+
+The exact mode reads the deals closed in range: one statement computes
+count, bounds, mean and every percentile (percentile_cont) and buckets
+the values with width_bucket. The approximate mode merges the monthly
+sketches app.distribution_sketches keeps instead, so it costs the same
+for a month or for years of deals; values are within 1% and the range is
+widened to whole months. When there are no sketches for the range (not
+built yet, or a month the last refresh hasn't reached), the approximate
+mode falls back to the exact one over the same range and says so. See
+app.distribution_sketches for what each metric counts.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Float, func, select, true, type_coerce
+from sqlalchemy.dialects.postgresql import ARRAY, array
+from sqlalchemy.orm import Session
+
+from app.distribution_sketches import DistributionMetric, bucket_value, metric_values
+from app.fiscal_calendar import add_months, jst_start, jst_today
+from app.models.deal import Deal
+from app.models.distribution_sketch import DistributionSketch
+
+PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99)
+
+
+def _percentile_key(q: float) -> str:
+    return f"p{q * 100:g}"
+
+
+def _histogram(low: float, high: float, counts: Dict[int, int], buckets: int) -> List[Dict[str, Any]]:
+    """Equal-width buckets 1..`buckets` from `low` to `high`, empty ones included."""
+    width = (high - low) / buckets
+    return [
+        {"lower": low + width * (i - 1), "upper": low + width * i, "count": counts.get(i, 0)}
+        for i in range(1, buckets + 1)
+    ]
+
+
+def _exact(db: Session, metric: DistributionMetric, start: date, end: date, user_id: Optional[int], buckets: int):
+    conditions = [Deal.closed_at >= jst_start(start), Deal.closed_at < jst_start(end + timedelta(days=1))]
+    if user_id is not None:
+        conditions.append(Deal.user_id == user_id)
+    values = metric_values(metric).where(*conditions).cte("distribution_values")
+
+    stats = select(
+        func.count(values.c.value).label("count"),
+        func.min(values.c.value).label("low"),
+        func.max(values.c.value).label("high"),
+        func.avg(values.c.value).label("mean"),
+        type_coerce(
+            func.percentile_cont(array(PERCENTILES)).within_group(values.c.value), ARRAY(Float)
+        ).label("percentiles"),
+    ).cte("distribution_stats")
+    # width_bucket puts the maximum in an extra bucket of its own, and
+    # rejects equal bounds.
+    bucket = func.least(
+        func.width_bucket(values.c.value, stats.c.low, func.greatest(stats.c.high, stats.c.low + 1), buckets), buckets
+    ).label("bucket")
+    histogram = (
+        select(bucket, func.count().label("values"))
+        .select_from(values.join(stats, true()))
+        .group_by("bucket")
+        .subquery()
+    )
+    rows = db.execute(
+        select(stats, histogram.c.bucket, histogram.c["values"])
+        .select_from(stats.outerjoin(histogram, true()))
+    ).all()
+
+    summary = rows[0]
+    if not summary.count:
+        return {"count": 0, "min": None, "max": None, "mean": None, "percentiles": {}, "histogram": []}
+    low, high = float(summary.low), float(summary.high)
+    return {
+        "count": summary.count,
+        "min": low,
+        "max": high,
+        "mean": float(summary.mean),
+        "percentiles": {_percentile_key(q): float(v) for q, v in zip(PERCENTILES, summary.percentiles)},
+        "histogram": _histogram(low, max(high, low + 1), {row.bucket: row.values for row in rows}, buckets),
+    }
+
+
+def _approximate(db: Session, metric: DistributionMetric, start: date, end: date, buckets: int):
+    sketch = db.execute(
+        select(DistributionSketch.bucket, func.sum(DistributionSketch.value_count).label("values"))
+        .where(DistributionSketch.metric == metric.value, DistributionSketch.month >= start, DistributionSketch.month <= end)
+        .group_by(DistributionSketch.bucket)
+        .order_by(DistributionSketch.bucket)
+    ).all()
+
+    total = sum(row.values for row in sketch)
+    if not total:
+        return None
+    points = [(bucket_value(row.bucket), row.values) for row in sketch]
+
+    percentiles, seen, targets = {}, 0, list(PERCENTILES)
+    for value, count in points:
+        seen += count
+        while targets and seen >= targets[0] * total:
+            percentiles[_percentile_key(targets.pop(0))] = value
+
+    low, high = points[0][0], points[-1][0]
+    width = (max(high, low + 1) - low) / buckets
+    counts: Dict[int, int] = {}
+    for value, count in points:
+        index = min(int((value - low) / width) + 1, buckets)
+        counts[index] = counts.get(index, 0) + count
+    return {
+        "count": total,
+        "min": low,
+        "max": high,
+        "mean": sum(value * count for value, count in points) / total,
+        "percentiles": percentiles,
+        "histogram": _histogram(low, max(high, low + 1), counts, buckets),
+    }
+
+
+def get_distribution(db: Session, metric: DistributionMetric, start: Optional[date] = None, end: Optional[date] = None,
+                     user_id: Optional[int] = None, buckets: int = 20, approximate: bool = False) -> Dict[str, Any]:
+    """
+    Percentiles and a histogram of `metric` over the deals closed between
+    `start` and `end` inclusive (the last 365 days by default), for one
+    owner or everyone. `approximate` reads the monthly sketches, which are
+    company-wide only, unless there are none for the range.
+    """
+    end = end or jst_today()
+    start = start or end - timedelta(days=364)
+    result = None
+    if approximate:
+        start, end = start.replace(day=1), add_months(end, 1) - timedelta(days=1)
+        result = _approximate(db, metric, start, end, buckets)
+        approximate = result is not None
+    if result is None:
+        result = _exact(db, metric, start, end, user_id, buckets)
+    return {"metric": metric.value, "start": start, "end": end, "approximate": approximate, **result}
@@ -0,0 +1,131 @@
+# backend/app/services/funnel_service.py
+
+"""
+Lead funnels by lead source or product, per cohort: the JST month the
+lead came in (lead_generated_at).
+
+Every lead is a deal that starts in progress and ends won, lost or
+cancelled, so a cohort's funnel is how many of its leads are at each
+stage now, the conversion between them, how long leads took to become
+deals and to close, and the revenue they brought in.
+
+One statement computes every cohort, each source's totals and the grand
+total (GROUP BY ROLLUP) with conditional aggregates, reading only the
+index on (lead_source, lead_generated_at), which includes the other
+columns it needs.
+"""
+
+import enum
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.fiscal_calendar import JST_NAME, add_months, jst_start, jst_today
+from app.models.deal import Deal
+from app.models.enums import DealStatus
+
+SECONDS_PER_DAY = 60 * 60 * 24
+DEFAULT_COHORTS = 12
+
+
+class FunnelDimension(str, enum.Enum):
+    lead_source = "lead_source"
+    product_name = "product_name"
+
+
+def _days(interval):
+    return func.extract("epoch", interval) / SECONDS_PER_DAY
+
+
+def _rate(part: int, whole: int) -> Optional[float]:
+    return round(part / whole * 100, 2) if whole else None
+
+
+def _funnel(row) -> Dict[str, Any]:
+    closed = row.won + row.lost
+    won_value = float(row.won_value)
+    return {
+        "leads": row.leads,
+        "in_progress": row.in_progress,
+        "won": row.won,
+        "lost": row.lost,
+        "cancelled": row.cancelled,
+        # Of the leads, how many reached a decision; of those, how many were won
+        "close_rate": _rate(closed, row.leads),
+        "win_rate": _rate(row.won, closed),
+        "lead_to_win_rate": _rate(row.won, row.leads),
+        "cancellation_rate": _rate(row.cancelled, row.leads),
+        "average_days_to_deal": float(row.days_to_deal) if row.days_to_deal is not None else None,
+        "average_days_to_close": float(row.days_to_close) if row.days_to_close is not None else None,
+        "median_days_to_win": float(row.median_days_to_win) if row.median_days_to_win is not None else None,
+        "won_value": won_value,
+        "revenue_per_lead": round(won_value / row.leads, 2) if row.leads else None,
+    }
+
+
+def get_lead_funnel(db: Session, by: FunnelDimension = FunnelDimension.lead_source,
+                    start: Optional[date] = None, end: Optional[date] = None,
+                    values: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Funnels of the leads generated between `start` and `end` inclusive
+    (default: the last DEFAULT_COHORTS months, this one included), per
+    lead source or product and cohort month, optionally for some sources
+    or products only.
+    """
+    end = end or jst_today()
+    start = start or add_months(end, -(DEFAULT_COHORTS - 1))
+
+    key = (Deal.lead_source if by == FunnelDimension.lead_source else Deal.product_name)
+    cohort = func.to_char(func.timezone(JST_NAME, Deal.lead_generated_at), "YYYY-MM")
+    closed = Deal.status.in_([DealStatus.won, DealStatus.lost])
+    won = Deal.status == DealStatus.won
+
+    def count(condition):
+        return func.count(case((condition, Deal.id)))
+
+    conditions = [Deal.lead_generated_at >= jst_start(start), Deal.lead_generated_at < jst_start(end + timedelta(days=1))]
+    if values:
+        conditions.append(key.in_(values))
+    rows = db.execute(
+        select(
+            key.label("key"),
+            cohort.label("cohort"),
+            func.grouping(key, cohort).label("grouping"),
+            func.count(Deal.id).label("leads"),
+            count(Deal.status == DealStatus.in_progress).label("in_progress"),
+            count(won).label("won"),
+            count(Deal.status == DealStatus.lost).label("lost"),
+            count(Deal.status == DealStatus.cancelled).label("cancelled"),
+            func.coalesce(func.sum(case((won, Deal.value))), 0).label("won_value"),
+            func.avg(_days(Deal.created_at - Deal.lead_generated_at)).label("days_to_deal"),
+            func.avg(case((closed, _days(Deal.closed_at - Deal.lead_generated_at)))).label("days_to_close"),
+            func.percentile_cont(0.5).within_group(
+                case((won, _days(Deal.closed_at - Deal.lead_generated_at)))
+            ).label("median_days_to_win"),
+        )
+        .where(*conditions)
+        .group_by(func.rollup(key, cohort))
+        .order_by(key, cohort)
+    ).all()
+
+    groups: Dict[Any, Dict[str, Any]] = {}
+    total = None
+    for row in rows:
+        if row.grouping == 3:  # ROLLUP's grand total
+            total = _funnel(row)
+            continue
+        group = groups.setdefault(row.key, {"key": row.key, "totals": None, "cohorts": []})
+        if row.grouping == 1:  # all cohorts of the group
+            group["totals"] = _funnel(row)
+        else:
+            group["cohorts"].append({"cohort": row.cohort, **_funnel(row)})
+
+    return {
+        "by": by.value,
+        "start": start,
+        "end": end,
+        "total": total,
+        "groups": sorted(groups.values(), key=lambda group: -group["totals"]["leads"]),
+    }
@@ -0,0 +1,39 @@
+# backend/app/services/kpi_trend_service.py
+
+"""
+KPI trend lines, read from the daily snapshots app.kpi_snapshots writes:
+one primary key range per series, however long the range.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.fiscal_calendar import jst_today
+from app.kpi_snapshots import COMPANY_WIDE, KPI_WINDOW_DAYS
+from app.models.kpi_snapshot import KpiSnapshot
+
+
+def get_kpi_trend(db: Session, start: Optional[date] = None, end: Optional[date] = None, user_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Daily KPIs between `start` and `end` inclusive (default: the last 90
+    days), company-wide or for one user. Days the snapshot job hasn't
+    covered yet are missing.
+    """
+    end = end or jst_today()
+    start = start or end - timedelta(days=89)
+    points = db.execute(
+        select(KpiSnapshot)
+        .where(KpiSnapshot.user_id == (COMPANY_WIDE if user_id is None else user_id),
+               KpiSnapshot.day >= start, KpiSnapshot.day <= end)
+        .order_by(KpiSnapshot.day)
+    ).scalars().all()
+    return {
+        "start": start,
+        "end": end,
+        "user_id": user_id,
+        "window_days": KPI_WINDOW_DAYS,
+        "points": points,
+    }
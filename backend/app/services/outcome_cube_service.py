@@ -0,0 +1,116 @@
+# backend/app/services/outcome_cube_service.py
+
+"""
+The deal outcome cube: deal counts, value and win rate by status,
+industry and reason, at every subtotal level (per status, per industry,
+per status and industry, ..., overall), from one GROUP BY CUBE statement.
+
+The cube of a date range is cached in process for CUBE_TTL_SECONDS, so
+the outcome endpoints and every drill-down step of the UI share one scan;
+lookups are counted under the "outcome_cube" cache metric. Changes to
+deals show up once the cached cube expires.
+
+Deals without an industry or reason are labelled "Unknown" and "No Reason
+Given", so None in a cube row always means "all".
+"""
+
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.metrics import record_cache
+from app.models.enums import DealStatus
+from app.services.pivot_service import PivotDimension, PivotMeasure, pivot_rows
+
+CUBE_DIMENSIONS = [PivotDimension.status, PivotDimension.industry, PivotDimension.reason]
+CUBE_MEASURES = [PivotMeasure.count, PivotMeasure.total_value, PivotMeasure.win_rate]
+CUBE_TTL_SECONDS = 60
+UNKNOWN_INDUSTRY = "Unknown"
+NO_REASON = "No Reason Given"
+
+# (start, end) -> (expires at, cube rows)
+_cubes: Dict[tuple, tuple] = {}
+_cubes_lock = threading.Lock()
+
+
+def _node(row: Dict[str, Any]) -> Dict[str, Any]:
+    rolled_up = row["rolled_up"]
+    return {
+        "status": row["status"],
+        "industry": None if "industry" in rolled_up else row["industry"] or UNKNOWN_INDUSTRY,
+        "reason": None if "reason" in rolled_up else row["reason"] or NO_REASON,
+        "count": row["count"],
+        "total_value": row["total_value"],
+        "win_rate": row["win_rate"],
+    }
+
+
+def outcome_cube(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Every node of the cube of the deals closed between `start` and `end`
+    (all deals by default), from the cache while it is fresh.
+    """
+    key = (start, end)
+    now = time.monotonic()
+    with _cubes_lock:
+        cached = _cubes.get(key)
+    if cached is not None and cached[0] > now:
+        record_cache("outcome_cube", hit=True)
+        return cached[1]
+    record_cache("outcome_cube", hit=False)
+
+    nodes = [_node(row) for row in pivot_rows(db, CUBE_DIMENSIONS, CUBE_MEASURES, start=start, end=end, subtotals=True)]
+    with _cubes_lock:
+        for stale in [k for k, (expires, _) in _cubes.items() if expires <= now]:
+            del _cubes[stale]
+        _cubes[key] = (now + CUBE_TTL_SECONDS, nodes)
+    return nodes
+
+
+def clear_cache():
+    """Forgets every cached cube, e.g. before timing a cold build."""
+    with _cubes_lock:
+        _cubes.clear()
+
+
+def cube_nodes(nodes: List[Dict[str, Any]], **values) -> List[Dict[str, Any]]:
+    """
+    The nodes at the level of the given dimensions (e.g. status=...,
+    industry=None for every industry), summed over the others. A value
+    of None matches any value of that dimension.
+    """
+    return [
+        node for node in nodes
+        if all((dimension in values) == (node[dimension] is not None) for dimension in ("status", "industry", "reason"))
+        and all(value is None or node[dimension] == value for dimension, value in values.items())
+    ]
+
+
+def get_outcome_cube(db: Session, status: Optional[DealStatus] = None, industry: Optional[str] = None,
+                     reason: Optional[str] = None, by: Optional[PivotDimension] = None,
+                     start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Drill-down into the cube: the node fixed by `status`, `industry` and
+    `reason` (the rest summed over) and its children along `by`, largest
+    first. `by` defaults to the first of status, industry and reason that
+    isn't fixed.
+    """
+    fixed = {dimension: value for dimension, value in
+             (("status", status.value if status else None), ("industry", industry), ("reason", reason))
+             if value is not None}
+    if by is None:
+        by = next((d for d in CUBE_DIMENSIONS if d.value not in fixed), None)
+
+    nodes = outcome_cube(db, start, end)
+    node = next(iter(cube_nodes(nodes, **fixed)), None)
+    children = [] if by is None or by.value in fixed else cube_nodes(nodes, **fixed, **{by.value: None})
+    return {
+        "start": start,
+        "end": end,
+        "by": by.value if by else None,
+        "node": node,
+        "children": sorted(children, key=lambda child: -child["count"]),
+    }
@@ -0,0 +1,240 @@
+# backend/app/services/pivot_service.py
+
+"""
+Ad-hoc pivots over deals: any combination of the whitelisted dimensions
+and measures below, compiled into one GROUP BY statement with bound
+parameters. The fixed breakdowns in analytics_service are thin wrappers
+around pivot_rows().
+
+Dimensions (user and agency rows also carry user_name / agency_name):
+
+  status, type, industry, agency, user, product_name, lead_source,
+  reason    win, loss or cancellation reason, by status
+  month     JST month the deal closed in (None while it is open)
+
+Measures: count, total_value, average_value, won_count, won_value and
+win_rate (won / (won + lost), in percent).
+
+With subtotals, the rows of every subtotal level come from the same
+statement (GROUP BY CUBE): each row lists the dimensions it is summed
+over in "rolled_up", and has None for them.
+
+Pivots by user and month of won_count, won_value and win_rate can read
+the daily KPI snapshots app.kpi_snapshots keeps instead of the deals
+(source=snapshots): the same numbers as of the last snapshot run, at
+the cost of a primary key range.
+"""
+
+import enum
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.fiscal_calendar import JST_NAME, jst_start
+from app.kpi_snapshots import COMPANY_WIDE
+from app.models.agency import Agency
+from app.models.company import Company
+from app.models.deal import Deal
+from app.models.enums import DealStatus, DealType
+from app.models.kpi_snapshot import KpiSnapshot
+from app.models.user import User
+
+
+class PivotDimension(str, enum.Enum):
+    status = "status"
+    type = "type"
+    industry = "industry"
+    agency = "agency"
+    user = "user"
+    product_name = "product_name"
+    lead_source = "lead_source"
+    month = "month"
+    reason = "reason"
+
+
+class PivotMeasure(str, enum.Enum):
+    count = "count"
+    total_value = "total_value"
+    average_value = "average_value"
+    won_count = "won_count"
+    won_value = "won_value"
+    win_rate = "win_rate"
+
+
+class PivotSource(str, enum.Enum):
+    deals = "deals"
+    snapshots = "snapshots"
+
+
+SNAPSHOT_DIMENSIONS = {PivotDimension.user, PivotDimension.month}
+SNAPSHOT_MEASURES = {PivotMeasure.won_count, PivotMeasure.won_value, PivotMeasure.win_rate}
+
+_won = func.count(case((Deal.status == DealStatus.won, Deal.id)))
+_lost = func.count(case((Deal.status == DealStatus.lost, Deal.id)))
+
+MEASURES = {
+    PivotMeasure.count: func.count(Deal.id),
+    PivotMeasure.total_value: func.coalesce(func.sum(Deal.value), 0),
+    PivotMeasure.average_value: func.avg(Deal.value),
+    PivotMeasure.won_count: _won,
+    PivotMeasure.won_value: func.coalesce(func.sum(case((Deal.status == DealStatus.won, Deal.value))), 0),
+    PivotMeasure.win_rate: 100.0 * _won / func.nullif(_won + _lost, 0),
+}
+
+REASON = case(
+    (Deal.status == DealStatus.won, Deal.win_reason),
+    (Deal.status == DealStatus.lost, Deal.loss_reason),
+    (Deal.status == DealStatus.cancelled, Deal.cancellation_reason),
+)
+
+# The columns each dimension adds, the first one being its value
+DIMENSIONS = {
+    PivotDimension.status: [Deal.status],
+    PivotDimension.type: [Deal.type],
+    PivotDimension.industry: [Company.industry],
+    PivotDimension.agency: [Agency.id, Agency.agency_name],
+    PivotDimension.user: [User.id, User.name],
+    PivotDimension.product_name: [Deal.product_name],
+    PivotDimension.lead_source: [Deal.lead_source],
+    # Open deals have no month, so this can't be an (inner) calendar join;
+    # an outer range join to the calendar can't use an index and is far slower.
+    PivotDimension.month: [func.to_char(func.timezone(JST_NAME, Deal.closed_at), "YYYY-MM")],
+    PivotDimension.reason: [REASON],
+}
+# Extra column labels, after the dimension's own name
+EXTRA_LABELS = {PivotDimension.agency: ["agency_name"], PivotDimension.user: ["user_name"]}
+
+
+def _labelled(dimension: PivotDimension, columns) -> list:
+    labels = [dimension.value] + EXTRA_LABELS.get(dimension, [])
+    return [column.label(label) for column, label in zip(columns, labels)]
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def snapshots_support(dimensions: Sequence[PivotDimension], measures: Sequence[PivotMeasure],
+                      statuses: Optional[Sequence[DealStatus]] = None, deal_type: Optional[DealType] = None,
+                      subtotals: bool = False) -> bool:
+    """Whether the KPI snapshots hold everything the pivot asks for."""
+    return (set(dimensions) <= SNAPSHOT_DIMENSIONS and set(measures) <= SNAPSHOT_MEASURES
+            and not statuses and deal_type is None and not subtotals)
+
+
+def _rolled_up(row: Dict[str, Any], dimensions) -> Dict[str, Any]:
+    # GROUPING() sets the bit of every argument summed over, the first
+    # argument's being the highest.
+    grouping = row.pop("grouping")
+    row["rolled_up"] = [d.value for i, d in enumerate(reversed(dimensions)) if grouping & (1 << i)][::-1]
+    return row
+
+
+def _deal_pivot(dimensions, measures, start, end, statuses, deal_type, user_id, subtotals):
+    columns = [column for d in dimensions for column in _labelled(d, DIMENSIONS[d])]
+    statement = select(*columns, *(MEASURES[m].label(m.value) for m in measures)).select_from(Deal)
+
+    conditions = []
+    if start is not None:
+        conditions.append(Deal.closed_at >= jst_start(start))
+    if end is not None:
+        conditions.append(Deal.closed_at < jst_start(end + timedelta(days=1)))
+    if statuses:
+        conditions.append(Deal.status.in_(statuses))
+    if deal_type is not None:
+        conditions.append(Deal.type == deal_type)
+    if user_id is not None:
+        conditions.append(Deal.user_id == user_id)
+
+    if PivotDimension.industry in dimensions:
+        statement = statement.join(Company, Deal.company_id == Company.id)
+    if PivotDimension.agency in dimensions:
+        statement = statement.outerjoin(Agency, Deal.agency_id == Agency.id)
+    if PivotDimension.user in dimensions:
+        statement = statement.join(User, Deal.user_id == User.id)
+
+    statement = statement.where(*conditions)
+    if not subtotals:
+        return statement.group_by(*(column for d in dimensions for column in DIMENSIONS[d]))
+    # A dimension's columns (user id and name) roll up together.
+    return statement.add_columns(
+        func.grouping(*(DIMENSIONS[d][0] for d in dimensions)).label("grouping")
+    ).group_by(func.cube(*(tuple_(*DIMENSIONS[d]) if len(DIMENSIONS[d]) > 1 else DIMENSIONS[d][0] for d in dimensions)))
+
+
+def _snapshot_pivot(dimensions, measures, start, end, user_id):
+    won, lost = func.sum(KpiSnapshot.deals_won), func.sum(KpiSnapshot.deals_lost)
+    snapshot_measures = {
+        PivotMeasure.won_count: won,
+        PivotMeasure.won_value: func.sum(KpiSnapshot.won_value),
+        PivotMeasure.win_rate: 100.0 * won / func.nullif(won + lost, 0),
+    }
+    snapshot_dimensions = {
+        PivotDimension.user: [User.id, User.name],
+        PivotDimension.month: [func.to_char(KpiSnapshot.day, "YYYY-MM")],
+    }
+    columns = [column for d in dimensions for column in _labelled(d, snapshot_dimensions[d])]
+    statement = select(*columns, *(snapshot_measures[m].label(m.value) for m in measures)).select_from(KpiSnapshot)
+
+    if PivotDimension.user in dimensions:
+        statement = statement.join(User, KpiSnapshot.user_id == User.id)
+    elif user_id is None:
+        user_id = COMPANY_WIDE
+    conditions = [] if user_id is None else [KpiSnapshot.user_id == user_id]
+    if start is not None:
+        conditions.append(KpiSnapshot.day >= start)
+    if end is not None:
+        conditions.append(KpiSnapshot.day <= end)
+
+    return statement.where(*conditions).group_by(*(column for d in dimensions for column in snapshot_dimensions[d]))
+
+
+def pivot_rows(db: Session, dimensions: Sequence[PivotDimension], measures: Sequence[PivotMeasure],
+               start: Optional[date] = None, end: Optional[date] = None,
+               statuses: Optional[Sequence[DealStatus]] = None, deal_type: Optional[DealType] = None,
+               user_id: Optional[int] = None, sort: Optional[PivotMeasure] = None, limit: Optional[int] = None,
+               subtotals: bool = False, source: PivotSource = PivotSource.deals) -> List[Dict[str, Any]]:
+    """
+    One row per combination of `dimensions` with the `measures` of its
+    deals, ordered by the dimensions or, with `sort`, by that measure
+    (largest first). `start` and `end` keep the deals closed between
+    them (JST, inclusive). `subtotals` adds the rows of every subtotal
+    level, each before the rows it sums. The snapshots source takes only
+    what snapshots_support() allows.
+    """
+    dimensions, measures = list(dict.fromkeys(dimensions)), list(dict.fromkeys(measures))
+    if sort is not None and sort not in measures:
+        measures.append(sort)
+    if source == PivotSource.snapshots:
+        statement = _snapshot_pivot(dimensions, measures, start, end, user_id)
+    else:
+        statement = _deal_pivot(dimensions, measures, start, end, statuses, deal_type, user_id, subtotals)
+
+    if sort is not None:
+        statement = statement.order_by(func.coalesce(statement.selected_columns[sort.value], 0).desc())
+    statement = statement.order_by(*(
+        statement.selected_columns[d.value].asc().nulls_first() if subtotals else statement.selected_columns[d.value]
+        for d in dimensions
+    ))
+    if limit is not None:
+        statement = statement.limit(limit)
+
+    rows = [{key: _plain(value) for key, value in row.items()} for row in db.execute(statement).mappings()]
+    return [_rolled_up(row, dimensions) for row in rows] if subtotals else rows
+
+
+def get_pivot(db: Session, dimensions: Sequence[PivotDimension], measures: Sequence[PivotMeasure], **filters) -> Dict[str, Any]:
+    """pivot_rows() with the pivot's definition, for the API."""
+    return {
+        "dimensions": [d.value for d in dict.fromkeys(dimensions)],
+        "measures": [m.value for m in dict.fromkeys(measures)],
+        "source": filters.get("source", PivotSource.deals).value,
+        "rows": pivot_rows(db, dimensions, measures, **filters),
+    }
@@ -0,0 +1,256 @@
+# backend/app/services/preview_service.py
+
+"""
+Thumbnail and text-excerpt generation for attachments.
+
+generate_preview() returns a small PNG thumbnail and a plain-text excerpt
+for one file:
+
+- PDFs: the first page rendered with pdfium, plus its text.
+- Images: the image itself, scaled down.
+- Office (OOXML) documents: the preview Office embeds when saving, or a
+  LibreOffice render of the first page when `soffice` is installed, plus
+  the document text.
+- Plain text: an excerpt only.
+
+extract_text() returns the full text of PDFs, Office documents and plain
+text files for the search index.
+"""
+
+import codecs
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import zipfile
+from io import BytesIO
+from typing import NamedTuple, Optional
+from xml.etree import ElementTree
+
+THUMBNAIL_SIZE = (320, 320)
+EXCERPT_LENGTH = 500
+# Characters of text kept for search. A tsvector is limited to 1 MB.
+MAX_TEXT_LENGTH = 200_000
+# Refuse to decode images larger than this (decompression bombs).
+MAX_IMAGE_PIXELS = 80_000_000
+SOFFICE_TIMEOUT = 60
+
+OFFICE_EXTENSIONS = {".docx", ".pptx", ".xlsx"}
+TEXT_EXTENSIONS = {".txt", ".csv", ".md", ".log", ".json", ".xml", ".html"}
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".tif", ".tiff"}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class Preview(NamedTuple):
+    thumbnail: Optional[bytes]
+    text_excerpt: Optional[str]
+
+
+def file_kind(file_name: str, file_type: Optional[str]) -> Optional[str]:
+    """'pdf', 'image', 'office' or 'text', from the MIME type or extension."""
+    extension = os.path.splitext(file_name or "")[1].lower()
+    file_type = (file_type or "").lower()
+    if file_type == "application/pdf" or extension == ".pdf":
+        return "pdf"
+    if extension in OFFICE_EXTENSIONS or file_type.startswith("application/vnd.openxmlformats-officedocument."):
+        return "office"
+    if file_type.startswith("image/") or extension in IMAGE_EXTENSIONS:
+        return "image"
+    if file_type.startswith("text/") or extension in TEXT_EXTENSIONS:
+        return "text"
+    return None
+
+
+def _excerpt(text: Optional[str]) -> Optional[str]:
+    if not text:
+        return None
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text[:EXCERPT_LENGTH] or None
+
+
+def _png(image) -> bytes:
+    from PIL import Image
+
+    image.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+    if image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    buffer = BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def render_pdf_page(path: str):
+    """First page of a PDF as a PIL image sized for a thumbnail, and its text."""
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        page = pdf[0]
+        width, height = page.get_size()
+        # Rendered at twice the thumbnail size, then downsampled.
+        scale = 2 * min(THUMBNAIL_SIZE[0] / width, THUMBNAIL_SIZE[1] / height)
+        image = page.render(scale=scale).to_pil()
+        text = page.get_textpage().get_text_range()
+        return image, text
+    finally:
+        pdf.close()
+
+
+def extract_pdf_text(path: str, limit: int) -> str:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        parts, collected = [], 0
+        for index in range(len(pdf)):
+            text = pdf[index].get_textpage().get_text_range()
+            parts.append(text)
+            collected += len(text)
+            if collected >= limit:
+                break
+        return "\n".join(parts)
+    finally:
+        pdf.close()
+
+
+def _pdf_preview(path: str, extension: str) -> Preview:
+    image, text = render_pdf_page(path)
+    return Preview(_png(image), _excerpt(text))
+
+
+def _image_preview(path: str, extension: str) -> Preview:
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    with Image.open(path) as image:
+        # Lets JPEG decode at a reduced size directly.
+        image.draft("RGB", THUMBNAIL_SIZE)
+        return Preview(_png(image), None)
+
+
+def extract_office_text(path: str, limit: Optional[int] = None) -> str:
+    """
+    Text of a DOCX, PPTX or XLSX file, read straight from its XML parts.
+    Paragraphs (and spreadsheet strings) end up on separate lines. Stops
+    once `limit` characters have been collected.
+    """
+    parts = []
+    collected = 0
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        slides = sorted(
+            (n for n in names if re.fullmatch(r"ppt/slides/slide\d+\.xml", n)),
+            key=lambda n: int(re.search(r"\d+", n.rsplit("/", 1)[1]).group()),
+        )
+        xml_parts = [n for n in ("word/document.xml", "xl/sharedStrings.xml") if n in names] + slides
+        for name in xml_parts:
+            with archive.open(name) as xml:
+                for _, element in ElementTree.iterparse(xml):
+                    tag = element.tag.rsplit("}", 1)[-1]
+                    if tag == "t" and element.text:
+                        parts.append(element.text)
+                        collected += len(element.text)
+                    elif tag in ("p", "si"):
+                        parts.append("\n")
+                    element.clear()
+                    if limit and collected >= limit:
+                        return "".join(parts)
+    return "".join(parts)
+
+
+def _embedded_office_thumbnail(path: str) -> Optional[bytes]:
+    from PIL import Image
+
+    with zipfile.ZipFile(path) as archive:
+        for name in archive.namelist():
+            if name.lower() in ("docprops/thumbnail.jpeg", "docprops/thumbnail.jpg", "docprops/thumbnail.png"):
+                with Image.open(BytesIO(archive.read(name))) as image:
+                    return _png(image)
+    return None
+
+
+def _soffice_thumbnail(path: str, extension: str) -> Optional[bytes]:
+    soffice = shutil.which("soffice") or shutil.which("libreoffice")
+    if soffice is None:
+        return None
+    with tempfile.TemporaryDirectory() as outdir:
+        # Stored objects are named by hash; LibreOffice needs the extension.
+        source = os.path.join(outdir, "source" + extension)
+        shutil.copyfile(path, source)
+        subprocess.run(
+            [soffice, "--headless", "--convert-to", "pdf", "--outdir", outdir, source],
+            check=True, timeout=SOFFICE_TIMEOUT, capture_output=True,
+        )
+        image, _ = render_pdf_page(os.path.join(outdir, "source.pdf"))
+        return _png(image)
+
+
+def _office_preview(path: str, extension: str) -> Preview:
+    thumbnail = _embedded_office_thumbnail(path) or _soffice_thumbnail(path, extension)
+    return Preview(thumbnail, _excerpt(extract_office_text(path, limit=EXCERPT_LENGTH * 2)))
+
+
+def decode_text(data: bytes) -> str:
+    """
+    UTF-8, falling back to Shift_JIS (common for Japanese CSV/TXT). A
+    character cut off at the end of `data`, in either encoding, is dropped.
+    """
+    try:
+        return data.decode("utf-8").lstrip("\ufeff")
+    except UnicodeDecodeError as exc:
+        if exc.reason == "unexpected end of data":
+            return data[:exc.start].decode("utf-8", errors="replace").lstrip("\ufeff")
+    try:
+        # Not final: a trailing lead byte is held back instead of failing.
+        return codecs.getincrementaldecoder("cp932")().decode(data, final=False)
+    except UnicodeDecodeError:
+        return data.decode("utf-8", errors="replace")
+
+
+def _read_text(path: str, limit: int) -> str:
+    with open(path, "rb") as f:
+        return decode_text(f.read(limit * 4))
+
+
+def _text_preview(path: str, extension: str) -> Preview:
+    return Preview(None, _excerpt(_read_text(path, EXCERPT_LENGTH)))
+
+
+_GENERATORS = {
+    "pdf": _pdf_preview,
+    "image": _image_preview,
+    "office": _office_preview,
+    "text": _text_preview,
+}
+
+
+def generate_preview(path: str, file_name: str, file_type: Optional[str]) -> Optional[Preview]:
+    """
+    The preview for a local file, or None if its format is not supported.
+    """
+    kind = file_kind(file_name, file_type)
+    if kind is None:
+        return None
+    return _GENERATORS[kind](path, os.path.splitext(file_name or "")[1].lower())
+
+
+_TEXT_EXTRACTORS = {
+    "pdf": extract_pdf_text,
+    "office": extract_office_text,
+    "text": _read_text,
+}
+
+
+def extract_text(path: str, file_name: str, file_type: Optional[str]) -> Optional[str]:
+    """
+    Up to MAX_TEXT_LENGTH characters of a local file's text, or None if its
+    format has none.
+    """
+    extractor = _TEXT_EXTRACTORS.get(file_kind(file_name, file_type))
+    if extractor is None:
+        return None
+    text = extractor(path, MAX_TEXT_LENGTH)[:MAX_TEXT_LENGTH]
+    # PostgreSQL text can't hold NUL characters.
+    return text.replace("\x00", "") or None
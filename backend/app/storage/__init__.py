@@ -0,0 +1,28 @@
+# backend/app/storage/__init__.py
+
+"""
+Attachment storage: content-addressed objects behind a pluggable backend
+(STORAGE_BACKEND=local|s3), plus helpers for streaming upload bodies.
+"""
+
+import os
+from functools import lru_cache
+
+from .base import (
+    UPLOAD_DIRECTORY, TMP_DIRECTORY, STORAGE_BACKEND, MAX_UPLOAD_SIZE, MAX_RESUMABLE_UPLOAD_SIZE,
+    UPLOAD_CHUNK_SIZE, StorageBackend, object_key,
+)
+from .streaming import MULTIPART_OVERHEAD, UploadTooLarge, HashingWriter, StreamingUploadParser, spool_body
+
+
+@lru_cache
+def get_backend() -> StorageBackend:
+    if STORAGE_BACKEND == "s3":
+        from .s3 import S3StorageBackend
+        return S3StorageBackend(
+            bucket=os.getenv("S3_BUCKET", "softsusales-attachments"),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+            region=os.getenv("S3_REGION") or None,
+        )
+    from .local import LocalStorageBackend
+    return LocalStorageBackend(UPLOAD_DIRECTORY)
@@ -0,0 +1,126 @@
+# backend/app/storage/base.py
+
+"""
+Storage settings and the interface every attachment storage backend
+implements.
+
+Finished files are content-addressed: they live under objects/<aa>/<sha256>
+(aa being the first two hex digits), whatever the backend, and
+crud_attachment keeps their reference counts in stored_files.
+
+Resumable uploads are assembled by the backend from fixed-size chunks
+(only the last one may be shorter). The chunk size is fixed per upload
+session when it is created (UPLOAD_CHUNK_SIZE at the time), and chunk N
+covers bytes [N * chunk_size, (N + 1) * chunk_size), which maps directly
+onto S3 multipart upload parts and lets a retried chunk simply overwrite
+the previous attempt.
+"""
+
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+UPLOAD_DIRECTORY = os.getenv("UPLOAD_DIRECTORY", "/code/uploads")
+# Local spool for files being received, whatever the backend.
+TMP_DIRECTORY = os.path.join(UPLOAD_DIRECTORY, "tmp")
+
+# "local" or "s3".
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+
+# Maximum size of a file sent in a single multipart request, in bytes.
+MAX_UPLOAD_SIZE = int(os.getenv("ATTACHMENT_MAX_SIZE", str(100 * 1024 * 1024)))
+# Maximum size of a file sent through the resumable upload protocol.
+MAX_RESUMABLE_UPLOAD_SIZE = int(os.getenv("ATTACHMENT_MAX_RESUMABLE_SIZE", str(5 * 1024 * 1024 * 1024)))
+# Size of every resumable upload chunk but the last. S3 needs at least 5 MiB.
+UPLOAD_CHUNK_SIZE = int(os.getenv("ATTACHMENT_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+
+
+def object_key(sha256: str) -> str:
+    return f"objects/{sha256[:2]}/{sha256}"
+
+
+class StorageBackend(ABC):
+    """
+    Where attachment content lives. Methods block (disk or network I/O) and
+    are called from the threadpool.
+    """
+
+    name = None
+
+    # --- Content-addressed objects ---
+
+    @abstractmethod
+    def put_file(self, sha256: str, source_path: str) -> str:
+        """
+        Stores a fully received local file under its hash, consuming
+        `source_path`. If the content is already stored the file is just
+        removed. Returns the location recorded in attachments.file_path.
+        """
+
+    @abstractmethod
+    def delete_object(self, sha256: str):
+        """Removes the object, if it exists."""
+
+    def local_path(self, sha256: str) -> Optional[str]:
+        """The object's path on this host, or None for remote backends."""
+        return None
+
+    def download_url(self, sha256: str, filename: str, media_type: Optional[str]) -> Optional[str]:
+        """A URL clients can download the object from directly, if any."""
+        return None
+
+    @abstractmethod
+    def download_file(self, sha256: str, target_path: str):
+        """Copies the object to a local file."""
+
+    @contextmanager
+    def local_copy(self, sha256: str):
+        """
+        Yields a local path holding the object's content, downloading it to
+        a temporary file first when the backend is remote.
+        """
+        path = self.local_path(sha256)
+        if path is not None:
+            yield path
+            return
+        os.makedirs(TMP_DIRECTORY, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=TMP_DIRECTORY)
+        os.close(fd)
+        try:
+            self.download_file(sha256, path)
+            yield path
+        finally:
+            os.remove(path)
+
+    # --- Resumable uploads ---
+
+    @abstractmethod
+    def create_upload(self, upload_id: str) -> str:
+        """Prepares a resumable upload; returns the backend's handle for it."""
+
+    @abstractmethod
+    def write_chunk(self, upload_id: str, handle: str, offset: int, chunk_size: int, source_path: str):
+        """
+        Stores the chunk starting at byte `offset` of an upload made of
+        `chunk_size`-byte chunks from a local spool file.
+        """
+
+    @abstractmethod
+    def complete_upload(self, upload_id: str, handle: str, chunks: int) -> Tuple[str, int]:
+        """
+        Assembles the chunks and returns the (sha256, size) of the result,
+        which stays staged until promote_upload() or abort_upload(). Reads
+        the whole upload back, so it is called without holding any lock or
+        database connection; calling it again on a completed upload just
+        hashes it again.
+        """
+
+    @abstractmethod
+    def promote_upload(self, upload_id: str, sha256: str) -> str:
+        """Moves a completed upload into the object store, like put_file()."""
+
+    @abstractmethod
+    def abort_upload(self, upload_id: str, handle: str):
+        """Discards an upload, completed or not."""
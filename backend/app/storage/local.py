@@ -0,0 +1,79 @@
+# backend/app/storage/local.py
+
+import hashlib
+import os
+import shutil
+from typing import Optional, Tuple
+
+from app.storage.base import StorageBackend, object_key
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Stores objects on the local filesystem (the uploads volume). Resumable
+    uploads are assembled in place in uploads/<upload_id>, on the same
+    filesystem, so promoting them is a rename.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+        self.uploads_directory = os.path.join(root, "uploads")
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, object_key(sha256))
+
+    def _upload_path(self, upload_id: str) -> str:
+        return os.path.join(self.uploads_directory, upload_id)
+
+    def put_file(self, sha256: str, source_path: str) -> str:
+        path = self._object_path(sha256)
+        if os.path.exists(path):
+            os.remove(source_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(source_path, path)
+        return path
+
+    def delete_object(self, sha256: str):
+        try:
+            os.remove(self._object_path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, sha256: str) -> Optional[str]:
+        return self._object_path(sha256)
+
+    def download_file(self, sha256: str, target_path: str):
+        shutil.copyfile(self._object_path(sha256), target_path)
+
+    def create_upload(self, upload_id: str) -> str:
+        os.makedirs(self.uploads_directory, exist_ok=True)
+        open(self._upload_path(upload_id), "xb").close()
+        return upload_id
+
+    def write_chunk(self, upload_id: str, handle: str, offset: int, chunk_size: int, source_path: str):
+        with open(source_path, "rb") as source, open(self._upload_path(upload_id), "r+b") as target:
+            target.seek(offset)
+            shutil.copyfileobj(source, target, COPY_BUFFER_SIZE)
+        os.remove(source_path)
+
+    def complete_upload(self, upload_id: str, handle: str, chunks: int) -> Tuple[str, int]:
+        digest, size = hashlib.sha256(), 0
+        with open(self._upload_path(upload_id), "rb") as f:
+            while block := f.read(COPY_BUFFER_SIZE):
+                digest.update(block)
+                size += len(block)
+        return digest.hexdigest(), size
+
+    def promote_upload(self, upload_id: str, sha256: str) -> str:
+        return self.put_file(sha256, self._upload_path(upload_id))
+
+    def abort_upload(self, upload_id: str, handle: str):
+        try:
+            os.remove(self._upload_path(upload_id))
+        except FileNotFoundError:
+            pass
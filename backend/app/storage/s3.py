@@ -0,0 +1,129 @@
+# backend/app/storage/s3.py
+
+import hashlib
+import os
+from typing import Optional, Tuple
+
+from app.storage.base import StorageBackend, object_key
+
+# Lifetime of presigned download URLs, in seconds.
+S3_URL_EXPIRY = int(os.getenv("S3_URL_EXPIRY", "300"))
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Stores objects in an S3-compatible bucket (AWS S3, or MinIO locally).
+    Resumable uploads are S3 multipart uploads to uploads/<upload_id>; each
+    chunk is one part. Downloads are redirected to presigned URLs, so file
+    traffic does not pass through the app containers.
+
+    Credentials come from the usual AWS environment variables.
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint_url: str = None, region: str = None):
+        import boto3
+        from botocore.exceptions import ClientError
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self._client_error = ClientError
+
+    def _location(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def _staging_key(self, upload_id: str) -> str:
+        return f"uploads/{upload_id}"
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self._client_error as exc:
+            if exc.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, sha256: str, source_path: str) -> str:
+        key = object_key(sha256)
+        try:
+            if not self._exists(key):
+                self.client.upload_file(source_path, self.bucket, key)
+        finally:
+            os.remove(source_path)
+        return self._location(key)
+
+    def delete_object(self, sha256: str):
+        self.client.delete_object(Bucket=self.bucket, Key=object_key(sha256))
+
+    def download_url(self, sha256: str, filename: str, media_type: Optional[str]) -> Optional[str]:
+        from app.downloads import content_disposition
+
+        params = {
+            "Bucket": self.bucket,
+            "Key": object_key(sha256),
+            "ResponseContentDisposition": content_disposition(filename),
+        }
+        if media_type:
+            params["ResponseContentType"] = media_type
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=S3_URL_EXPIRY)
+
+    def download_file(self, sha256: str, target_path: str):
+        self.client.download_file(self.bucket, object_key(sha256), target_path)
+
+    def create_upload(self, upload_id: str) -> str:
+        response = self.client.create_multipart_upload(Bucket=self.bucket, Key=self._staging_key(upload_id))
+        return response["UploadId"]
+
+    def write_chunk(self, upload_id: str, handle: str, offset: int, chunk_size: int, source_path: str):
+        try:
+            with open(source_path, "rb") as body:
+                self.client.upload_part(
+                    Bucket=self.bucket, Key=self._staging_key(upload_id),
+                    UploadId=handle, PartNumber=offset // chunk_size + 1, Body=body,
+                )
+        finally:
+            os.remove(source_path)
+
+    def complete_upload(self, upload_id: str, handle: str, chunks: int) -> Tuple[str, int]:
+        key = self._staging_key(upload_id)
+        parts = []
+        try:
+            for page in self.client.get_paginator("list_parts").paginate(Bucket=self.bucket, Key=key, UploadId=handle):
+                parts += [{"PartNumber": p["PartNumber"], "ETag": p["ETag"]} for p in page.get("Parts", [])]
+        except self._client_error as exc:
+            # Completed by an earlier attempt that failed before promoting it.
+            if exc.response["Error"]["Code"] != "NoSuchUpload" or not self._exists(key):
+                raise
+        else:
+            if len(parts) != chunks:
+                raise ValueError(f"Expected {chunks} parts, found {len(parts)}")
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=handle, MultipartUpload={"Parts": parts},
+            )
+
+        # A streamed hash can't be carried across requests, so the assembled
+        # object is read back once.
+        digest, size = hashlib.sha256(), 0
+        body = self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        for block in body.iter_chunks(1024 * 1024):
+            digest.update(block)
+            size += len(block)
+        return digest.hexdigest(), size
+
+    def promote_upload(self, upload_id: str, sha256: str) -> str:
+        staging_key, key = self._staging_key(upload_id), object_key(sha256)
+        if not self._exists(key):
+            # Managed copy: switches to a multipart copy above 5 GB.
+            self.client.copy({"Bucket": self.bucket, "Key": staging_key}, self.bucket, key)
+        self.client.delete_object(Bucket=self.bucket, Key=staging_key)
+        return self._location(key)
+
+    def abort_upload(self, upload_id: str, handle: str):
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self._staging_key(upload_id), UploadId=handle)
+        except self._client_error:
+            pass
+        # Completed but never promoted.
+        self.client.delete_object(Bucket=self.bucket, Key=self._staging_key(upload_id))
@@ -0,0 +1,130 @@
+# backend/app/storage/streaming.py
+
+"""
+Receiving upload bodies.
+
+Uploads are read straight off the request stream and written to a local
+spool file in chunks (in the threadpool, never on the event loop) while a
+SHA-256 digest and byte count are updated. The size limit is checked on
+every chunk, so an oversized upload is cut off as soon as it crosses it.
+The finished spool file is then handed to the storage backend.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartParser
+
+from app.storage.base import MAX_UPLOAD_SIZE, TMP_DIRECTORY, StorageBackend
+
+# Allowance for multipart boundaries, part headers and form fields when
+# rejecting a request up front by its Content-Length.
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"File exceeds the maximum upload size of {limit} bytes.")
+
+
+class HashingWriter:
+    """
+    File-like sink for one uploaded file. Writes go to a temporary file in
+    TMP_DIRECTORY (for the local backend the same filesystem as the object
+    store, so commit() is a rename) and update the digest and size as they
+    happen.
+    """
+
+    def __init__(self, max_size: int = MAX_UPLOAD_SIZE):
+        os.makedirs(TMP_DIRECTORY, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=TMP_DIRECTORY)
+        self._file = os.fdopen(fd, "wb")
+        self._digest = hashlib.sha256()
+        self.max_size = max_size
+        self.size = 0
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadTooLarge(self.max_size)
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        # The multipart parser rewinds each file once its part is complete.
+        self._file.flush()
+        return self._file.seek(offset, whence)
+
+    def finish(self) -> str:
+        """Closes the spool file and hands over its path to the caller."""
+        self._file.close()
+        path, self.temp_path = self.temp_path, None
+        return path
+
+    def commit(self, backend: StorageBackend) -> str:
+        """
+        Stores the file under its hash and returns its location. If the same
+        content is already stored, the temporary copy is discarded.
+        """
+        return backend.put_file(self.sha256, self.finish())
+
+    def close(self):
+        """Discards the temporary file unless it was committed."""
+        if not self._file.closed:
+            self._file.close()
+        if self.temp_path is not None:
+            try:
+                os.remove(self.temp_path)
+            except FileNotFoundError:
+                pass
+            self.temp_path = None
+
+
+class StreamingUploadParser(MultiPartParser):
+    """
+    Multipart parser that streams file parts into a HashingWriter instead of
+    spooling them into memory / a SpooledTemporaryFile first.
+    """
+
+    def __init__(self, headers, stream, max_size: int = MAX_UPLOAD_SIZE):
+        super().__init__(headers, stream, max_files=1)
+        self.max_file_size = max_size
+        self.writers = []
+
+    def on_headers_finished(self) -> None:
+        super().on_headers_finished()
+        part = self._current_part
+        if part.file is None:
+            return
+        part.file.file.close()
+        writer = HashingWriter(self.max_file_size)
+        self.writers.append(writer)
+        part.file = UploadFile(file=writer, size=0, filename=part.file.filename, headers=part.file.headers)
+
+    async def close(self):
+        for writer in self.writers:
+            await run_in_threadpool(writer.close)
+
+
+async def spool_body(stream, max_size: int) -> HashingWriter:
+    """
+    Writes a raw request body to a HashingWriter, failing with
+    UploadTooLarge as soon as it exceeds `max_size`.
+    """
+    writer = await run_in_threadpool(HashingWriter, max_size)
+    try:
+        async for chunk in stream:
+            if chunk:
+                await run_in_threadpool(writer.write, chunk)
+    except BaseException:
+        await run_in_threadpool(writer.close)
+        raise
+    return writer
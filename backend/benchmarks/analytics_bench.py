@@ -0,0 +1,270 @@
+# backend/benchmarks/analytics_bench.py
+
+"""
+Benchmarks every public analytics function in app/services and the CRUD list
+functions against a seeded dataset of a given scale.
+
+Each function gets warmup runs, then timed repetitions in a fresh session
+(so the identity map never short-circuits a query). p50/p95 wall time and
+the number of SQL statements per call are written as JSON, and can be
+compared against a stored baseline.
+
+Usage (from backend/, with `docker compose up db` running):
+
+    python -m benchmarks.analytics_bench --scale 100k
+    python -m benchmarks.analytics_bench --scale 100k --save-baseline
+    python -m benchmarks.analytics_bench --scale 100k --compare
+
+The database defaults to softsusales_bench on localhost and can be changed
+with BENCH_DATABASE_URL; it is created and migrated automatically.
+"""
+
+import argparse
+import importlib
+import inspect
+import json
+import os
+import pkgutil
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import crud_activity, crud_agency, crud_attachment, crud_audit_log, crud_company, crud_deal, crud_note, crud_user
+from app.instrumentation import instrument_engine, track_queries
+from app import services
+from app.distribution_sketches import DistributionMetric
+from app.fiscal_calendar import Period, add_months
+from app.services import outcome_cube_service
+from app.services.analytics_service import Comparison
+from app.services.pivot_service import PivotDimension, PivotMeasure
+from benchmarks import dataset
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+BASELINES_DIR = os.path.join(BENCH_DIR, "baselines")
+
+
+def sample_arguments(engine):
+    """
+    Realistic arguments for functions that need them, taken from the data.
+    """
+    with engine.connect() as conn:
+        busiest_user = conn.execute(text(
+            "SELECT user_id FROM deals GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+        )).scalar()
+        busiest_deal = conn.execute(text(
+            "SELECT deal_id FROM activities GROUP BY deal_id ORDER BY count(*) DESC LIMIT 1"
+        )).scalar()
+        company_id = conn.execute(text("SELECT min(id) FROM companies")).scalar()
+    last_month = add_months(datetime.utcnow().date().replace(day=1), -1)
+    return {
+        "user_id": busiest_user,
+        "deal_id": busiest_deal,
+        "company_id": company_id,
+        "query": "Project",
+        "year": last_month.year,
+        "month": last_month.month,
+        "related_to": "deal",
+        "related_id": busiest_deal,
+        # The twelve months through last month
+        "start": add_months(last_month, -11),
+        "end": add_months(last_month, 1) - timedelta(days=1),
+        "period": Period.quarter,
+        "compare": Comparison.yoy,
+        "metric": DistributionMetric.deal_value,
+        "dimensions": [PivotDimension.user, PivotDimension.month],
+        "measures": [PivotMeasure.count, PivotMeasure.won_value, PivotMeasure.win_rate],
+    }
+
+
+def analytics_functions():
+    """
+    Every public function in app/services that takes a session as its
+    first argument (`db`), so new analytics are benchmarked without being
+    registered here. Named "<module without _service>.<function>".
+    """
+    for module_info in sorted(pkgutil.iter_modules(services.__path__), key=lambda m: m.name):
+        module = importlib.import_module(f"{services.__name__}.{module_info.name}")
+        prefix = module_info.name.removesuffix("_service")
+        for name, fn in inspect.getmembers(module, inspect.isfunction):
+            if name.startswith("_") or fn.__module__ != module.__name__:
+                continue
+            parameters = list(inspect.signature(fn).parameters)
+            if parameters and parameters[0] == "db":
+                yield f"{prefix}.{name}", fn
+
+
+CRUD_LIST_FUNCTIONS = [
+    ("crud.get_deals", crud_deal.get_deals),
+    ("crud.get_deals_by_user", crud_deal.get_deals_by_user),
+    ("crud.get_companies", crud_company.get_companies),
+    ("crud.get_users", crud_user.get_users),
+    ("crud.get_agencies", crud_agency.get_agencies),
+    ("crud.get_logs", crud_audit_log.get_logs),
+    ("crud.get_activities_for_deal", crud_activity.get_activities_for_deal),
+    ("crud.get_notes_for_item", crud_note.get_notes_for_item),
+    ("crud.get_attachments_for_item", crud_attachment.get_attachments_for_item),
+]
+
+
+def bind_arguments(fn, arguments):
+    """
+    Picks the keyword arguments `fn` needs from `arguments`. Returns None if
+    a required parameter can't be satisfied.
+    """
+    kwargs = {}
+    for param in list(inspect.signature(fn).parameters.values())[1:]:
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        if param.name in arguments:
+            kwargs[param.name] = arguments[param.name]
+        elif param.default is inspect.Parameter.empty:
+            return None
+    return kwargs
+
+
+def reset_caches():
+    """Drops in-process result caches, so every call is timed (and planned) cold."""
+    outcome_cube_service.clear_cache()
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+def time_function(Session, fn, kwargs, warmup, repetitions):
+    for _ in range(warmup):
+        reset_caches()
+        with Session() as db:
+            fn(db, **kwargs)
+
+    timings = []
+    queries = None
+    for _ in range(repetitions):
+        reset_caches()
+        with Session() as db, track_queries() as stats:
+            started = time.perf_counter()
+            fn(db, **kwargs)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = stats.count
+
+    ordered = sorted(timings)
+    return {
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "min_ms": round(ordered[0], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "queries": queries,
+        "repetitions": repetitions,
+    }
+
+
+def run(scale, warmup, repetitions, only=None, reseed=False):
+    engine = dataset.prepare(scale, reseed=reseed)
+    instrument_engine(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    arguments = sample_arguments(engine)
+
+    results = {}
+    for name, fn in list(analytics_functions()) + CRUD_LIST_FUNCTIONS:
+        if only and only not in name:
+            continue
+        kwargs = bind_arguments(fn, arguments)
+        if kwargs is None:
+            results[name] = {"skipped": "unsupported parameters"}
+            continue
+        print(f"  {name} ...", file=sys.stderr, flush=True)
+        try:
+            results[name] = time_function(Session, fn, kwargs, warmup, repetitions)
+        except Exception as exc:
+            results[name] = {"error": f"{type(exc).__name__}: {exc}"[:500]}
+
+    return {
+        "scale": scale,
+        "deals": dataset.SCALES[scale],
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "host": platform.node(),
+        "warmup": warmup,
+        "repetitions": repetitions,
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Returns (name, baseline result, current result, ratio) for every
+    function whose p50 got slower by more than `threshold`, whose query
+    count grew, or that ran in the baseline but now fails or is skipped
+    (ratio None).
+    """
+    regressions = []
+    for name, current in report["results"].items():
+        before = baseline["results"].get(name)
+        if not before or "p50_ms" not in before:
+            continue
+        if "p50_ms" not in current:
+            regressions.append((name, before, current, None))
+            continue
+        ratio = current["p50_ms"] / before["p50_ms"] if before["p50_ms"] else 1.0
+        if ratio > 1 + threshold or (current["queries"] or 0) > (before["queries"] or 0):
+            regressions.append((name, before, current, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=dataset.SCALES, default="10k")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repetitions", type=int, default=10)
+    parser.add_argument("--only", help="Only run functions whose name contains this")
+    parser.add_argument("--reseed", action="store_true", help="Regenerate the dataset even if it looks current")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/analytics_<scale>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline for this scale")
+    parser.add_argument("--compare", action="store_true", help="Fail if results regress against the stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown before failing (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = run(args.scale, args.warmup, args.repetitions, only=args.only, reseed=args.reseed)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"analytics_{args.scale}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    baseline_path = os.path.join(BASELINES_DIR, f"analytics_{args.scale}.json")
+    if args.save_baseline:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Baseline saved to {baseline_path}", file=sys.stderr)
+
+    for name, result in report["results"].items():
+        if "p50_ms" in result:
+            print(f"{name:55} p50 {result['p50_ms']:>10.2f} ms  p95 {result['p95_ms']:>10.2f} ms  {result['queries']:>4} queries")
+        else:
+            print(f"{name:55} {result}")
+
+    if args.compare:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, before, current, ratio in regressions:
+            if ratio is None:
+                print(f"REGRESSION {name}: ran in the baseline ({before['p50_ms']} ms), now {current}")
+                continue
+            print(
+                f"REGRESSION {name}: p50 {before['p50_ms']} -> {current['p50_ms']} ms ({ratio:.2f}x), "
+                f"queries {before['queries']} -> {current['queries']}"
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# backend/benchmarks/async_vs_sync.py
+
+"""
+Throughput comparison between the sync (psycopg2 + threadpool) stack and the
+async (asyncpg + AsyncSession) stack.
+
+Both stacks serve the same two endpoints, backed by the same CRUD/service
+code, from their own uvicorn process. A pool of concurrent clients then
+hammers each one for a fixed duration and we report requests/second and
+latency percentiles.
+
+Usage (from backend/, with the database from docker-compose running):
+
+    python -m benchmarks.async_vs_sync --clients 200 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import statistics
+import time
+
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.crud import crud_deal
+from app.database import get_async_db, get_db
+from app.routers.analytics import run_analytics
+from app.services import analytics_service
+
+ENDPOINTS = ["/deals?limit=50", "/leaderboard"]
+
+
+def build_sync_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/deals")
+    def deals(limit: int = 50, db: Session = Depends(get_db)):
+        return [{"id": d.id, "title": d.title} for d in crud_deal.get_deals(db, limit=limit)]
+
+    @app.get("/leaderboard")
+    def leaderboard(db: Session = Depends(get_db)):
+        return analytics_service.get_sales_leaderboard(db)
+
+    return app
+
+
+def build_async_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/deals")
+    async def deals(limit: int = 50, db: AsyncSession = Depends(get_async_db)):
+        return [{"id": d.id, "title": d.title} for d in await crud_deal.get_deals_async(db, limit=limit)]
+
+    @app.get("/leaderboard")
+    async def leaderboard(db: AsyncSession = Depends(get_async_db)):
+        return await run_analytics(db, analytics_service.get_sales_leaderboard)
+
+    return app
+
+
+def serve(stack: str, port: int):
+    app = build_sync_app() if stack == "sync" else build_async_app()
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def wait_until_ready(base_url: str, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(ENDPOINTS[0])
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+async def hammer(base_url: str, path: str, clients: int, duration: float):
+    """
+    Runs `clients` concurrent request loops against one endpoint for
+    `duration` seconds, returning per-request latencies and the error count.
+    """
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    deadline = time.monotonic() + duration
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(clients)))
+    return latencies, errors
+
+
+def summarize(latencies, errors, duration):
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / duration, 1),
+        "p50_ms": round(pick(0.50), 2),
+        "p95_ms": round(pick(0.95), 2),
+        "p99_ms": round(pick(0.99), 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+    }
+
+
+def run_stack(stack: str, port: int, clients: int, duration: float):
+    process = multiprocessing.Process(target=serve, args=(stack, port), daemon=True)
+    process.start()
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(wait_until_ready(base_url))
+        results = {}
+        for path in ENDPOINTS:
+            latencies, errors = asyncio.run(hammer(base_url, path, clients, duration))
+            results[path] = summarize(latencies, errors, duration)
+        return results
+    finally:
+        process.terminate()
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per endpoint")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    report = {
+        "clients": args.clients,
+        "duration": args.duration,
+        "sync": run_stack("sync", args.port, args.clients, args.duration),
+        "async": run_stack("async", args.port + 1, args.clients, args.duration),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# backend/benchmarks/download_bench.py
+
+"""
+Throughput of concurrent large attachment downloads.
+
+Serves one generated file from a uvicorn process through both the old
+FileResponse and AttachmentResponse, then has concurrent clients download
+it repeatedly: whole-file downloads, ranged downloads (a video player or
+PDF viewer seeking) and conditional revalidations (If-None-Match, which
+should be answered with 304s and no body).
+
+Usage (from backend/):
+
+    python -m benchmarks.download_bench --size-mb 256 --clients 32 --duration 15
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import FileResponse
+
+from app.downloads import AttachmentResponse
+from benchmarks.async_vs_sync import summarize
+
+
+def build_app(path: str, content_hash: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/file-response")
+    def file_response():
+        return FileResponse(path=path, filename="bench.bin", media_type="application/octet-stream")
+
+    @app.get("/attachment-response")
+    def attachment_response():
+        return AttachmentResponse(
+            path=path, stat_result=os.stat(path), filename="bench.bin",
+            media_type="application/octet-stream", content_hash=content_hash,
+        )
+
+    return app
+
+
+def serve(path: str, content_hash: str, port: int):
+    uvicorn.run(build_app(path, content_hash), host="127.0.0.1", port=port, log_level="warning")
+
+
+def create_file(size: int):
+    """A file of random bytes and its SHA-256."""
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(prefix="download_bench_")
+    with os.fdopen(fd, "wb") as f:
+        remaining = size
+        while remaining:
+            block = os.urandom(min(remaining, 4 * 1024 * 1024))
+            digest.update(block)
+            f.write(block)
+            remaining -= len(block)
+    return path, digest.hexdigest()
+
+
+async def wait_until_ready(base_url: str, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.head("/")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+async def download(base_url, path, mode, size, clients, duration):
+    """
+    Runs `clients` concurrent download loops for `duration` seconds.
+    Returns latencies, error count and the number of body bytes received.
+    """
+    latencies, errors, received = [], 0, 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    deadline = time.monotonic() + duration
+    etag = None
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        if mode == "revalidate":
+            etag = (await client.get(path, headers={"Range": "bytes=0-0"})).headers.get("etag")
+
+        async def worker():
+            nonlocal errors, received
+            rng = random.Random()
+            while time.monotonic() < deadline:
+                headers = {}
+                if mode == "range":
+                    start = rng.randrange(0, max(1, size - 1024 * 1024))
+                    headers["Range"] = f"bytes={start}-{start + 1024 * 1024 - 1}"
+                elif mode == "revalidate" and etag:
+                    headers["If-None-Match"] = etag
+                started = time.perf_counter()
+                try:
+                    async with client.stream("GET", path, headers=headers) as response:
+                        if response.status_code >= 400:
+                            raise httpx.HTTPStatusError("bad status", request=response.request, response=response)
+                        async for chunk in response.aiter_raw():
+                            received += len(chunk)
+                    latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(clients)))
+    return latencies, errors, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per endpoint and mode")
+    parser.add_argument("--port", type=int, default=8200)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    path, content_hash = create_file(size)
+    process = multiprocessing.Process(target=serve, args=(path, content_hash, args.port), daemon=True)
+    process.start()
+    base_url = f"http://127.0.0.1:{args.port}"
+    report = {"size_mb": args.size_mb, "clients": args.clients, "duration": args.duration}
+    try:
+        asyncio.run(wait_until_ready(base_url))
+        for endpoint in ("/file-response", "/attachment-response"):
+            for mode in ("full", "range", "revalidate"):
+                latencies, errors, received = asyncio.run(
+                    download(base_url, endpoint, mode, size, args.clients, args.duration)
+                )
+                result = summarize(latencies, errors, args.duration)
+                result["mb_per_s"] = round(received / args.duration / 1024 / 1024, 1)
+                report[f"{endpoint.strip('/')}:{mode}"] = result
+    finally:
+        process.terminate()
+        process.join()
+        os.remove(path)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
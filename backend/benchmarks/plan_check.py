@@ -0,0 +1,171 @@
+# backend/benchmarks/plan_check.py
+
+"""
+Checks the query plans of the analytics and CRUD functions that
+analytics_bench times, against a seeded dataset.
+
+Each function runs once while every statement it executes is captured;
+the statements are then EXPLAINed with their actual parameters. A
+sequential scan of a large table (LARGE_TABLE_ROWS rows or more) whose
+filter the planner expects to keep less than SELECTIVE_FRACTION of the
+rows means an index is missing and fails the check. Scans that read most
+of a table by design (whole-table aggregates, "every deal of type X") are
+listed but allowed, since no index would make them cheaper. A function
+that raises also fails the check; one that can't be called with the
+sample arguments (a required parameter analytics_bench has no value for)
+is reported as skipped.
+
+Usage (from backend/, with `docker compose up db` running):
+
+    python -m benchmarks.plan_check --scale 100k
+"""
+
+import argparse
+import inspect
+import sys
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks import dataset
+from benchmarks.analytics_bench import CRUD_LIST_FUNCTIONS, analytics_functions, bind_arguments, sample_arguments
+
+LARGE_TABLE_ROWS = 10_000
+SELECTIVE_FRACTION = 0.2
+
+
+@contextmanager
+def capture_statements(engine):
+    """Collects (statement, parameters) of everything executed on `engine`."""
+    captured: List[Tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith("EXPLAIN"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def explain(db, statement: str, parameters) -> Dict:
+    """The JSON plan (the top "Plan" node) of a captured statement."""
+    cursor = db.connection().connection.cursor()
+    cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+    return cursor.fetchone()[0][0]["Plan"]
+
+
+def plan_nodes(node: Dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def function_plans(engine, Session, functions, arguments):
+    """
+    Yields (name, [(statement, plan), ...]) for every function, (name,
+    error message) if it fails with the sample arguments, or (name, None)
+    if it can't be called with them.
+    """
+    for name, fn in functions:
+        kwargs = bind_arguments(fn, arguments)
+        if kwargs is None:
+            yield name, None
+            continue
+        with Session() as db:
+            try:
+                with capture_statements(engine) as captured:
+                    fn(db, **kwargs)
+            except Exception as exc:
+                yield name, f"{type(exc).__name__}: {exc}"[:300]
+                continue
+            db.rollback()
+            yield name, [(statement, explain(db, statement, parameters)) for statement, parameters in captured]
+
+
+def missing_arguments(fn, arguments) -> List[str]:
+    """The required parameters of `fn` that `arguments` has no value for."""
+    return [
+        param.name for param in list(inspect.signature(fn).parameters.values())[1:]
+        if param.name not in arguments and param.default is inspect.Parameter.empty
+        and param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD)
+    ]
+
+
+def table_sizes(engine) -> Dict[str, float]:
+    with engine.connect() as conn:
+        return dict(conn.execute(text(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+        )).all())
+
+
+def sequential_scans(plan: Dict, sizes: Dict[str, float]):
+    """
+    (table, table rows, estimated rows kept, filter) of every sequential
+    scan of a large table in the plan.
+    """
+    for node in plan_nodes(plan):
+        if node["Node Type"] != "Seq Scan":
+            continue
+        rows = sizes.get(node["Relation Name"], 0)
+        if rows >= LARGE_TABLE_ROWS:
+            yield node["Relation Name"], rows, node["Plan Rows"], node.get("Filter")
+
+
+def check(engine):
+    """(failures, allowed, errors, skipped) of every checked function."""
+    Session = sessionmaker(bind=engine, autoflush=False)
+    sizes = table_sizes(engine)
+    functions = list(analytics_functions()) + CRUD_LIST_FUNCTIONS
+    arguments = sample_arguments(engine)
+    failures, allowed, errors, skipped = [], [], [], []
+
+    for name, plans in function_plans(engine, Session, functions, arguments):
+        if plans is None:
+            skipped.append((name, missing_arguments(dict(functions)[name], arguments)))
+            continue
+        if isinstance(plans, str):
+            errors.append((name, plans))
+            continue
+        for statement, plan in plans:
+            for table, rows, kept, condition in sequential_scans(plan, sizes):
+                entry = (name, table, kept / rows, condition, statement)
+                if condition and kept / rows < SELECTIVE_FRACTION:
+                    failures.append(entry)
+                else:
+                    allowed.append(entry)
+    return failures, allowed, errors, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=dataset.SCALES, default="100k")
+    parser.add_argument("--reseed", action="store_true", help="Regenerate the dataset even if it looks current")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Also print the allowed scans")
+    args = parser.parse_args()
+
+    engine = dataset.prepare(args.scale, reseed=args.reseed)
+    failures, allowed, errors, skipped = check(engine)
+
+    if args.verbose:
+        for name, table, fraction, condition, _ in allowed:
+            print(f"allowed  {name:50} {table:20} {fraction:6.1%}  {condition or '(no filter)'}")
+    for name, missing in skipped:
+        print(f"skipped  {name:50} no sample value for {', '.join(missing)}")
+    for name, message in errors:
+        print(f"error    {name:50} {message}")
+    for name, table, fraction, condition, statement in failures:
+        print(f"SEQ SCAN {name:50} {table:20} {fraction:6.1%}  {condition}\n         {' '.join(statement.split())[:300]}")
+
+    print(f"{len(failures)} missing-index scan(s), {len(allowed)} allowed full scan(s), "
+          f"{len(errors)} error(s), {len(skipped)} skipped function(s)")
+    if failures or errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
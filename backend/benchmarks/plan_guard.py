@@ -0,0 +1,197 @@
+# backend/benchmarks/plan_guard.py
+
+"""
+Query plan regression guard for the analytics and CRUD functions that
+analytics_bench times.
+
+Every statement each function executes is captured and EXPLAINed against
+a seeded dataset (see plan_check), and its plan is reduced to a shape: the
+tree of node types with the tables, indexes and join types they use.
+Partitions and their indexes are named after their parent, and identical
+partition scans under one Append collapse into one line, so a new yearly
+partition doesn't count as a change. Shapes and estimated costs are
+stored as a baseline per scale; a later run fails when
+
+  * a statement's plan changes shape, e.g. a new sequential scan or nested
+    loop on a large table, or an index no longer used;
+  * its estimated total cost grows by more than --threshold;
+  * a function runs a statement the baseline doesn't know;
+  * a function can't be called with analytics_bench's sample arguments,
+    so its plans would silently go unchecked.
+
+Statements are matched by their fingerprint (literals and IN lists
+collapsed), so changing a parameter value is not a change.
+
+Usage (from backend/, with `docker compose up db` running):
+
+    python -m benchmarks.plan_guard --scale 100k --save-baseline
+    python -m benchmarks.plan_guard --scale 100k
+"""
+
+import argparse
+import difflib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.instrumentation import fingerprint
+from benchmarks import dataset
+from benchmarks.analytics_bench import BASELINES_DIR, CRUD_LIST_FUNCTIONS, analytics_functions, sample_arguments
+from benchmarks.plan_check import LARGE_TABLE_ROWS, function_plans, missing_arguments, table_sizes
+
+# Node properties that make up a plan's shape, besides its type.
+SHAPE_PROPERTIES = ("Relation Name", "Index Name", "Join Type", "Strategy", "Parent Relationship")
+# Node types worth calling out when they appear on a large table.
+WATCHED_NODES = ("Seq Scan", "Nested Loop")
+
+
+def partition_parents(engine) -> Dict[str, str]:
+    """Partition (and partition index) name -> its parent's name."""
+    with engine.connect() as conn:
+        return dict(conn.execute(text(
+            "SELECT child.relname, parent.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = inhrelid JOIN pg_class parent ON parent.oid = inhparent"
+        )).all())
+
+
+def _describe(node: Dict, parents: Dict[str, str]) -> str:
+    parts = [node["Node Type"]]
+    for key in SHAPE_PROPERTIES:
+        if key in node:
+            parts.append(f"{key.split()[0].lower()}={parents.get(node[key], node[key])}")
+    return " ".join(parts)
+
+
+def plan_shape(node: Dict, parents: Dict[str, str], depth: int = 0) -> List[str]:
+    """The plan as indented lines, one per node."""
+    lines = ["  " * depth + _describe(node, parents)]
+    children = []
+    for child in node.get("Plans", []):
+        subtree = plan_shape(child, parents, depth + 1)
+        if subtree not in children:  # one line per partition is enough
+            children.append(subtree)
+    for subtree in children:
+        lines.extend(subtree)
+    return lines
+
+
+def large_tables(engine) -> set:
+    parents = partition_parents(engine)
+    return {parents.get(name, name) for name, rows in table_sizes(engine).items() if rows >= LARGE_TABLE_ROWS}
+
+
+def capture(engine) -> Dict[str, Dict]:
+    """
+    {function: {fingerprint: {"shape": [...], "cost": float, "statement": str}}},
+    or {function: {"error": str}} / {function: {"skipped": [parameter, ...]}}.
+    """
+    Session = sessionmaker(bind=engine, autoflush=False)
+    parents = partition_parents(engine)
+    functions = list(analytics_functions()) + CRUD_LIST_FUNCTIONS
+    arguments = sample_arguments(engine)
+    captured = {}
+    for name, plans in function_plans(engine, Session, functions, arguments):
+        if plans is None:
+            captured[name] = {"skipped": missing_arguments(dict(functions)[name], arguments)}
+            continue
+        if isinstance(plans, str):
+            captured[name] = {"error": plans}
+            continue
+        statements = {}
+        for statement, plan in plans:
+            statements[fingerprint(statement)] = {
+                "shape": plan_shape(plan, parents),
+                "cost": plan["Total Cost"],
+                "statement": " ".join(statement.split()),
+            }
+        captured[name] = statements
+    return captured
+
+
+def _new_watched_nodes(before: List[str], after: List[str], tables: set) -> List[str]:
+    added = set(line.strip() for line in after) - set(line.strip() for line in before)
+    return sorted(
+        line for line in added
+        if line.startswith(WATCHED_NODES) and (line.startswith("Nested Loop") or any(f"relation={t}" in line.split() for t in tables))
+    )
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, tables: set) -> List[str]:
+    """Human-readable problems, empty when nothing regressed."""
+    problems = []
+    for name, statements in current.items():
+        if "skipped" in statements:
+            problems.append(f"{name}: not checked, no sample value for {', '.join(statements['skipped'])}")
+            continue
+        before_statements = baseline.get(name)
+        if before_statements is None:
+            problems.append(f"{name}: not in the baseline")
+            continue
+        if "error" in statements:
+            if "error" not in before_statements:
+                problems.append(f"{name}: now fails: {statements['error']}")
+            continue
+        for key, after in statements.items():
+            before = before_statements.get(key)
+            if before is None:
+                problems.append(f"{name}: new statement: {after['statement'][:200]}")
+                continue
+            if after["shape"] != before["shape"]:
+                watched = _new_watched_nodes(before["shape"], after["shape"], tables)
+                diff = "\n".join(
+                    "    " + line for line in difflib.unified_diff(before["shape"], after["shape"], "baseline", "current", lineterm="", n=1)
+                )
+                headline = f" (new: {'; '.join(watched)})" if watched else ""
+                problems.append(f"{name}: plan changed shape{headline}\n    {after['statement'][:200]}\n{diff}")
+            elif before["cost"] and after["cost"] > before["cost"] * (1 + threshold):
+                problems.append(
+                    f"{name}: estimated cost {before['cost']:.0f} -> {after['cost']:.0f} "
+                    f"({after['cost'] / before['cost']:.2f}x)\n    {after['statement'][:200]}"
+                )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=dataset.SCALES, default="100k")
+    parser.add_argument("--reseed", action="store_true", help="Regenerate the dataset even if it looks current")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the current plans as the baseline for this scale")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Allowed estimated cost growth before failing (0.5 = 50%%)")
+    args = parser.parse_args()
+
+    engine = dataset.prepare(args.scale, reseed=args.reseed)
+    current = capture(engine)
+    baseline_path = os.path.join(BASELINES_DIR, f"plans_{args.scale}.json")
+
+    if args.save_baseline:
+        skipped = [name for name, statements in current.items() if "skipped" in statements]
+        if skipped:
+            sys.exit(f"Not saving a baseline without {', '.join(skipped)}: no sample arguments for them")
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump({
+                "scale": args.scale,
+                "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+                "functions": current,
+            }, f, indent=2, ensure_ascii=False, sort_keys=True)
+        statements = sum(len(s) for s in current.values() if "error" not in s)
+        print(f"Baseline of {statements} statement plans saved to {baseline_path}")
+        return
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)["functions"]
+    problems = compare(current, baseline, args.threshold, large_tables(engine))
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    print(f"{len(problems)} plan regression(s) across {len(current)} functions")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# backend/tests/test_plan_check.py
+
+"""
+Runs the query plan check against the benchmark database
+(BENCH_DATABASE_URL), seeded at PLAN_CHECK_SCALE: 100k by default, as for
+plan_check. Skipped when no database server is reachable.
+"""
+
+import os
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from benchmarks import dataset, plan_check
+
+
+@pytest.fixture(scope="module")
+def engine():
+    try:
+        engine = dataset.prepare(os.environ.get("PLAN_CHECK_SCALE", "100k"))
+    except OperationalError as exc:
+        pytest.skip(f"No benchmark database: {exc.orig}")
+    yield engine
+    engine.dispose()
+
+
+def test_no_missing_index_scans_or_errors(engine):
+    failures, _, errors, _ = plan_check.check(engine)
+    assert [(name, table, condition) for name, table, _, condition, _ in failures] == []
+    assert errors == []
@@ -0,0 +1,19 @@
+# backend/tests/test_preview_service.py
+
+from app.services.preview_service import decode_text
+
+TEXT = "見積書の送付について。" * 300
+
+
+def test_decode_text_drops_a_utf8_character_cut_off_at_the_end():
+    data = TEXT.encode("utf-8")
+    cut = data[:2000]  # 3-byte characters: 2000 falls inside one
+    assert len(cut) % 3
+    assert decode_text(cut) == TEXT[:len(cut) // 3]
+
+
+def test_decode_text_drops_a_shift_jis_character_cut_off_at_the_end():
+    data = TEXT.encode("cp932")
+    cut = data[:2001]  # 2-byte characters: 2001 falls inside one
+    assert decode_text(cut) == TEXT[:1000]
+    assert decode_text(data[:2000]) == TEXT[:1000]
@@ -16,6 +16,8 @@ import {
   SearchResult,
   DashboardPreferences,
   UserPerformanceMetrics,
+  FiscalPeriod,
+  KpiCompare,
   ChannelAnalyticsData,
   AgencyPerformance,
   ChurnAnalysisData,
@@ -55,13 +57,13 @@ export const getCurrentUser = async (): Promise<User> => {
 
 // --- Analytics ---
 
-export const getDashboardData = async (): Promise<DashboardData> => {
-  const response = await apiClient.get('/analytics/dashboard');
+export const getDashboardData = async (compare?: KpiCompare): Promise<DashboardData> => {
+  const response = await apiClient.get('/analytics/dashboard', { params: { compare } });
   return response.data;
 };
 
-export const getDetailedUserPerformance = async (userId: number): Promise<UserPerformanceMetrics> => {
-  const response = await apiClient.get(`/analytics/user-performance/detailed/${userId}`);
+export const getDetailedUserPerformance = async (userId: number, period?: FiscalPeriod): Promise<UserPerformanceMetrics> => {
+  const response = await apiClient.get(`/analytics/user-performance/detailed/${userId}`, { params: { period } });
   return response.data;
 };
 
@@ -90,8 +92,8 @@ export const getDealOutcomeBreakdowns = async () => {
   return response.data;
 };
 
-export const getSalesForecast = async (): Promise<ForecastEntry[]> => {
-  const response = await apiClient.get('/analytics/forecast');
+export const getSalesForecast = async (period?: FiscalPeriod): Promise<ForecastEntry[]> => {
+  const response = await apiClient.get('/analytics/forecast', { params: { period } });
   return response.data;
 };
 
@@ -118,8 +120,8 @@ export const postMonthlyChurnData = async (data: {
   return response.data;
 };
 
-export const getMonthlyCancellationRate = async () => {
-  const response = await apiClient.get('/analytics/monthly-cancellation-rate');
+export const getMonthlyCancellationRate = async (period?: FiscalPeriod) => {
+  const response = await apiClient.get('/analytics/monthly-cancellation-rate', { params: { period } });
   return response.data;
 };
 
@@ -39,6 +39,26 @@ export interface Deal {
   forecast_accuracy?: "高" | "中" | "低";
 }
 
+export type KpiCompare = 'mom' | 'yoy';
+
+export interface MetricComparison {
+  current: number;
+  // Value of the month compared against, and the difference from it
+  previous: number | null;
+  change: number | null;
+  change_percent: number | null;
+  previous_month: number | null;
+  last_year: number | null;
+}
+
+// This JST month to date against the previous month or the same month last year
+export interface KpiComparison {
+  compare: KpiCompare;
+  period: string;
+  previous_period: string;
+  metrics: Record<'revenue' | 'deals_won' | 'deals_lost' | 'new_deals' | 'win_rate' | 'average_deal_size', MetricComparison>;
+}
+
 // Defines the structure for the KPI data from the analytics endpoint
 export interface KpiData {
   total_deals: number;
@@ -46,7 +66,10 @@ export interface KpiData {
   win_rate: number;
   average_deal_size: number;
   average_time_to_close: number;
+  median_time_to_close: number;
+  p90_time_to_close: number;
   arpu: number;
+  comparison?: KpiComparison | null;
 }
 
 export interface ChartDataPoint {
@@ -161,6 +184,10 @@ export interface LeaderboardEntry {
   average_deal_size: number;
 }
 
+// Time series bucketing: JST months ("2025-04"), or fiscal quarters
+// ("FY2025-Q1") and years ("FY2025") starting in April.
+export type FiscalPeriod = 'month' | 'quarter' | 'year';
+
 export interface ForecastEntry {
   month: string;
   projected_revenue: number;
@@ -221,6 +248,8 @@ export interface UserPerformanceMetrics {
   user_id: number;
   user_name: string;
   average_days_to_win: number;
+  median_days_to_win: number;
+  p90_days_to_win: number;
   total_revenue: number;
   deals_won: number;
   win_rate: number;